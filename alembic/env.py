@@ -14,6 +14,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 
 from database import Base  # Impor Base dari file database.py Anda
 import models            # Impor file models.py Anda (ini mendaftarkan model Anda ke Base)
+import partisi
 # --- AKHIR BLOK TAMBAHAN ---
 
 
@@ -21,6 +22,10 @@ import models            # Impor file models.py Anda (ini mendaftarkan model And
 # access to the values within the .ini file in use.
 config = context.config
 
+# DATABASE_URL dari environment menimpa sqlalchemy.url di alembic.ini
+if os.getenv("DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL"))
+
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
 if config.config_file_name is not None:
@@ -34,6 +39,26 @@ if config.config_file_name is not None:
 # --- UBAH BARIS INI ---
 # Arahkan 'target_metadata' ke Base.metadata dari proyek Anda
 target_metadata = Base.metadata
+
+
+# R*Tree dan FTS5 (beserta shadow table-nya) dikelola spatial.py dan search.py, bukan models.py
+VIRTUAL_TABLE_PREFIX = ("trafo_rtree", "trafo_fts", "group_trafo_fts")
+# Partisi bulanan, arsip dan penghitung id hasil_kalkulasi dikelola partisi.py
+PARTISI_PREFIX = (partisi.PREFIX_PARTISI, partisi.PARTISI_DEFAULT, partisi.PREFIX_ARSIP, partisi.TABEL_SEQ)
+
+def include_name(name, type_, parent_names):
+    if type_ == "table" and name is not None:
+        return not name.startswith(VIRTUAL_TABLE_PREFIX + PARTISI_PREFIX)
+    return True
+
+# hasil_kalkulasi sendiri juga dikelola partisi.py (tabel partisi PostgreSQL / view SQLite):
+# primary key dan index-nya sengaja berbeda dari models.py
+def include_object(object_, name, type_, reflected, compare_to):
+    if type_ == "table":
+        return name != partisi.TABEL
+    if type_ in ("index", "unique_constraint", "foreign_key_constraint"):
+        return object_.table.name != partisi.TABEL
+    return True
 # --- AKHIR PERUBAHAN ---
 
 
@@ -61,6 +86,8 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        include_name=include_name,
+        include_object=include_object,
         render_as_batch=True  # <-- TAMBAHKAN INI (Otomatis Batch Mode)
     )
 
@@ -85,6 +112,8 @@ def run_migrations_online() -> None:
         context.configure(
             connection=connection, 
             target_metadata=target_metadata,
+            include_name=include_name,
+            include_object=include_object,
             render_as_batch=True  # <-- TAMBAHKAN INI (Otomatis Batch Mode)
         )
 
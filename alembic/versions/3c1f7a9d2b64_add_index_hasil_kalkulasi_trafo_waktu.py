@@ -0,0 +1,30 @@
+"""add index hasil_kalkulasi (id_trafo, waktu_kalkulasi desc)
+
+Revision ID: 3c1f7a9d2b64
+Revises: 9e6c482a9a19
+Create Date: 2026-10-18 10:02:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f7a9d2b64'
+down_revision: Union[str, Sequence[str], None] = '9e6c482a9a19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('hasil_kalkulasi', schema=None) as batch_op:
+        batch_op.create_index('ix_hasil_kalkulasi_trafo_waktu', ['id_trafo', sa.text('waktu_kalkulasi DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('hasil_kalkulasi', schema=None) as batch_op:
+        batch_op.drop_index('ix_hasil_kalkulasi_trafo_waktu')
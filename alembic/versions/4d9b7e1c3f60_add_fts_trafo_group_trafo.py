@@ -0,0 +1,58 @@
+"""add fts trafo and group_trafo
+
+Revision ID: 4d9b7e1c3f60
+Revises: e81f4c2a6d35
+Create Date: 2026-10-18 14:52:10.674920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d9b7e1c3f60'
+down_revision: Union[str, Sequence[str], None] = 'e81f4c2a6d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabel sumber -> (tabel FTS, kolom), sama dengan search.INDEX
+INDEX = {
+    "trafo": ("trafo_fts", ["name", "brand", "type"]),
+    "group_trafo": ("group_trafo_fts", ["name", "kodegrup"]),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for tabel, (fts, kolom) in INDEX.items():
+        daftar = ", ".join(kolom)
+        new = ", ".join(f"new.{k}" for k in kolom)
+        old = ", ".join(f"old.{k}" for k in kolom)
+        op.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({daftar}, content='{tabel}', content_rowid='id', tokenize='trigram')")
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabel} BEGIN "
+            f"INSERT INTO {fts}(rowid, {daftar}) VALUES (new.id, {new}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabel} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {daftar}) VALUES ('delete', old.id, {old}); END"
+        )
+        op.execute(
+            f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabel} BEGIN "
+            f"INSERT INTO {fts}({fts}, rowid, {daftar}) VALUES ('delete', old.id, {old}); "
+            f"INSERT INTO {fts}(rowid, {daftar}) VALUES (new.id, {new}); END"
+        )
+        op.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    for fts, _ in INDEX.values():
+        for suffix in ("ai", "ad", "au"):
+            op.execute(f"DROP TRIGGER IF EXISTS {fts}_{suffix}")
+        op.execute(f"DROP TABLE IF EXISTS {fts}")
@@ -0,0 +1,77 @@
+"""add table hasil_kalkulasi_rollup
+
+Revision ID: 5a0c93e7d1f8
+Revises: b4e2d81f6a07
+Create Date: 2026-10-18 11:26:18.730442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0c93e7d1f8'
+down_revision: Union[str, Sequence[str], None] = 'b4e2d81f6a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRIK = ['total_kva', 'total_kw', 'sisa_kap', 'kv_r', 'kv_s', 'kv_t', 'kw_r', 'kw_s', 'kw_t']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('hasil_kalkulasi_rollup',
+    sa.Column('id_trafo', sa.Integer(), nullable=False),
+    sa.Column('bucket', sa.String(), nullable=False),
+    sa.Column('bucket_start', sa.DateTime(), nullable=False),
+    sa.Column('jumlah', sa.Integer(), nullable=False),
+    sa.Column('min_total_kva', sa.Float(), nullable=True),
+    sa.Column('max_total_kva', sa.Float(), nullable=True),
+    sa.Column('avg_total_kva', sa.Float(), nullable=True),
+    sa.Column('min_total_kw', sa.Float(), nullable=True),
+    sa.Column('max_total_kw', sa.Float(), nullable=True),
+    sa.Column('avg_total_kw', sa.Float(), nullable=True),
+    sa.Column('min_sisa_kap', sa.Float(), nullable=True),
+    sa.Column('max_sisa_kap', sa.Float(), nullable=True),
+    sa.Column('avg_sisa_kap', sa.Float(), nullable=True),
+    sa.Column('min_kv_r', sa.Float(), nullable=True),
+    sa.Column('max_kv_r', sa.Float(), nullable=True),
+    sa.Column('avg_kv_r', sa.Float(), nullable=True),
+    sa.Column('min_kv_s', sa.Float(), nullable=True),
+    sa.Column('max_kv_s', sa.Float(), nullable=True),
+    sa.Column('avg_kv_s', sa.Float(), nullable=True),
+    sa.Column('min_kv_t', sa.Float(), nullable=True),
+    sa.Column('max_kv_t', sa.Float(), nullable=True),
+    sa.Column('avg_kv_t', sa.Float(), nullable=True),
+    sa.Column('min_kw_r', sa.Float(), nullable=True),
+    sa.Column('max_kw_r', sa.Float(), nullable=True),
+    sa.Column('avg_kw_r', sa.Float(), nullable=True),
+    sa.Column('min_kw_s', sa.Float(), nullable=True),
+    sa.Column('max_kw_s', sa.Float(), nullable=True),
+    sa.Column('avg_kw_s', sa.Float(), nullable=True),
+    sa.Column('min_kw_t', sa.Float(), nullable=True),
+    sa.Column('max_kw_t', sa.Float(), nullable=True),
+    sa.Column('avg_kw_t', sa.Float(), nullable=True),
+    sa.ForeignKeyConstraint(['id_trafo'], ['trafo.id'], ),
+    sa.PrimaryKeyConstraint('id_trafo', 'bucket', 'bucket_start')
+    )
+
+    # Backfill rollup per jam dan per hari dari histori hasil_kalkulasi
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    kolom = ", ".join(f"min_{m}, max_{m}, avg_{m}" for m in METRIK)
+    agregat = ", ".join(f"MIN({m}), MAX({m}), AVG({m})" for m in METRIK)
+    for bucket, fmt in (('hour', '%Y-%m-%d %H:00:00.000000'), ('day', '%Y-%m-%d 00:00:00.000000')):
+        start = f"date_trunc('{bucket}', waktu_kalkulasi)" if postgres else f"strftime('{fmt}', waktu_kalkulasi)"
+        op.execute(
+            f"INSERT INTO hasil_kalkulasi_rollup (id_trafo, bucket, bucket_start, jumlah, {kolom}) "
+            f"SELECT id_trafo, '{bucket}', {start}, COUNT(*), {agregat} "
+            "FROM hasil_kalkulasi WHERE waktu_kalkulasi IS NOT NULL "
+            f"GROUP BY id_trafo, {start}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('hasil_kalkulasi_rollup')
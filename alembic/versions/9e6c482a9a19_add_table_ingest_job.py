@@ -0,0 +1,52 @@
+"""add table ingest_job
+
+Revision ID: 9e6c482a9a19
+Revises: 776c7a484e49
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e6c482a9a19'
+down_revision: Union[str, Sequence[str], None] = '776c7a484e49'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('ingest_job',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_trafo', sa.Integer(), nullable=False),
+    sa.Column('kapasitas', sa.Integer(), nullable=False),
+    sa.Column('owner_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('rows_parsed', sa.Integer(), nullable=False),
+    sa.Column('rows_inserted', sa.Integer(), nullable=False),
+    sa.Column('error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_trafo'], ['trafo.id'], ),
+    sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ingest_job', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ingest_job_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ingest_job_status'), ['status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingest_job', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ingest_job_status'))
+        batch_op.drop_index(batch_op.f('ix_ingest_job_id'))
+
+    op.drop_table('ingest_job')
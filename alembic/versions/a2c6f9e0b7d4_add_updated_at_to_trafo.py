@@ -0,0 +1,34 @@
+"""add updated_at to trafo
+
+Revision ID: a2c6f9e0b7d4
+Revises: 4d9b7e1c3f60
+Create Date: 2026-10-18 15:10:22.931584
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a2c6f9e0b7d4'
+down_revision: Union[str, Sequence[str], None] = '4d9b7e1c3f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('trafo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    trafo = sa.table('trafo', sa.column('updated_at', sa.DateTime()))
+    op.execute(trafo.update().values(updated_at=datetime.now()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('trafo', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
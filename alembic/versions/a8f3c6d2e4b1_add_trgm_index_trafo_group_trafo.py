@@ -0,0 +1,43 @@
+"""add pg_trgm index trafo and group_trafo
+
+Revision ID: a8f3c6d2e4b1
+Revises: c7e1a3f5d9b2
+Create Date: 2026-10-18 19:31:48.602153
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8f3c6d2e4b1'
+down_revision: Union[str, Sequence[str], None] = 'c7e1a3f5d9b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# tabel sumber -> kolom yang dicari, sama dengan search.INDEX
+INDEX = {
+    "trafo": ["name", "brand", "type"],
+    "group_trafo": ["name", "kodegrup"],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pencarian di PostgreSQL (ILIKE '%kata%') dilayani index GIN pg_trgm; SQLite memakai FTS5 (4d9b7e1c3f60)
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for tabel, kolom in INDEX.items():
+        for k in kolom:
+            op.execute(f"CREATE INDEX IF NOT EXISTS ix_{tabel}_{k}_trgm ON {tabel} USING gin ({k} gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for tabel, kolom in INDEX.items():
+        for k in kolom:
+            op.execute(f"DROP INDEX IF EXISTS ix_{tabel}_{k}_trgm")
@@ -0,0 +1,73 @@
+"""add table trafo_latest
+
+Revision ID: b4e2d81f6a07
+Revises: 3c1f7a9d2b64
+Create Date: 2026-10-18 10:41:05.553870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4e2d81f6a07'
+down_revision: Union[str, Sequence[str], None] = '3c1f7a9d2b64'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KOLOM = [
+    'v_r', 'v_s', 'v_t', 'i_r', 'i_s', 'i_t', 'cosphi',
+    'kv_r', 'kv_s', 'kv_t', 'kw_r', 'kw_s', 'kw_t', 'kvar_r', 'kvar_s', 'kvar_t',
+    'total_kva', 'total_kw', 'total_kvar', 'sisa_kap', 'waktu_kalkulasi', 'tgl_upload',
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('trafo_latest',
+    sa.Column('id_trafo', sa.Integer(), nullable=False),
+    sa.Column('id_hasil_kalkulasi', sa.Integer(), nullable=False),
+    sa.Column('v_r', sa.Float(), nullable=False),
+    sa.Column('v_s', sa.Float(), nullable=False),
+    sa.Column('v_t', sa.Float(), nullable=False),
+    sa.Column('i_r', sa.Float(), nullable=False),
+    sa.Column('i_s', sa.Float(), nullable=False),
+    sa.Column('i_t', sa.Float(), nullable=False),
+    sa.Column('cosphi', sa.Float(), nullable=False),
+    sa.Column('kv_r', sa.Float(), nullable=True),
+    sa.Column('kv_s', sa.Float(), nullable=True),
+    sa.Column('kv_t', sa.Float(), nullable=True),
+    sa.Column('kw_r', sa.Float(), nullable=True),
+    sa.Column('kw_s', sa.Float(), nullable=True),
+    sa.Column('kw_t', sa.Float(), nullable=True),
+    sa.Column('kvar_r', sa.Float(), nullable=True),
+    sa.Column('kvar_s', sa.Float(), nullable=True),
+    sa.Column('kvar_t', sa.Float(), nullable=True),
+    sa.Column('total_kva', sa.Float(), nullable=True),
+    sa.Column('total_kw', sa.Float(), nullable=True),
+    sa.Column('total_kvar', sa.Float(), nullable=True),
+    sa.Column('sisa_kap', sa.Float(), nullable=True),
+    sa.Column('waktu_kalkulasi', sa.DateTime(), nullable=True),
+    sa.Column('tgl_upload', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['id_hasil_kalkulasi'], ['hasil_kalkulasi.id'], ),
+    sa.ForeignKeyConstraint(['id_trafo'], ['trafo.id'], ),
+    sa.PrimaryKeyConstraint('id_trafo')
+    )
+
+    # Backfill: bacaan terbaru tiap trafo dari histori hasil_kalkulasi
+    kolom = ", ".join(KOLOM)
+    op.execute(
+        f"INSERT INTO trafo_latest (id_trafo, id_hasil_kalkulasi, {kolom}) "
+        f"SELECT h.id_trafo, h.id, {', '.join('h.' + k for k in KOLOM)} "
+        "FROM hasil_kalkulasi h "
+        "WHERE h.id = ("
+        "SELECT h2.id FROM hasil_kalkulasi h2 WHERE h2.id_trafo = h.id_trafo "
+        "ORDER BY h2.waktu_kalkulasi DESC NULLS LAST LIMIT 1)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('trafo_latest')
@@ -0,0 +1,30 @@
+"""add heartbeat_at to ingest_job
+
+Revision ID: b9c4e2f7a1d6
+Revises: d3e7a5b2f8c1
+Create Date: 2026-10-18 17:42:10.528361
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9c4e2f7a1d6'
+down_revision: Union[str, Sequence[str], None] = 'd3e7a5b2f8c1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('ingest_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('heartbeat_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('ingest_job', schema=None) as batch_op:
+        batch_op.drop_column('heartbeat_at')
@@ -0,0 +1,50 @@
+"""add total_kvar to hasil_kalkulasi_rollup
+
+Revision ID: c7d5e0a4b9f2
+Revises: 5a0c93e7d1f8
+Create Date: 2026-10-18 11:58:40.215963
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d5e0a4b9f2'
+down_revision: Union[str, Sequence[str], None] = '5a0c93e7d1f8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+METRIK = ['total_kva', 'total_kw', 'total_kvar', 'sisa_kap', 'kv_r', 'kv_s', 'kv_t', 'kw_r', 'kw_s', 'kw_t']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('hasil_kalkulasi_rollup', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('min_total_kvar', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('max_total_kvar', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('avg_total_kvar', sa.Float(), nullable=True))
+
+    # Bangun ulang rollup dari histori agar kolom baru terisi
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    kolom = ", ".join(f"min_{m}, max_{m}, avg_{m}" for m in METRIK)
+    agregat = ", ".join(f"MIN({m}), MAX({m}), AVG({m})" for m in METRIK)
+    op.execute("DELETE FROM hasil_kalkulasi_rollup")
+    for bucket, fmt in (('hour', '%Y-%m-%d %H:00:00.000000'), ('day', '%Y-%m-%d 00:00:00.000000')):
+        start = f"date_trunc('{bucket}', waktu_kalkulasi)" if postgres else f"strftime('{fmt}', waktu_kalkulasi)"
+        op.execute(
+            f"INSERT INTO hasil_kalkulasi_rollup (id_trafo, bucket, bucket_start, jumlah, {kolom}) "
+            f"SELECT id_trafo, '{bucket}', {start}, COUNT(*), {agregat} "
+            "FROM hasil_kalkulasi WHERE waktu_kalkulasi IS NOT NULL "
+            f"GROUP BY id_trafo, {start}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('hasil_kalkulasi_rollup', schema=None) as batch_op:
+        batch_op.drop_column('avg_total_kvar')
+        batch_op.drop_column('max_total_kvar')
+        batch_op.drop_column('min_total_kvar')
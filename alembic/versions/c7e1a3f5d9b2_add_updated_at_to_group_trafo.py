@@ -0,0 +1,34 @@
+"""add updated_at to group_trafo
+
+Revision ID: c7e1a3f5d9b2
+Revises: b9c4e2f7a1d6
+Create Date: 2026-10-18 19:05:37.214906
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e1a3f5d9b2'
+down_revision: Union[str, Sequence[str], None] = 'b9c4e2f7a1d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('group_trafo', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    group_trafo = sa.table('group_trafo', sa.column('updated_at', sa.DateTime()))
+    op.execute(group_trafo.update().values(updated_at=datetime.now()))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('group_trafo', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,88 @@
+"""partition hasil_kalkulasi by month
+
+Revision ID: d3e7a5b2f8c1
+Revises: f5b8d3a1c9e7
+Create Date: 2026-10-18 16:27:45.381920
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+import models
+import partisi
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e7a5b2f8c1'
+down_revision: Union[str, Sequence[str], None] = 'f5b8d3a1c9e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Nama FK trafo_latest -> hasil_kalkulasi di SQLite (tanpa nama di database) untuk batch mode
+NAMING_FK_SQLITE = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+FK_SQLITE = "fk_trafo_latest_id_hasil_kalkulasi_hasil_kalkulasi"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # PostgreSQL: partisi native; SQLite: tabel per bulan di balik view (lihat partisi.py)
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        # Foreign key ke view tidak valid; trafo_latest menyimpan salinan nilai
+        fks = sa.inspect(conn).get_foreign_keys('trafo_latest')
+        if any(fk['referred_table'] == 'hasil_kalkulasi' for fk in fks):
+            with op.batch_alter_table('trafo_latest', naming_convention=NAMING_FK_SQLITE) as batch_op:
+                batch_op.drop_constraint(FK_SQLITE, type_='foreignkey')
+    partisi.konversi(conn)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    conn = op.get_bind()
+    if conn.dialect.name == 'sqlite':
+        _downgrade_sqlite(conn)
+        with op.batch_alter_table('trafo_latest', naming_convention=NAMING_FK_SQLITE) as batch_op:
+            batch_op.create_foreign_key(FK_SQLITE, 'hasil_kalkulasi', ['id_hasil_kalkulasi'], ['id'])
+        return
+    if conn.dialect.name != 'postgresql':
+        return
+
+    op.execute("ALTER TABLE hasil_kalkulasi RENAME TO hasil_kalkulasi_partisi")
+    op.execute("DROP INDEX IF EXISTS ix_hasil_kalkulasi_id")
+    op.execute("DROP INDEX IF EXISTS ix_hasil_kalkulasi_trafo_waktu")
+    op.execute("ALTER SEQUENCE hasil_kalkulasi_id_seq OWNED BY NONE")
+    op.execute("CREATE TABLE hasil_kalkulasi (LIKE hasil_kalkulasi_partisi INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE hasil_kalkulasi ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE hasil_kalkulasi ADD FOREIGN KEY (id_trafo) REFERENCES trafo (id)")
+    op.execute("CREATE INDEX ix_hasil_kalkulasi_id ON hasil_kalkulasi (id)")
+    op.execute("CREATE UNIQUE INDEX ix_hasil_kalkulasi_trafo_waktu ON hasil_kalkulasi (id_trafo, waktu_kalkulasi DESC NULLS LAST)")
+    op.execute("INSERT INTO hasil_kalkulasi SELECT * FROM hasil_kalkulasi_partisi")
+    op.execute("ALTER SEQUENCE hasil_kalkulasi_id_seq OWNED BY hasil_kalkulasi.id")
+    # Partisi ikut ter-drop bersama tabel induknya
+    op.execute("DROP TABLE hasil_kalkulasi_partisi")
+    op.execute(
+        "ALTER TABLE trafo_latest ADD CONSTRAINT trafo_latest_id_hasil_kalkulasi_fkey "
+        "FOREIGN KEY (id_hasil_kalkulasi) REFERENCES hasil_kalkulasi (id) NOT VALID"
+    )
+
+
+def _downgrade_sqlite(conn) -> None:
+    if not partisi.terpartisi(conn):
+        return
+    nama_partisi = partisi.daftar_partisi(conn)
+    kolom = ", ".join(partisi.KOLOM)
+    op.execute("DROP VIEW hasil_kalkulasi")
+    op.create_table(
+        'hasil_kalkulasi',
+        *[sa.Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in models.HasilKalkulasi.__table__.columns],
+        sa.ForeignKeyConstraint(['id_trafo'], ['trafo.id']),
+    )
+    op.create_index('ix_hasil_kalkulasi_id', 'hasil_kalkulasi', ['id'], unique=False)
+    op.create_index('ix_hasil_kalkulasi_trafo_waktu', 'hasil_kalkulasi', ['id_trafo', sa.text('waktu_kalkulasi DESC')], unique=True)
+    for nama in nama_partisi:
+        op.execute(f"INSERT INTO hasil_kalkulasi ({kolom}) SELECT {kolom} FROM {nama}")
+        op.execute(f"DROP TABLE {nama}")
+    op.execute(f"DROP TABLE {partisi.TABEL_SEQ}")
@@ -0,0 +1,39 @@
+"""add spatial index trafo
+
+Revision ID: e81f4c2a6d35
+Revises: c7d5e0a4b9f2
+Create Date: 2026-10-18 14:31:47.208351
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4c2a6d35'
+down_revision: Union[str, Sequence[str], None] = 'c7d5e0a4b9f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        # R*Tree koordinat trafo, disinkronkan oleh spatial.py
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS trafo_rtree USING rtree(id, min_lon, max_lon, min_lat, max_lat)")
+        op.execute("DELETE FROM trafo_rtree")
+        op.execute(
+            "INSERT INTO trafo_rtree (id, min_lon, max_lon, min_lat, max_lat) "
+            "SELECT id, longitude, longitude, latitude, latitude FROM trafo"
+        )
+    else:
+        op.create_index('ix_trafo_lon_lat', 'trafo', ['longitude', 'latitude'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS trafo_rtree")
+    else:
+        op.drop_index('ix_trafo_lon_lat', table_name='trafo')
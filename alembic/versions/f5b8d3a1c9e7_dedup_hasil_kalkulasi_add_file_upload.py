@@ -0,0 +1,99 @@
+"""dedup hasil_kalkulasi, unique (id_trafo, waktu_kalkulasi), add table file_upload
+
+Revision ID: f5b8d3a1c9e7
+Revises: a2c6f9e0b7d4
+Create Date: 2026-10-18 14:52:19.604318
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b8d3a1c9e7'
+down_revision: Union[str, Sequence[str], None] = 'a2c6f9e0b7d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+KOLOM = [
+    'v_r', 'v_s', 'v_t', 'i_r', 'i_s', 'i_t', 'cosphi',
+    'kv_r', 'kv_s', 'kv_t', 'kw_r', 'kw_s', 'kw_t', 'kvar_r', 'kvar_s', 'kvar_t',
+    'total_kva', 'total_kw', 'total_kvar', 'sisa_kap', 'waktu_kalkulasi', 'tgl_upload',
+]
+METRIK = ['total_kva', 'total_kw', 'total_kvar', 'sisa_kap', 'kv_r', 'kv_s', 'kv_t', 'kw_r', 'kw_s', 'kw_t']
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hapus bacaan duplikat (upload ulang file yang sama), simpan yang paling baru di-insert.
+    # Baris tanpa waktu_kalkulasi dibiarkan: NULL tidak bentrok di unique index,
+    # dan bacaan berbeda tanpa waktu tidak boleh digabung
+    hasil = op.get_bind().execute(sa.text(
+        "DELETE FROM hasil_kalkulasi WHERE waktu_kalkulasi IS NOT NULL AND id NOT IN ("
+        "SELECT MAX(id) FROM hasil_kalkulasi WHERE waktu_kalkulasi IS NOT NULL "
+        "GROUP BY id_trafo, waktu_kalkulasi)"
+    ))
+    dihapus = hasil.rowcount
+
+    with op.batch_alter_table('hasil_kalkulasi', schema=None) as batch_op:
+        batch_op.drop_index('ix_hasil_kalkulasi_trafo_waktu')
+        batch_op.create_index('ix_hasil_kalkulasi_trafo_waktu', ['id_trafo', sa.text('waktu_kalkulasi DESC')], unique=True)
+
+    op.create_table('file_upload',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('id_trafo', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('rows', sa.Integer(), nullable=False),
+    sa.Column('rows_inserted', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['id_trafo'], ['trafo.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('file_upload', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_file_upload_id'), ['id'], unique=False)
+        batch_op.create_index('ix_file_upload_trafo_sha256', ['id_trafo', 'sha256'], unique=True)
+
+    if not dihapus:
+        return
+
+    # trafo_latest bisa menunjuk baris yang dihapus: isi ulang dari histori
+    kolom = ", ".join(KOLOM)
+    op.execute("DELETE FROM trafo_latest")
+    op.execute(
+        f"INSERT INTO trafo_latest (id_trafo, id_hasil_kalkulasi, {kolom}) "
+        f"SELECT h.id_trafo, h.id, {', '.join('h.' + k for k in KOLOM)} "
+        "FROM hasil_kalkulasi h "
+        "WHERE h.id = ("
+        "SELECT h2.id FROM hasil_kalkulasi h2 WHERE h2.id_trafo = h.id_trafo "
+        "ORDER BY h2.waktu_kalkulasi DESC NULLS LAST LIMIT 1)"
+    )
+
+    # Jumlah dan rata-rata rollup ikut berubah: bangun ulang dari histori
+    postgres = op.get_bind().dialect.name == 'postgresql'
+    kolom = ", ".join(f"min_{m}, max_{m}, avg_{m}" for m in METRIK)
+    agregat = ", ".join(f"MIN({m}), MAX({m}), AVG({m})" for m in METRIK)
+    op.execute("DELETE FROM hasil_kalkulasi_rollup")
+    for bucket, fmt in (('hour', '%Y-%m-%d %H:00:00.000000'), ('day', '%Y-%m-%d 00:00:00.000000')):
+        start = f"date_trunc('{bucket}', waktu_kalkulasi)" if postgres else f"strftime('{fmt}', waktu_kalkulasi)"
+        op.execute(
+            f"INSERT INTO hasil_kalkulasi_rollup (id_trafo, bucket, bucket_start, jumlah, {kolom}) "
+            f"SELECT id_trafo, '{bucket}', {start}, COUNT(*), {agregat} "
+            "FROM hasil_kalkulasi WHERE waktu_kalkulasi IS NOT NULL "
+            f"GROUP BY id_trafo, {start}"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('file_upload', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_upload_trafo_sha256')
+        batch_op.drop_index(batch_op.f('ix_file_upload_id'))
+
+    op.drop_table('file_upload')
+    with op.batch_alter_table('hasil_kalkulasi', schema=None) as batch_op:
+        batch_op.drop_index('ix_hasil_kalkulasi_trafo_waktu')
+        batch_op.create_index('ix_hasil_kalkulasi_trafo_waktu', ['id_trafo', sa.text('waktu_kalkulasi DESC')], unique=False)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import APIKeyHeader, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
-from sqlalchemy.orm import Session
-from database import SessionLocal, engine
-from utils import verify_password, hash_password, create_access_token, SECRET_KEY, ALGORITHM
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import engine, get_db
+from utils import hash_password_async, verify_and_update_password_async, create_access_token, SECRET_KEY, ALGORITHM
 from response import response_ok
+from user_cache import user_cache
 
 import models, schemas
 
@@ -12,41 +14,49 @@ router = APIRouter(tags=["auth"])
 
 api_key_header = APIKeyHeader(name="Authorization", auto_error=True)
 
-# Dependency DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
 # Create table 'user' when not exist
 models.Base.metadata.create_all(bind=engine, tables=[models.User.__table__])
 
+# Hapus user dari cache setiap kali datanya berubah
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_user_cache(mapper, connection, target):
+    user_cache.invalidate(target.username)
+    # Setelah rename, username lama juga tidak boleh lagi dipakai dari cache
+    for username in inspect(target).attrs.username.history.deleted:
+        user_cache.invalidate(username)
+
 # Register
 @router.post("/register", response_model=schemas.User)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    db_user = await db.scalar(select(models.User).where(models.User.username == user.username))
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    hashed_pw = hash_password(user.password)
+    hashed_pw = await hash_password_async(user.password)
     new_user = models.User(username=user.username, password=hashed_pw)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     return new_user
 
 # Login
 @router.post("/login")
-def login(form: schemas.UserCreate, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == form.username).first()
-    if not user or not verify_password(form.password, user.password):
+async def login(form: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
+    user = await db.scalar(select(models.User).where(models.User.username == form.username))
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    valid, new_hash = await verify_and_update_password_async(form.password, user.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        # Hash lama (rounds kurang) diganti otomatis dengan setting terbaru
+        user.password = new_hash
+        await db.commit()
     access_token = create_access_token({"sub": user.username})
     return response_ok(data={"access_token": access_token, "token_type": "bearer"})
 
 # Auth dependency
-def get_current_user(token: str = Depends(api_key_header), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(api_key_header), db: AsyncSession = Depends(get_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid authentication credentials",
@@ -59,7 +69,18 @@ def get_current_user(token: str = Depends(api_key_header), db: Session = Depends
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(models.User).filter(models.User.username == username).first()
-    if user is None:
+    # Cache berisi snapshot (id, username), bukan objek ORM yang terikat session
+    user = user_cache.get(username)
+    if user is not None:
+        return user
+    db_user = await db.scalar(select(models.User).where(models.User.username == username))
+    if db_user is None:
         raise credentials_exception
+    user = schemas.User.model_validate(db_user)
+    user_cache.set(username, user)
     return user
+
+# Statistik cache user (hit rate)
+@router.get("/user-cache/stats")
+def read_user_cache_stats(current_user=Depends(get_current_user)):
+    return response_ok(data=user_cache.stats())
@@ -0,0 +1,52 @@
+"""
+Benchmark throughput login (logins/detik) di satu proses.
+
+Membandingkan verifikasi password inline (seperti endpoint /login lama) dengan
+verifikasi di pool hashing (utils.hash_executor), dengan sejumlah login bersamaan.
+
+Jalankan:
+    python bench_login.py                # 200 login, 32 bersamaan
+    python bench_login.py 500 64
+    PASSWORD_HASH_ROUNDS=100000 python bench_login.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+from utils import PASSWORD_HASH_ROUNDS, PASSWORD_HASH_WORKERS, hash_password, verify_password, verify_and_update_password_async
+
+
+async def _bench(login, jumlah, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def satu():
+        async with sem:
+            await login()
+
+    mulai = time.perf_counter()
+    await asyncio.gather(*(satu() for _ in range(jumlah)))
+    return jumlah / (time.perf_counter() - mulai)
+
+
+def main(jumlah=200, concurrency=32):
+    jumlah, concurrency = int(jumlah), int(concurrency)
+    hashed = hash_password("password")
+
+    async def inline():
+        # Verifikasi langsung di event loop (memblokir loop)
+        verify_password("password", hashed)
+
+    async def pool():
+        await verify_and_update_password_async("password", hashed)
+
+    cores = os.cpu_count() or 1
+    print(f"rounds={PASSWORD_HASH_ROUNDS} workers={PASSWORD_HASH_WORKERS} cores={cores} login={jumlah} concurrency={concurrency}")
+    for nama, login in (("inline", inline), ("pool", pool)):
+        rate = asyncio.run(_bench(login, jumlah, concurrency))
+        print(f"{nama:8s} {rate:8.1f} login/s  {rate / cores:8.1f} login/s/core")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(*sys.argv[1:]))
@@ -0,0 +1,116 @@
+from datetime import datetime
+
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+
+import kalkulasi
+import models
+import partisi
+import rollup
+import trafo_latest
+
+# Jumlah baris per panggilan executemany
+BULK_SIZE = 10000
+
+# Kolom yang diisi saat insert, urut sesuai kolom tabel (tanpa 'id')
+KOLOM_INSERT = [c.name for c in models.HasilKalkulasi.__table__.columns if c.name != "id"]
+
+# INSERT ... ON CONFLICT DO NOTHING per dialect: baris dengan (id_trafo, waktu_kalkulasi)
+# yang sudah ada dilewati (unique index ix_hasil_kalkulasi_trafo_waktu)
+INSERT_SKIP = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def baris_dari_kolom(id_trafo: int, tgl_upload: datetime, kolom: dict):
+    """
+    Ubah hasil kalkulasi.hitung_batch (dict kolom -> array) menjadi list tuple
+    berurutan sesuai KOLOM_INSERT, tanpa membuat objek ORM.
+    """
+    n = len(kolom["waktu_kalkulasi"])
+    nilai = []
+    for nama in KOLOM_INSERT:
+        if nama == "id_trafo":
+            nilai.append([id_trafo] * n)
+        elif nama == "tgl_upload":
+            nilai.append([tgl_upload] * n)
+        else:
+            nilai.append(kalkulasi.ke_list(kolom[nama]))
+    return list(zip(*nilai))
+
+
+def _statement(conn: Connection, tabel, kolom_insert):
+    """
+    Compile INSERT sekali per dialect. Untuk dialect positional (misal SQLite)
+    kembalikan SQL mentah, index kolom, dan bind processor agar tuple bisa langsung
+    dikirim ke executemany milik driver. Dialect lain memakai RETURNING id agar
+    jumlah baris yang benar-benar di-insert bisa dihitung.
+    """
+    dialect = conn.dialect
+    stmt = INSERT_SKIP[dialect.name](tabel).on_conflict_do_nothing()
+    if not dialect.positional:
+        return stmt.returning(tabel.c.id), None, None
+    compiled = stmt.compile(dialect=dialect, column_keys=kolom_insert)
+    urutan = [kolom_insert.index(nama) for nama in compiled.positiontup]
+    processors = [
+        tabel.c[nama].type.dialect_impl(dialect).bind_processor(dialect)
+        for nama in compiled.positiontup
+    ]
+    return str(compiled), urutan, processors
+
+
+def _insert(conn: Connection, tabel, kolom_insert, rows, bulk_size):
+    sql, urutan, processors = _statement(conn, tabel, kolom_insert)
+    total = 0
+    for start in range(0, len(rows), bulk_size):
+        chunk = rows[start:start + bulk_size]
+        if urutan is None:
+            # RETURNING hanya mengembalikan baris yang tidak bentrok (ON CONFLICT DO NOTHING)
+            result = conn.execute(sql, [dict(zip(kolom_insert, row)) for row in chunk])
+            total += len(result.all())
+        else:
+            # Proses per kolom (hanya kolom yang butuh, misal DateTime di SQLite)
+            kolom = list(zip(*chunk))
+            params = list(zip(*(
+                kolom[i] if proc is None else [None if v is None else proc(v) for v in kolom[i]]
+                for i, proc in zip(urutan, processors)
+            )))
+            # sqlite3: rowcount executemany = jumlah changes() semua baris, duplikat tidak dihitung
+            total += conn.exec_driver_sql(sql, params).rowcount
+    return total
+
+
+def insert_hasil_kalkulasi(conn: Connection, rows, bulk_size=BULK_SIZE):
+    """
+    Insert banyak baris hasil_kalkulasi (tuple urut KOLOM_INSERT) lewat executemany.
+    Baris yang sudah ada (id_trafo, waktu_kalkulasi sama) dilewati. Di SQLite terpartisi
+    baris ditulis langsung ke tabel partisi bulannya (lihat partisi.rute).
+    Transaksi diatur oleh pemanggil. Mengembalikan jumlah baris yang benar-benar di-insert.
+    """
+    per_partisi = partisi.rute(conn, rows, KOLOM_INSERT.index("waktu_kalkulasi"))
+    if per_partisi is None:
+        return _insert(conn, models.HasilKalkulasi.__table__, KOLOM_INSERT, rows, bulk_size)
+    return sum(
+        _insert(conn, tabel, ["id", *KOLOM_INSERT], isi, bulk_size)
+        for tabel, isi in per_partisi
+    )
+
+
+def simpan_batch(conn: Connection, id_trafo: int, rows):
+    """
+    Simpan satu batch baris untuk satu trafo beserta tabel turunannya
+    (trafo_latest dan rollup) di transaksi yang sama. Dipakai oleh semua jalur import.
+    Mengembalikan jumlah baris baru (duplikat tidak dihitung).
+    """
+    idx_waktu = KOLOM_INSERT.index("waktu_kalkulasi")
+    waktu = [row[idx_waktu] for row in rows if row[idx_waktu] is not None]
+    if waktu:
+        # Partisi bulan harus ada sebelum insert
+        partisi.siapkan(conn, min(waktu), max(waktu))
+    total = insert_hasil_kalkulasi(conn, rows)
+    if total == 0:
+        # Jumlah dari RETURNING / changes() (bukan ukuran batch): 0 berarti seluruh
+        # batch sudah ada, tabel turunan tidak berubah
+        return 0
+    trafo_latest.refresh(conn, id_trafo)
+    if waktu:
+        rollup.refresh(conn, id_trafo, min(waktu), max(waktu))
+    return total
@@ -0,0 +1,239 @@
+import csv
+import os
+import pickle
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+from compression import buka_upload
+from database import SessionLocal, engine
+from ingest import catat_file, hash_file, hitung_csv, iter_lines, query_file_sama, simpan_batches
+
+# Jumlah proses yang mem-parse dan menghitung file per trafo secara paralel
+BULK_UPLOAD_WORKERS = int(os.getenv("BULK_UPLOAD_WORKERS", str(os.cpu_count() or 1)))
+# Header kolom ID trafo pada CSV gabungan (banyak trafo dalam satu file)
+KOLOM_TRAFO = "Trafo"
+# Batas file per trafo yang terbuka bersamaan saat memecah CSV gabungan
+MAKS_FILE_TERBUKA = int(os.getenv("BULK_UPLOAD_MAX_OPEN_FILES", "64"))
+
+STATUS_OK = "ok"
+STATUS_DUPLICATE = "duplicate"
+STATUS_FAILED = "failed"
+
+_executor = None
+
+
+def _init_worker():
+    # Koneksi pool milik proses induk tidak boleh dipakai ulang setelah fork
+    engine.dispose(close=False)
+
+
+def executor():
+    """
+    Process pool dibuat saat pertama dipakai, agar import modul ini tidak memulai proses.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=BULK_UPLOAD_WORKERS, initializer=_init_worker)
+    return _executor
+
+
+def shutdown():
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+
+
+@contextmanager
+def _buka(path, member):
+    if member is None:
+        with open(path, "rb") as f:
+            yield f
+    else:
+        with zipfile.ZipFile(path) as zf, zf.open(member) as f:
+            yield f
+
+
+def hitung_file(path, member, id_trafo, kapasitas, tgl_upload, spill):
+    """
+    Dijalankan di process pool: parse dan hitung satu file trafo (file biasa atau anggota
+    zip, boleh gzip/zstd) tanpa menulis ke database. File dibaca streaming; tiap batch
+    hasil hitung_csv langsung di-pickle ke file spill, sehingga memori worker dibatasi
+    BATCH_SIZE dan yang dikirim balik ke induk hanya ringkasan kecil.
+    File yang identik dengan upload sebelumnya tidak dihitung (cek baca saja).
+    Mengembalikan dict sha256/size/rows, status duplicate, atau error
+    (HTTPException tidak bisa di-pickle).
+    """
+    try:
+        with _buka(path, member) as f:
+            sha256, size = hash_file(f)
+        with SessionLocal() as db:
+            sebelumnya = db.scalars(query_file_sama(id_trafo, sha256)).first()
+        if sebelumnya is not None:
+            return {"status": STATUS_DUPLICATE, "rows": sebelumnya.rows}
+        total = 0
+        with _buka(path, member) as f, open(spill, "wb") as out:
+            for total, rows in hitung_csv(f, id_trafo, kapasitas, tgl_upload):
+                pickle.dump((total, rows), out, protocol=pickle.HIGHEST_PROTOCOL)
+        if total == 0:
+            return {"error": "File CSV kosong."}
+        return {"sha256": sha256, "size": size, "rows": total}
+    except HTTPException as e:
+        return {"error": e.detail}
+    except (OSError, zipfile.BadZipFile) as e:
+        return {"error": f"File tidak bisa dibaca: {e}"}
+
+
+def baca_spill(spill):
+    """
+    Baca ulang batch (total, rows) dari file spill satu per satu.
+    """
+    with open(spill, "rb") as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _id_dari_nama(member):
+    """
+    Anggota zip bernama '<id_trafo>.csv' (boleh .csv.gz / .csv.zst, di dalam folder).
+    """
+    nama = os.path.basename(member).split(".")[0]
+    return int(nama) if nama.isdigit() else None
+
+
+def unit_dari_zip(path):
+    """
+    Daftar (id_trafo, nama file, member) dari isi zip, satu per file CSV.
+    """
+    with zipfile.ZipFile(path) as zf:
+        return [
+            (_id_dari_nama(info.filename), info.filename, info.filename)
+            for info in zf.infolist() if not info.is_dir()
+        ]
+
+
+def unit_dari_csv(fileobj, folder):
+    """
+    Pecah CSV gabungan (kolom KOLOM_TRAFO berisi ID trafo) menjadi satu file per trafo
+    di folder, secara streaming. Paling banyak MAKS_FILE_TERBUKA file terbuka sekaligus;
+    file yang paling lama tidak dipakai ditutup dan dibuka lagi (append) bila perlu.
+    Mengembalikan daftar (id_trafo, nama file, None).
+    """
+    reader = csv.reader(iter_lines(buka_upload(fileobj)))
+    try:
+        header = next(reader, None)
+        if header is None:
+            raise HTTPException(status_code=400, detail="File CSV kosong.")
+        if KOLOM_TRAFO not in header:
+            raise HTTPException(status_code=400, detail=f"Kolom '{KOLOM_TRAFO}' tidak ditemukan.")
+        idx = header.index(KOLOM_TRAFO)
+        header = header[:idx] + header[idx + 1:]
+
+        ids = []
+        ada = set()
+        terbuka = OrderedDict()
+        try:
+            for nomor, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                nilai = row[idx].strip() if idx < len(row) else ""
+                if not nilai.isdigit():
+                    raise HTTPException(status_code=400, detail=f"Kolom '{KOLOM_TRAFO}' tidak valid pada baris {nomor}")
+                id_trafo = int(nilai)
+                if id_trafo in terbuka:
+                    terbuka.move_to_end(id_trafo)
+                else:
+                    if len(terbuka) >= MAKS_FILE_TERBUKA:
+                        terbuka.popitem(last=False)[1][0].close()
+                    baru = id_trafo not in ada
+                    out = open(os.path.join(folder, f"{id_trafo}.csv"), "w" if baru else "a", newline="", encoding="utf-8")
+                    terbuka[id_trafo] = (out, csv.writer(out))
+                    if baru:
+                        ids.append(id_trafo)
+                        ada.add(id_trafo)
+                        terbuka[id_trafo][1].writerow(header)
+                terbuka[id_trafo][1].writerow(row[:idx] + row[idx + 1:])
+        finally:
+            for out, _ in terbuka.values():
+                out.close()
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Format file CSV salah: {e}")
+    return [(id_trafo, f"{id_trafo}.csv", None) for id_trafo in ids]
+
+
+def _simpan(db: Session, item, spill, data, nama, id_trafo):
+    """
+    Tulis hasil hitung satu trafo dari file spill lewat bulk_insert, satu transaksi per batch.
+    """
+    try:
+        total, inserted = simpan_batches(db, id_trafo, baca_spill(spill))
+        catat_file(db, id_trafo, data["sha256"], data["size"], total, inserted, nama)
+        item.update(status=STATUS_OK, rows=total, rowsInserted=inserted)
+    except HTTPException as e:
+        db.rollback()
+        item["error"] = e.detail
+    except Exception as e:
+        db.rollback()
+        item["error"] = f"Gagal menyimpan ke database: {e}"
+
+
+def proses(db: Session, path, units, folder, owner_id: int):
+    """
+    Proses daftar unit (id_trafo, nama file, member zip) dari satu upload bulk milik owner_id.
+    Tiap file trafo di-parse dan dihitung paralel di process pool; hanya proses ini yang
+    menulis ke database (satu writer, tidak berebut lock), batch demi batch begitu hasil
+    sebuah trafo selesai. Trafo milik user lain dilaporkan 'Trafo not found'.
+    Mengembalikan hasil per unit: trafoId, file, status, rows, rowsInserted, error.
+    """
+    tgl_upload = datetime.now()
+    ids = {id_trafo for id_trafo, _, _ in units if id_trafo is not None}
+    kapasitas = dict(db.execute(
+        select(models.Trafo.id, models.Trafo.kapasitas).
+        where(models.Trafo.id.in_(ids), models.Trafo.owner_id == owner_id)
+    ).all()) if ids else {}
+    # Lepas koneksi sebelum worker membaca (SQLite: hindari menahan lock baca)
+    db.rollback()
+
+    hasil = []
+    berjalan = {}
+    for nomor, (id_trafo, nama, member) in enumerate(units):
+        item = {"trafoId": id_trafo, "file": nama, "status": STATUS_FAILED, "rows": 0, "rowsInserted": 0, "error": None}
+        hasil.append(item)
+        if id_trafo is None:
+            item["error"] = "Nama file harus <id_trafo>.csv"
+            continue
+        if id_trafo not in kapasitas:
+            item["error"] = "Trafo not found"
+            continue
+        sumber = path if member is not None else os.path.join(folder, nama)
+        spill = os.path.join(folder, f"hasil-{nomor}.pickle")
+        future = executor().submit(hitung_file, sumber, member, id_trafo, kapasitas[id_trafo], tgl_upload, spill)
+        berjalan[future] = (item, spill, nama, id_trafo)
+
+    for future in as_completed(berjalan):
+        item, spill, nama, id_trafo = berjalan[future]
+        try:
+            try:
+                data = future.result()
+            except Exception as e:
+                item["error"] = f"Gagal memproses file: {e}"
+                continue
+            if "error" in data:
+                item["error"] = data["error"]
+            elif data.get("status") == STATUS_DUPLICATE:
+                item.update(data)
+            else:
+                _simpan(db, item, spill, data, nama, id_trafo)
+        finally:
+            if os.path.exists(spill):
+                os.remove(spill)
+    return hasil
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from sqlalchemy import select
+
+import models
+from database import SessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow opsional, endpoint export kolumnar mengembalikan 501
+    pa = None
+    pq = None
+
+FORMAT = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+# Kompresi kolom: zstd untuk Parquet dan Arrow IPC
+KOMPRESI = "zstd"
+# Jumlah baris per record batch / row group
+BATCH_SIZE = 50000
+
+KOLOM_WAKTU = ["waktu_kalkulasi", "tgl_upload"]
+KOLOM_NILAI = [
+    "v_r", "v_s", "v_t",
+    "i_r", "i_s", "i_t",
+    "cosphi",
+    "kv_r", "kv_s", "kv_t",
+    "kw_r", "kw_s", "kw_t",
+    "kvar_r", "kvar_s", "kvar_t",
+    "total_kva", "total_kw", "total_kvar",
+    "sisa_kap",
+]
+KOLOM = ["id_trafo", *KOLOM_WAKTU, *KOLOM_NILAI]
+
+
+def tersedia():
+    return pa is not None
+
+
+def schema():
+    return pa.schema(
+        [pa.field("id_trafo", pa.int32(), nullable=False)]
+        + [pa.field(k, pa.timestamp("us")) for k in KOLOM_WAKTU]
+        + [pa.field(k, pa.float64()) for k in KOLOM_NILAI]
+    )
+
+
+def query_export(id_trafos, waktu_dari: datetime | None = None, waktu_sampai: datetime | None = None):
+    """
+    Select hasil_kalkulasi beberapa trafo, urut (id_trafo, waktu_kalkulasi DESC) sesuai index.
+    """
+    h = models.HasilKalkulasi.__table__
+    stmt = select(*[h.c[k] for k in KOLOM]).where(h.c.id_trafo.in_(id_trafos))
+    if waktu_dari is not None:
+        stmt = stmt.where(h.c.waktu_kalkulasi >= waktu_dari)
+    if waktu_sampai is not None:
+        stmt = stmt.where(h.c.waktu_kalkulasi <= waktu_sampai)
+    return stmt.order_by(h.c.id_trafo, h.c.waktu_kalkulasi.desc().nulls_last())
+
+
+class _Sink:
+    """
+    File-like tujuan writer pyarrow; byte yang sudah ditulis diambil dengan drain().
+    """
+    def __init__(self):
+        self.chunks = []
+        self.closed = False
+        self.posisi = 0
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.posisi += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.posisi
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_export(fmt: str, id_trafos, waktu_dari: datetime | None = None, waktu_sampai: datetime | None = None):
+    """
+    Generator file Parquet / Arrow IPC stream. Baris diambil dari server-side cursor
+    per BATCH_SIZE, diubah jadi record batch bertipe, lalu langsung ditulis dan di-yield.
+    """
+    db = SessionLocal()
+    sink = _Sink()
+    try:
+        skema = schema()
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), skema, compression=KOMPRESI)
+            tulis = writer.write_batch
+        else:
+            writer = pa.ipc.new_stream(pa.PythonFile(sink, mode="w"), skema,
+                                       options=pa.ipc.IpcWriteOptions(compression=KOMPRESI))
+            tulis = writer.write_batch
+        stmt = query_export(id_trafos, waktu_dari, waktu_sampai)
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=BATCH_SIZE))
+        for rows in result.partitions():
+            kolom = list(zip(*rows))
+            tulis(pa.record_batch(
+                [pa.array(nilai, type=field.type) for nilai, field in zip(kolom, skema)],
+                schema=skema,
+            ))
+            yield sink.drain()
+        writer.close()
+        yield sink.drain()
+    finally:
+        db.close()
@@ -0,0 +1,90 @@
+import gzip
+import io
+import os
+import zlib
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipMiddleware, IdentityResponder
+
+try:
+    import zstandard
+except ImportError:  # zstandard opsional: tanpa paket ini hanya gzip yang didukung
+    zstandard = None
+
+# Respons lebih kecil dari ini (byte) tidak dikompres
+RESPONSE_COMPRESS_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", "1024"))
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "6"))
+RESPONSE_ZSTD_LEVEL = int(os.getenv("RESPONSE_ZSTD_LEVEL", "3"))
+
+# Export Parquet/Arrow sudah terkompresi di dalam file
+EXCLUDE_CONTENT_TYPES = (
+    *DEFAULT_EXCLUDED_CONTENT_TYPES,
+    "application/zstd",
+    "application/vnd.apache.parquet",
+    "application/vnd.apache.arrow.stream",
+)
+
+MAGIC_GZIP = b"\x1f\x8b"
+MAGIC_ZSTD = b"\x28\xb5\x2f\xfd"
+
+# Error saat membaca stream terkompresi yang rusak / terpotong
+ERROR_DEKOMPRESI = (EOFError, zlib.error, gzip.BadGzipFile) + ((zstandard.ZstdError,) if zstandard else ())
+
+
+def buka_upload(fileobj):
+    """
+    Kembalikan file-like yang sudah didekompresi jika upload berupa gzip atau zstd
+    (dideteksi dari magic bytes), selain itu fileobj apa adanya. Dekompresi berjalan
+    streaming sesuai pembacaan parser, file utuh tidak pernah di-inflate ke memori.
+    """
+    if not fileobj.seekable():
+        fileobj = io.BufferedReader(fileobj)
+        awal = fileobj.peek(4)[:4]
+    else:
+        posisi = fileobj.tell()
+        awal = fileobj.read(4)
+        fileobj.seek(posisi)
+    if awal.startswith(MAGIC_GZIP):
+        return gzip.GzipFile(fileobj=fileobj, mode="rb")
+    if awal.startswith(MAGIC_ZSTD):
+        if zstandard is None:
+            raise HTTPException(status_code=415, detail="Upload zstd membutuhkan paket zstandard")
+        return zstandard.ZstdDecompressor().stream_reader(fileobj, read_across_frames=True)
+    return fileobj
+
+
+class ZstdResponder(IdentityResponder):
+    content_encoding = "zstd"
+
+    def __init__(self, app, minimum_size, level=RESPONSE_ZSTD_LEVEL, *, exclude_content_types=EXCLUDE_CONTENT_TYPES):
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if more_body:
+            # Flush per potongan agar klien menerima data streaming tanpa menunggu akhir
+            return self._compressor.compress(body) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._compressor.compress(body) + self._compressor.flush()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Kompresi respons sesuai Accept-Encoding: zstd (jika zstandard terpasang) lalu gzip.
+    Berlaku juga untuk StreamingResponse (export CSV).
+    """
+    def __init__(self, app, minimum_size=RESPONSE_COMPRESS_MIN_SIZE, compresslevel=RESPONSE_GZIP_LEVEL,
+                 zstd_level=RESPONSE_ZSTD_LEVEL, exclude_content_types=EXCLUDE_CONTENT_TYPES):
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel,
+                         exclude_content_types=exclude_content_types)
+        self.zstd_level = zstd_level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and zstandard is not None:
+            accept = Headers(scope=scope).get("Accept-Encoding", "")
+            if "zstd" in [e.split(";")[0].strip() for e in accept.split(",")]:
+                responder = ZstdResponder(self.app, self.minimum_size, self.zstd_level,
+                                          exclude_content_types=self.exclude_content_types)
+                await responder(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -1,75 +1,152 @@
-from fastapi import Query, Depends, HTTPException, APIRouter
-from sqlalchemy.orm import Session
-from database import engine, SessionLocal
+import os
+import time
+from datetime import datetime
+from typing import Literal
+from fastapi import Query, Depends, HTTPException, APIRouter, Request, Response
+from sqlalchemy import distinct, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import engine, get_db
 from auth import get_current_user
-from response import response_ok, response_paginate
+from response import FastJSONResponse, etag_match, make_etag, response_not_modified, response_ok, response_paginate
+from pagination import count_total, keyset_page
+from rollup import floor_waktu
 
 import math
 import models, schemas
+import search
 
 router = APIRouter(tags=["group trafo"])
 
-# Dependency DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Create table 'group trafo' when not exist
 models.Base.metadata.create_all(bind=engine, tables=[models.GroupTrafo.__table__])
+# Index pencarian nama/kodegrup (FTS5 di SQLite, pg_trgm di PostgreSQL)
+with engine.begin() as conn:
+    search.create(conn, "group_trafo")
+
+# Cache payload combobox (body JSON + ETag) di memori proses. Dikosongkan saat group
+# berubah; TTL membatasi data basi dari perubahan di worker lain
+COMBOBOX_CACHE_TTL = float(os.getenv("COMBOBOX_CACHE_TTL", "60"))
+_combobox_cache = {"etag": None, "body": None, "expires": 0.0}
+
+def invalidate_combobox():
+    _combobox_cache.update(etag=None, body=None, expires=0.0)
 
 # CREATE GROUP TRAFO
 @router.post("/group-trafo/save", response_model=schemas.GroupTrafo)
-def create_group_trafo(group_trafo: schemas.GroupTrafoCreate, db: Session = Depends(get_db)):
+async def create_group_trafo(group_trafo: schemas.GroupTrafoCreate, db: AsyncSession = Depends(get_db)):
     new_group_trafo = models.GroupTrafo(**group_trafo.dict())
     db.add(new_group_trafo)
-    db.commit()
-    db.refresh(new_group_trafo)
+    await db.commit()
+    invalidate_combobox()
     return response_ok(data=None, message="Group Trafo created")
 
 # READ ALL
 @router.get("/group-trafo/find-all", response_model=list[schemas.GroupTrafo])
-def read_all_trafo_group(q: str | None = Query(None, description="Cari berdasarkan nama"),
+async def read_all_trafo_group(q: str | None = Query(None, description="Cari di nama dan kodegrup"),
     page: int = 0,
     size: int = 10,
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="Mode cursor: kosong untuk halaman pertama, lalu isi dengan nextCursor"),
+    withTotal: bool = Query(True, description="Hitung totalRecords (query COUNT tambahan)"),
+    db: AsyncSession = Depends(get_db),
 ):
-    base_query = db.query(models.GroupTrafo)
+    base_query = select(models.GroupTrafo)
+    urutan = []
     if q:
-        base_query = base_query.filter(models.GroupTrafo.name.contains(q))
-    total = base_query.count()
-    totalPage = math.ceil(total / size) if total > 0 else 0
-    list_of_trafo_group_models = base_query.offset(page * size).limit(size).all()
-    data_for_response = [schemas.GroupTrafo.model_validate(group).model_dump() for group in list_of_trafo_group_models]    
-    return response_paginate(data_for_response, page, size, total, totalPage)
+        # Index FTS5 trigram / pg_trgm (lihat search.py), hasil diurutkan menurut relevansi
+        base_query, urutan = search.cari(db.bind.dialect, base_query, models.GroupTrafo, q)
+    total = await count_total(db, base_query) if withTotal else None
+    totalPage = (math.ceil(total / size) if total > 0 else 0) if withTotal else None
+    nextCursor = None
+    if cursor is not None:
+        # Keyset pagination di (name, id): tanpa OFFSET
+        list_of_trafo_group_models, nextCursor = await keyset_page(db, base_query, [models.GroupTrafo.name, models.GroupTrafo.id], cursor, size)
+    else:
+        list_of_trafo_group_models = (await db.scalars(base_query.order_by(*urutan).offset(page * size).limit(size))).all()
+    data_for_response = [schemas.GroupTrafo.model_validate(group) for group in list_of_trafo_group_models]    
+    return response_paginate(data_for_response, page, size, total, totalPage, nextCursor=nextCursor)
 
 # UPDATE GROUP TRAFO BY ID
 @router.post("/group-trafo/update/{id}", response_model=schemas.GroupTrafo)
-def update_group_trafo(id: int, group_trafo: schemas.GroupTrafoCreate, db: Session = Depends(get_db)):
-    db_group_trafo = db.query(models.GroupTrafo).filter(models.GroupTrafo.id == id).first()
+async def update_group_trafo(id: int, group_trafo: schemas.GroupTrafoCreate, db: AsyncSession = Depends(get_db)):
+    db_group_trafo = await db.get(models.GroupTrafo, id)
     if not db_group_trafo:
         raise HTTPException(status_code=404, detail="Group Trafo not found")
     for key, value in group_trafo.dict().items():
         setattr(db_group_trafo, key, value)
-    db.commit()
-    db.refresh(db_group_trafo)
+    await db.commit()
+    invalidate_combobox()
     return response_ok(data=None, message="Group Trafo updated")
 
 # DELETE GROUP TRAFO BY ID
 @router.post("/group-trafo/delete/{id}")
-def delete_group_trafo_by_id(id: int, db: Session = Depends(get_db)):
-    db_group_trafo = db.query(models.GroupTrafo).filter(models.GroupTrafo.id == id).first()
+async def delete_group_trafo_by_id(id: int, db: AsyncSession = Depends(get_db)):
+    db_group_trafo = await db.get(models.GroupTrafo, id)
     if not db_group_trafo:
         raise HTTPException(status_code=404, detail="Group Trafo not found")
-    db.delete(db_group_trafo)
-    db.commit()
+    await db.delete(db_group_trafo)
+    await db.commit()
+    invalidate_combobox()
     return response_ok(data=None, message=f"Group Trafo {id} deleted")
 
 # READ ALL
 @router.get("/group-trafo/combobox", response_model=list[schemas.Combobox])
-def read_trafo_group_combobox(db: Session = Depends(get_db)):
-    groups = db.query(models.GroupTrafo).all()
-    combobox = [schemas.Combobox(id=group.id, name=group.name).model_dump() for group in groups]
-    return response_ok(data=combobox)
\ No newline at end of file
+async def read_trafo_group_combobox(request: Request, db: AsyncSession = Depends(get_db)):
+    """
+    Daftar id dan nama group dari cache; If-None-Match yang cocok dijawab 304 tanpa body.
+    """
+    if _combobox_cache["body"] is None or _combobox_cache["expires"] < time.monotonic():
+        rows = (await db.execute(select(models.GroupTrafo.id, models.GroupTrafo.name))).all()
+        combobox = [schemas.Combobox(id=id, name=name) for id, name in rows]
+        body = response_ok(data=combobox).body
+        _combobox_cache.update(etag=make_etag(body), body=body, expires=time.monotonic() + COMBOBOX_CACHE_TTL)
+    etag = _combobox_cache["etag"]
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_match(request, etag):
+        return response_not_modified(etag, headers)
+    return Response(content=_combobox_cache["body"], media_type=FastJSONResponse.media_type, headers=headers)
+
+# BEBAN GABUNGAN SEMUA TRAFO DALAM GROUP
+@router.get("/group-trafo/{id}/load", response_model=list[schemas.GroupTrafoLoad])
+async def read_group_trafo_load(
+    id: int,
+    bucket: Literal["hour", "day"] = Query("hour", description="Granularitas: hour atau day"),
+    waktu_dari: datetime | None = Query(None, alias="from", description="Awal rentang waktu"),
+    waktu_sampai: datetime | None = Query(None, alias="to", description="Akhir rentang waktu"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Total kVA, kW, kVAr dan sisa kapasitas semua trafo dalam group per bucket waktu.
+    Dihitung dengan satu query agregat di tabel rollup (rata-rata per trafo, dijumlah antar trafo).
+    """
+    db_group_trafo = await db.get(models.GroupTrafo, id)
+    if not db_group_trafo:
+        raise HTTPException(status_code=404, detail="Group Trafo not found")
+
+    r = models.HasilKalkulasiRollup
+    query = select(
+        r.bucket_start,
+        func.count(distinct(r.id_trafo)),
+        func.sum(r.avg_total_kva),
+        func.sum(r.avg_total_kw),
+        func.sum(r.avg_total_kvar),
+        func.sum(r.avg_sisa_kap),
+    ).join(models.Trafo, models.Trafo.id == r.id_trafo).\
+        where(models.Trafo.group_id == id, r.bucket == bucket)
+    if waktu_dari is not None:
+        query = query.where(r.bucket_start >= floor_waktu(waktu_dari, bucket))
+    if waktu_sampai is not None:
+        query = query.where(r.bucket_start <= waktu_sampai)
+    rows = (await db.execute(query.group_by(r.bucket_start).order_by(r.bucket_start))).all()
+
+    data = [
+        schemas.GroupTrafoLoad(
+            bucket_start=bucket_start,
+            jumlah_trafo=jumlah_trafo,
+            total_kva=total_kva,
+            total_kw=total_kw,
+            total_kvar=total_kvar,
+            sisa_kap=sisa_kap,
+        )
+        for bucket_start, jumlah_trafo, total_kva, total_kw, total_kvar, sisa_kap in rows
+    ]
+    return response_ok(data=data)
@@ -1,278 +1,311 @@
 import csv
 from  datetime import datetime
 import io
-from fastapi import Query, Depends, HTTPException, APIRouter, Response, UploadFile
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import Literal
+from fastapi import Query, Depends, HTTPException, APIRouter, Request, Response, UploadFile
 from fastapi.params import File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from database import engine, SessionLocal
+from database import engine, SessionLocal, get_db, get_sync_db
 from auth import get_current_user
-from response import response_ok, response_paginate
+from ingest import catat_file, hash_file, ingest_csv, query_file_sama
+from rollup import floor_waktu
+from response import etag_dari, last_modified_dari, not_modified, response_not_modified, response_ok, response_paginate, validator_headers
 
-import math
+import bulk_upload
+import columnar
+import partisi
 import models, schemas
+import trafo_latest
 
 router = APIRouter(tags=["hasil kalkulasi"])
-
-# Dependency DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+logger = logging.getLogger(__name__)
 
 # Create table 'group trafo' when not exist
-models.Base.metadata.create_all(bind=engine, tables=[models.HasilKalkulasi.__table__])
-
-
+models.Base.metadata.create_all(bind=engine, tables=[
+    models.HasilKalkulasi.__table__,
+    models.FileUpload.__table__,
+    models.TrafoLatest.__table__,
+    models.HasilKalkulasiRollup.__table__,
+])
+# Database baru langsung memakai partisi bulanan hasil_kalkulasi (lihat partisi.py)
+with engine.begin() as conn:
+    partisi.create(conn)
+
+
+# Sengaja sync: parsing dan kalkulasi CPU-bound, dijalankan FastAPI di threadpool
+# agar tidak menahan event loop
 @router.post("/kalkulasi/upload-csv")
-async def upload_hasil_kalkulasi(
+def upload_hasil_kalkulasi(
     id_trafo: int = Query(..., description="ID Trafo yang akan di-upload datanya"),
     kapasitas: int = Query(..., description="Kapasitas Trafo"), 
     file: UploadFile = File(...), 
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_sync_db), 
     current_user: models.User = Depends(get_current_user)
 ):
     
     tgl_upload = datetime.now()
 
-    # 1. Baca file
-    contents = await file.read()
-    try:
-        contents_str = contents.decode('utf-8')
-    except UnicodeDecodeError:
-        raise HTTPException(status_code=400, detail="Encoding file bukan UTF-8.")
-        
-    file_stream = io.StringIO(contents_str)
-    reader = csv.DictReader(file_stream)
-    
-    data_list = []
-    try:
-        for row in reader:
-            data_list.append(row)
-    except csv.Error as e:
-        raise HTTPException(status_code=400, detail=f"Format file CSV salah: {e}")
-
-    if not data_list:
-        raise HTTPException(status_code=400, detail="File CSV kosong.")
-
-    new_hasil_kalkulasi = []
-
-    # --- FUNGSI HELPER YANG DIPERBAIKI ---
-    # Didefinisikan sekali di luar loop untuk efisiensi
-    def _to_float_or_none(val, is_voltage=False):
-        """
-        Helper untuk konversi string ke float dengan aman.
-        - Mengatasi 'None' atau string kosong.
-        - Mengatasi format '228:01:00' jika is_voltage=True.
-        - Mengatasi koma desimal (misal '0,5').
-        """
-        if val is None or val == '':
-            return None
-        
-        # Ubah string jadi string bersih
-        val_str = str(val).replace(',', '.') # Ganti koma desimal
-        
-        if is_voltage:
-            # Mengubah "228:01:00" menjadi "228.01"
-            parts = val_str.split(':')
-            if len(parts) >= 2:
-                val_str = f"{parts[0]}.{parts[1]}" # Ambil jam dan menit
-            else:
-                val_str = parts[0] # Jika formatnya normal
-        
-        try:
-            return float(val_str)
-        except ValueError:
-            # Jika 'val' masih tidak bisa diubah (misal 'abc')
-            return None
-    # --- AKHIR FUNGSI HELPER ---
-
-
-    # 3. Iterasi data yang sudah dibaca
-    for idx, row in enumerate(data_list):
-        try:
-            # Ambil waktu kalkulasi dari CSV (sesuai format Anda)
-            datetime_obj = None
-            if row.get('Datetime'):
-                datetime_obj = datetime.strptime(row['Datetime'], "%Y-%m-%d %H:%M:%S")
-
-            
-            # --- TAHAP 1: Ambil semua nilai float dari CSV ---
-            
-            v_r_float = _to_float_or_none(row.get('Voltage R'), is_voltage=True)
-            v_s_float = _to_float_or_none(row.get('Voltage S'), is_voltage=True)
-            v_t_float = _to_float_or_none(row.get('Voltage T'), is_voltage=True)
-            
-            i_r_float = _to_float_or_none(row.get('Ampere R'))
-            i_s_float = _to_float_or_none(row.get('Ampere S'))
-            i_t_float = _to_float_or_none(row.get('Ampere T'))
-            
-            cosphi_float = _to_float_or_none(row.get('Cosphi'))
-
-            
-            # --- TAHAP 2: Hitung kVA (Apparent Power) ---
-            # (Memperbaiki TypeError: 'NoneType' * 'float')
-            
-            kv_r_calc = None
-            if v_r_float is not None and i_r_float is not None:
-                kv_r_calc = v_r_float * i_r_float/1000
-
-            kv_s_calc = None
-            if v_s_float is not None and i_s_float is not None:
-                kv_s_calc = v_s_float * i_s_float/1000
-
-            kv_t_calc = None
-            if v_t_float is not None and i_t_float is not None:
-                kv_t_calc = v_t_float * i_t_float/1000
-
-                
-            # --- TAHAP 3: Hitung kW (Real Power) sesuai permintaan Anda ---
-            # (Mengisi baris Anda yang kosong)
-            
-            kw_r_calc = None
-            if kv_r_calc is not None and cosphi_float is not None:
-                kw_r_calc = kv_r_calc * cosphi_float
-
-            kw_s_calc = None
-            if kv_s_calc is not None and cosphi_float is not None:
-                kw_s_calc = kv_s_calc * cosphi_float
-            
-            kw_t_calc = None
-            if kv_t_calc is not None and cosphi_float is not None:
-                kw_t_calc = kv_t_calc * cosphi_float
-                
-            sin_phi = math.sqrt(1 - cosphi_float**2)
-
-            kvar_r_calc = None
-            if kv_r_calc is not None and cosphi_float is not None:
-                kvar_r_calc = kv_r_calc * sin_phi
-
-            kvar_s_calc = None
-            if kv_s_calc is not None and cosphi_float is not None:
-                kvar_s_calc = kv_s_calc * sin_phi
-
-            kvar_t_calc = None
-            if kv_t_calc is not None and cosphi_float is not None:
-                kvar_t_calc = kv_t_calc * sin_phi
-            # --- TAHAP 4: Buat objek model ---
-            new_data = models.HasilKalkulasi(
-                # Menggunakan 'id_trafo' sesuai variabel Anda
-                id_trafo=id_trafo, 
-                
-                waktu_kalkulasi=datetime_obj,
-                
-                v_r=v_r_float,
-                v_s=v_s_float,
-                v_t=v_t_float,
-                
-                i_r=i_r_float,
-                i_s=i_s_float,
-                i_t=i_t_float,
-                
-                # Hasil kalkulasi kVA
-                kv_r = kv_r_calc,
-                kv_s = kv_s_calc,
-                kv_t = kv_t_calc,
-                
-                # Hasil kalkulasi kW (BARU)
-                kw_r = kw_r_calc,
-                kw_s = kw_s_calc,
-                kw_t = kw_t_calc,
-
-                # Hasil kalkulasi kvar
-                kvar_r = kv_r_calc * sin_phi,
-                kvar_s = kv_s_calc * sin_phi,
-                kvar_t = kv_t_calc * sin_phi,
-
-                # Total kalkulasi
-                total_kva = kv_r_calc+kv_s_calc+kv_t_calc,
-                total_kw = kw_r_calc+kw_s_calc+kw_t_calc,
-                total_kvar = kvar_r_calc+kvar_s_calc+kvar_t_calc,
-                
-                # Hasil kalkulasi sisa kapasitas
-                sisa_kap = kapasitas - (kv_r_calc+kv_s_calc+kv_t_calc),
-                
-                cosphi=cosphi_float,
-                tgl_upload=tgl_upload,
-            )
-            new_hasil_kalkulasi.append(new_data)
-
-        except KeyError as e:
-            # Error jika header di CSV (misal 'Voltage R') tidak ditemukan
-            raise HTTPException(status_code=400, detail=f"Header CSV tidak ditemukan: {e} pada baris {idx + 2}")
-        except ValueError as e:
-            # Error jika '155' (angka) ternyata 'abc' atau format tanggal salah
-            raise HTTPException(status_code=400, detail=f"Data tidak valid: {e} pada baris {idx + 2}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error internal: {e} pada baris {idx + 2}")
-
-    # 4. Simpan semua data ke database
+    # File yang isinya identik dengan upload sebelumnya tidak diproses ulang
+    sha256, size = hash_file(file.file)
+    sebelumnya = db.scalars(query_file_sama(id_trafo, sha256)).first()
+    if sebelumnya is not None:
+        return response_ok(
+            data={"duplicate": True, "rows": sebelumnya.rows, "rowsInserted": 0},
+            message=f"File sudah pernah di-upload pada {sebelumnya.created_at:%Y-%m-%d %H:%M:%S}, tidak diproses ulang."
+        )
+
+    # File dibaca, di-parse dan disimpan per batch (lihat ingest.py),
+    # sehingga pemakaian memori tidak bergantung pada ukuran file
     try:
-        db.add_all(new_hasil_kalkulasi) # Ini penting!
+        total, inserted = ingest_csv(db, file.file, id_trafo, kapasitas, tgl_upload)
+        if total == 0:
+            raise HTTPException(status_code=400, detail="File CSV kosong.")
         db.commit()
+        catat_file(db, id_trafo, sha256, size, total, inserted, file.filename)
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Gagal menyimpan ke database: {e}")
 
-    # 5. Kembalikan respons sukses
+    # Kembalikan respons sukses
+    return response_ok(
+        data={"duplicate": False, "rows": total, "rowsInserted": inserted},
+        message=f"Sukses! {inserted} baris data telah di-upload, {total - inserted} baris duplikat dilewati."
+    )
+
+@router.post("/kalkulasi/bulk-upload")
+def bulk_upload_hasil_kalkulasi(
+    file: UploadFile = File(..., description="Zip berisi <id_trafo>.csv, atau satu CSV dengan kolom 'Trafo'"),
+    db: Session = Depends(get_sync_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Upload data banyak trafo sekaligus. Kapasitas diambil dari data trafo.
+    File tiap trafo di-parse dan dihitung paralel di process pool, lalu ditulis per batch
+    oleh proses ini (lihat bulk_upload.py). Hanya trafo milik user yang diproses;
+    hasil dilaporkan per trafo, trafo yang gagal tidak membatalkan trafo lain.
+    """
+    with tempfile.TemporaryDirectory(prefix="bulk-upload-") as folder:
+        path = os.path.join(folder, "upload")
+        with open(path, "wb") as out:
+            shutil.copyfileobj(file.file, out, length=1024 * 1024)
+
+        if zipfile.is_zipfile(path):
+            units = bulk_upload.unit_dari_zip(path)
+        else:
+            with open(path, "rb") as f:
+                units = bulk_upload.unit_dari_csv(f, folder)
+        if not units:
+            raise HTTPException(status_code=400, detail="File tidak berisi data trafo.")
+        hasil = bulk_upload.proses(db, path, units, folder, current_user.id)
+
+    berhasil = sum(1 for item in hasil if item["status"] == bulk_upload.STATUS_OK)
+    gagal = sum(1 for item in hasil if item["status"] == bulk_upload.STATUS_FAILED)
     return response_ok(
-        message=f"Sukses! {len(new_hasil_kalkulasi)} baris data telah di-upload."
+        data={
+            "rows": sum(item["rows"] for item in hasil),
+            "rowsInserted": sum(item["rowsInserted"] for item in hasil),
+            "trafo": hasil,
+        },
+        message=f"{berhasil} file trafo berhasil di-upload, {gagal} gagal, {len(hasil) - berhasil - gagal} duplikat."
     )
 
 # Jangan lupa import
 from sqlalchemy.orm import joinedload 
 
 @router.get("/trafo/{trafo_id}/hasil-kalkulasi", response_model=schemas.TrafoHasilKalkulasi)
-def get_trafo_hasil_kalkulasi_by_id(trafo_id: int, db: Session = Depends(get_db)):
+async def get_trafo_hasil_kalkulasi_by_id(trafo_id: int, request: Request, db: AsyncSession = Depends(get_db)):
     """
-    Get a single row of hasil_kalkulasi filtered by trafo_id and order by waktu_kalkulasi.
+    Get the latest hasil_kalkulasi of a trafo.
+    Dibaca dari ringkasan trafo_latest dengan satu lookup primary key.
+    Mendukung conditional GET: ETag dari id bacaan terbaru dan versi trafo/group.
     """
     try:
-        hasil_kalkulasi = db.query(models.HasilKalkulasi).\
-            options(joinedload(models.HasilKalkulasi.trafo)).\
-            filter(models.HasilKalkulasi.id_trafo == trafo_id).\
-            order_by(models.HasilKalkulasi.waktu_kalkulasi.desc()).\
-            first()
+        latest = await db.get(
+            models.TrafoLatest, trafo_id,
+            options=[joinedload(models.TrafoLatest.trafo).joinedload(models.Trafo.group)],
+        )
 
-        if hasil_kalkulasi is None:
+        if latest is None:
             # Lebih baik gunakan 404 jika hasil kalkulasinya yang tidak ada,
             # bukan trafonya
             raise HTTPException(status_code=404, detail=f"Hasil kalkulasi for trafo id {trafo_id} not found")
 
-        # --- SOLUSI ---
+        # Validator dihitung dari baris yang sama, tanpa query versi terpisah
+        group = latest.trafo.group
+        etag = etag_dari(
+            "hasil-kalkulasi", trafo_id,
+            latest.id_hasil_kalkulasi, latest.waktu_kalkulasi, latest.tgl_upload, latest.trafo.updated_at,
+            group.name if group else None, group.kodegrup if group else None, group.updated_at if group else None,
+        )
+        # Rename group juga mengubah payload, jadi updated_at group ikut menentukan Last-Modified
+        last_modified = last_modified_dari(
+            latest.tgl_upload, latest.trafo.updated_at, group.updated_at if group else None,
+        )
+        headers = validator_headers(etag, last_modified)
+        if not_modified(request, etag, last_modified):
+            return response_not_modified(etag, headers)
+
         # Buat skema respons secara manual, bukan pakai from_orm
         data_respons = schemas.TrafoHasilKalkulasi(
-            trafo=hasil_kalkulasi.trafo,       # Ambil dari relationship
-            hasil_kalkulasi=hasil_kalkulasi    # Gunakan objek utamanya
+            trafo=latest.trafo,
+            hasil_kalkulasi=trafo_latest.ke_schema(latest)
         )
 
-        return response_ok(
-            data=data_respons.model_dump(mode="json")
+        response = response_ok(
+            data=data_respons
         )
+        response.headers.update(headers)
+        return response
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error internal: {e}") # Tambahkan print untuk debugging
+        logger.exception("Error internal")
         raise HTTPException(status_code=500, detail=f"Error internal: {e}")
 
+@router.get("/trafo/{trafo_id}/hasil-kalkulasi/rollup", response_model=list[schemas.HasilKalkulasiRollup])
+async def get_trafo_hasil_kalkulasi_rollup(
+    trafo_id: int,
+    bucket: Literal["hour", "day"] = Query("hour", description="Granularitas: hour atau day"),
+    waktu_dari: datetime | None = Query(None, alias="from", description="Awal rentang waktu"),
+    waktu_sampai: datetime | None = Query(None, alias="to", description="Akhir rentang waktu"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get min/max/avg hasil_kalkulasi per jam atau per hari dari tabel rollup.
+    """
+    query = select(models.HasilKalkulasiRollup).where(
+        models.HasilKalkulasiRollup.id_trafo == trafo_id,
+        models.HasilKalkulasiRollup.bucket == bucket,
+    )
+    if waktu_dari is not None:
+        query = query.where(models.HasilKalkulasiRollup.bucket_start >= floor_waktu(waktu_dari, bucket))
+    if waktu_sampai is not None:
+        query = query.where(models.HasilKalkulasiRollup.bucket_start <= waktu_sampai)
+    rollups = (await db.scalars(query.order_by(models.HasilKalkulasiRollup.bucket_start))).all()
+    data = [schemas.HasilKalkulasiRollup.model_validate(r) for r in rollups]
+    return response_ok(data=data)
+
+# Header CSV export dan kolom hasil_kalkulasi yang sesuai (setelah kolom "Trafo")
+HEADER_CSV = [
+    "Trafo",
+    "Voltage R",
+    "Voltage S",
+    "Voltage T",
+    "Current R",
+    "Current S",
+    "Current T",
+    "Cosphi",
+    "KVA R",
+    "KVA S",
+    "KVA T",
+    "KW R",
+    "KW S",
+    "KW T",
+    "KVAr R",
+    "KVAr S",
+    "KVAr T",
+    "Total KVA",
+    "Total KW",
+    "Total KVAr",
+    "Sisa Kapacitas",
+    "Datetime",
+]
+KOLOM_EXPORT = [
+    "v_r", "v_s", "v_t",
+    "i_r", "i_s", "i_t",
+    "cosphi",
+    "kv_r", "kv_s", "kv_t",
+    "kw_r", "kw_s", "kw_t",
+    "kvar_r", "kvar_s", "kvar_t",
+    "total_kva", "total_kw", "total_kvar",
+    "sisa_kap",
+    "waktu_kalkulasi",
+]
+# Jumlah baris yang diambil dari cursor (dan ditulis ke respons) per iterasi
+STREAM_SIZE = 1000
+
+
+def stream_csv(trafo_id: int, trafo_name: str, waktu_dari: datetime | None = None, waktu_sampai: datetime | None = None):
+    """
+    Generator CSV seluruh histori (atau jendela waktu) satu trafo.
+    Memakai server-side cursor (yield_per) sehingga memori tetap konstan.
+    Session (sync) dibuat sendiri karena generator berjalan setelah endpoint selesai;
+    StreamingResponse menjalankan generator sync di threadpool.
+    """
+    db = SessionLocal()
+    try:
+        h = models.HasilKalkulasi.__table__
+        stmt = select(*[h.c[k] for k in KOLOM_EXPORT]).where(h.c.id_trafo == trafo_id)
+        if waktu_dari is not None:
+            stmt = stmt.where(h.c.waktu_kalkulasi >= waktu_dari)
+        if waktu_sampai is not None:
+            stmt = stmt.where(h.c.waktu_kalkulasi <= waktu_sampai)
+        stmt = stmt.order_by(h.c.waktu_kalkulasi.desc().nulls_last())
+        result = db.execute(stmt.execution_options(stream_results=True, yield_per=STREAM_SIZE))
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(HEADER_CSV)
+        for rows in result.partitions():
+            for row in rows:
+                writer.writerow([trafo_name, *row])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        if buffer.tell():
+            yield buffer.getvalue()
+    finally:
+        db.close()
+
+
 # Export to csv
 @router.get("/kalkulasi/export-csv/{trafo_id}", responses={
     200: {"description": "Success export csv", "content": {"text/csv": {"example": ""}}},
     404: {"description": "Trafo not found"}
     })
-def export_csv_by_id_trafo(trafo_id: int, db: Session = Depends(get_db)):
+async def export_csv_by_id_trafo(
+    trafo_id: int,
+    full: bool = Query(False, description="Export seluruh histori (streaming)"),
+    waktu_dari: datetime | None = Query(None, alias="from", description="Awal waktu_kalkulasi (streaming)"),
+    waktu_sampai: datetime | None = Query(None, alias="to", description="Akhir waktu_kalkulasi (streaming)"),
+    db: AsyncSession = Depends(get_db),
+):
     """
     Export csv data from hasil_kalkulasi filtered by trafo_id.
+    Tanpa parameter: 10 data terbaru. Dengan full=true atau from/to: seluruh
+    histori dalam jendela waktu tersebut, di-stream baris demi baris.
     """
     try:
-        trafo = db.query(models.Trafo).filter(models.Trafo.id == trafo_id).first()
+        trafo = await db.get(models.Trafo, trafo_id)
         if not trafo:
             raise HTTPException(status_code=404, detail=f"Trafo not found")
-        
-        hasil_kalkulasi = db.query(models.HasilKalkulasi).\
-            filter(models.HasilKalkulasi.id_trafo == trafo_id).\
-            order_by(models.HasilKalkulasi.waktu_kalkulasi.desc()).\
-            limit(10).all()
+
+        filename = f"hasil_kalkulasi_{trafo.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        headers = {
+            "Content-Disposition": f"attachment; filename={filename}",
+            "Content-Type": "text/csv"
+        }
+
+        if full or waktu_dari is not None or waktu_sampai is not None:
+            return StreamingResponse(
+                stream_csv(trafo_id, trafo.name, waktu_dari, waktu_sampai),
+                headers=headers,
+                media_type="text/csv",
+            )
+
+        hasil_kalkulasi = (await db.scalars(trafo_latest.query_hasil_kalkulasi_terbaru(trafo_id).limit(10))).all()
 
         if not hasil_kalkulasi:
             raise HTTPException(status_code=404, detail=f"Hasil kalkulasi not found")
@@ -280,64 +313,60 @@ def export_csv_by_id_trafo(trafo_id: int, db: Session = Depends(get_db)):
         # Buat respons csv
         csv_data = io.StringIO()
         writer = csv.writer(csv_data)
-        writer.writerow([
-            "Trafo",
-            "Voltage R",
-            "Voltage S",
-            "Voltage T",
-            "Current R",
-            "Current S",
-            "Current T",
-            "Cosphi",
-            "KVA R",
-            "KVA S",
-            "KVA T",
-            "KW R",
-            "KW S",
-            "KW T",
-            "KVAr R",
-            "KVAr S",
-            "KVAr T",
-            "Total KVA",
-            "Total KW",
-            "Total KVAr",
-            "Sisa Kapacitas",
-            "Datetime",
-        ])
+        writer.writerow(HEADER_CSV)
         for row in hasil_kalkulasi:
-            writer.writerow([
-                trafo.name,
-                row.v_r,
-                row.v_s,
-                row.v_t,
-                row.i_r,
-                row.i_s,
-                row.i_t,
-                row.cosphi,
-                row.kv_r,
-                row.kv_s,
-                row.kv_t,
-                row.kw_r,
-                row.kw_s,
-                row.kw_t,
-                row.kvar_r,
-                row.kvar_s,
-                row.kvar_t,
-                row.total_kva,
-                row.total_kw,
-                row.total_kvar,
-                row.sisa_kap,
-                row.waktu_kalkulasi,
-            ])
+            writer.writerow([trafo.name, *(getattr(row, k) for k in KOLOM_EXPORT)])
         csv_data.seek(0) # Kembali ke awal
 
-        filename = f"hasil_kalkulasi_{trafo.name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        headers = {
-            "Content-Disposition": f"attachment; filename={filename}",
-            "Content-Type": "text/csv"
-        }
         return Response(content=csv_data.getvalue(), headers=headers, media_type="text/csv")
     
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error internal: {e}") # Tambahkan print untuk debugging
+        logger.exception("Error internal")
         raise HTTPException(status_code=500, detail=f"Error internal: {e}")
+
+
+# Export kolumnar (Parquet / Arrow IPC) per trafo atau per group
+@router.get("/kalkulasi/export/{fmt}", responses={
+    200: {"description": "Success export", "content": {media_type: {} for media_type, _ in columnar.FORMAT.values()}},
+    404: {"description": "Trafo / Group Trafo not found"},
+    501: {"description": "pyarrow belum terpasang"},
+    })
+async def export_columnar_hasil_kalkulasi(
+    fmt: Literal["parquet", "arrow"],
+    trafoId: int | None = Query(None, description="Export satu trafo"),
+    groupId: int | None = Query(None, description="Export semua trafo dalam group"),
+    waktu_dari: datetime | None = Query(None, alias="from", description="Awal waktu_kalkulasi"),
+    waktu_sampai: datetime | None = Query(None, alias="to", description="Akhir waktu_kalkulasi"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Export hasil_kalkulasi bertipe dan terkompresi (zstd), ditulis per record batch
+    langsung dari cursor database (lihat columnar.py).
+    """
+    if not columnar.tersedia():
+        raise HTTPException(status_code=501, detail="Export Parquet/Arrow membutuhkan pyarrow")
+    if (trafoId is None) == (groupId is None):
+        raise HTTPException(status_code=400, detail="Isi salah satu dari trafoId atau groupId")
+
+    if trafoId is not None:
+        trafo = await db.get(models.Trafo, trafoId)
+        if not trafo:
+            raise HTTPException(status_code=404, detail="Trafo not found")
+        id_trafos = [trafoId]
+        nama = trafo.name
+    else:
+        group = await db.get(models.GroupTrafo, groupId)
+        if not group:
+            raise HTTPException(status_code=404, detail="Group Trafo not found")
+        id_trafos = (await db.scalars(select(models.Trafo.id).where(models.Trafo.group_id == groupId))).all()
+        nama = f"group_{group.name}"
+
+    media_type, ext = columnar.FORMAT[fmt]
+    filename = f"hasil_kalkulasi_{nama}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{ext}"
+    return StreamingResponse(
+        columnar.stream_export(fmt, id_trafos, waktu_dari, waktu_sampai),
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        media_type=media_type,
+    )
@@ -0,0 +1,172 @@
+import codecs
+import csv
+import hashlib
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+import bulk_insert
+import kalkulasi
+import models
+from compression import ERROR_DEKOMPRESI, buka_upload
+
+# Ukuran potongan file yang dibaca per iterasi (byte)
+CHUNK_SIZE = 1024 * 1024
+# Jumlah baris yang dihitung dan di-flush ke database per batch
+BATCH_SIZE = 5000
+
+
+def iter_lines(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    Baca file biner per potongan dan hasilkan baris teks UTF-8 satu per satu.
+    Hanya satu potongan (plus sisa baris terakhir) yang ada di memori.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    sisa = ""
+    while True:
+        try:
+            chunk = fileobj.read(chunk_size)
+        except ERROR_DEKOMPRESI:
+            raise HTTPException(status_code=400, detail="File terkompresi rusak.")
+        try:
+            text = decoder.decode(chunk, final=not chunk)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="Encoding file bukan UTF-8.")
+        if text:
+            lines = (sisa + text).split("\n")
+            sisa = lines.pop()
+            for line in lines:
+                yield line + "\n"
+        if not chunk:
+            break
+    if sisa:
+        yield sisa
+
+
+def iter_csv_batches(fileobj, batch_size=BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Parse CSV secara bertahap dan hasilkan list dict baris sebanyak batch_size.
+    """
+    reader = csv.DictReader(iter_lines(fileobj, chunk_size))
+    batch = []
+    try:
+        for row in reader:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Format file CSV salah: {e}")
+    if batch:
+        yield batch
+
+
+def hash_file(fileobj, chunk_size=CHUNK_SIZE):
+    """
+    SHA-256 dan ukuran isi file (byte mentah, sebelum dekompresi), lalu kembali ke posisi awal.
+    """
+    posisi = fileobj.tell()
+    sha = hashlib.sha256()
+    size = 0
+    while chunk := fileobj.read(chunk_size):
+        sha.update(chunk)
+        size += len(chunk)
+    fileobj.seek(posisi)
+    return sha.hexdigest(), size
+
+
+def query_file_sama(id_trafo: int, sha256: str):
+    """
+    Select upload sebelumnya untuk trafo ini dengan isi file yang identik.
+    """
+    return select(models.FileUpload).where(models.FileUpload.id_trafo == id_trafo, models.FileUpload.sha256 == sha256)
+
+
+def catat_file(db: Session, id_trafo: int, sha256: str, size: int, rows: int, rows_inserted: int, filename=None):
+    """
+    Simpan hash file yang berhasil di-upload. Upload identik yang berjalan bersamaan
+    cukup tercatat sekali (unique id_trafo, sha256).
+    """
+    db.add(models.FileUpload(
+        id_trafo=id_trafo, sha256=sha256, size=size, rows=rows, rows_inserted=rows_inserted,
+        filename=filename, created_at=datetime.now(),
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def hitung_csv(fileobj, id_trafo: int, kapasitas: int, tgl_upload: datetime, batch_size=BATCH_SIZE, skip_rows=0):
+    """
+    Parse dan hitung file CSV (boleh gzip/zstd) per batch tanpa menyentuh database.
+    - skip_rows: jumlah baris awal yang dilewati (sudah tersimpan sebelumnya).
+    Menghasilkan (jumlah baris diproses sampai batch ini termasuk skip_rows,
+    list tuple baris urut bulk_insert.KOLOM_INSERT).
+    """
+    total = 0
+    for batch in iter_csv_batches(buka_upload(fileobj), batch_size):
+        offset = total
+        if total + len(batch) <= skip_rows:
+            total += len(batch)
+            continue
+        if total < skip_rows:
+            batch = batch[skip_rows - total:]
+            offset = skip_rows
+
+        try:
+            kolom = kalkulasi.hitung_batch(batch, kapasitas)
+        except kalkulasi.DataTidakValid as e:
+            # Error jika '155' (angka) ternyata 'abc' atau format tanggal salah
+            raise HTTPException(status_code=400, detail=f"Data tidak valid: {e} pada baris {offset + e.baris + 2}")
+
+        rows = bulk_insert.baris_dari_kolom(id_trafo, tgl_upload, kolom)
+        total = offset + len(rows)
+        yield total, rows
+
+
+def simpan_batches(db: Session, id_trafo: int, batches, skip_rows=0, on_batch=None):
+    """
+    Simpan batch hasil hitung_csv, satu transaksi per batch lewat bulk_insert.
+    - on_batch(db, rows_parsed, rows_inserted): dipanggil sebelum commit tiap batch,
+      di dalam transaksi yang sama (misal untuk update progress job).
+    Baris yang (id_trafo, waktu_kalkulasi)-nya sudah ada dilewati. Bila gagal di
+    tengah jalan, batch sebelumnya tetap tersimpan dan jumlahnya disebut di pesan error.
+    Mengembalikan (jumlah baris diproses termasuk skip_rows, jumlah baris baru yang di-insert).
+    """
+    total = skip_rows
+    inserted = 0
+    try:
+        for total_batch, rows in batches:
+            try:
+                inserted += bulk_insert.simpan_batch(db.connection(), id_trafo, rows)
+            except SQLAlchemyError as e:
+                # Misal kolom wajib kosong (nilai tidak bisa dibaca sebagai angka)
+                db.rollback()
+                raise HTTPException(status_code=500, detail=f"Gagal menyimpan ke database: {e}")
+            if on_batch is not None:
+                on_batch(db, total_batch, inserted)
+            db.commit()
+            total = total_batch
+    except HTTPException as e:
+        if total > 0:
+            # Batch sebelumnya sudah di-commit: beri tahu klien apa yang sudah tersimpan
+            e.detail = (
+                f"{e.detail}. {total} baris pertama sudah tersimpan ({inserted} baris baru); "
+                "perbaiki file lalu upload ulang, baris yang sudah ada akan dilewati."
+            )
+        raise
+    return total, inserted
+
+
+def ingest_csv(db: Session, fileobj, id_trafo: int, kapasitas: int, tgl_upload: datetime, batch_size=BATCH_SIZE, skip_rows=0, on_batch=None):
+    """
+    Proses file CSV (boleh gzip/zstd) secara streaming: parse, hitung, lalu simpan per batch
+    (hitung_csv lalu simpan_batches). Mengembalikan (jumlah baris diproses termasuk
+    skip_rows, jumlah baris baru yang di-insert).
+    """
+    batches = hitung_csv(fileobj, id_trafo, kapasitas, tgl_upload, batch_size, skip_rows)
+    return simpan_batches(db, id_trafo, batches, skip_rows, on_batch)
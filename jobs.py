@@ -0,0 +1,268 @@
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import Query, Depends, HTTPException, APIRouter, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.params import File
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from database import engine, SessionLocal, get_db
+from auth import get_current_user
+from ingest import catat_file, hash_file, ingest_csv, query_file_sama
+from response import response_ok
+
+import models, schemas
+
+router = APIRouter(tags=["ingest job"])
+
+# Folder penyimpanan sementara file upload sampai job selesai
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
+# Jumlah worker yang memproses job secara paralel
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Job running tanpa heartbeat selama ini (detik) dianggap ditinggal worker yang mati
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "300"))
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+
+executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="ingest-job")
+
+# Create table 'ingest job' when not exist
+models.Base.metadata.create_all(bind=engine, tables=[models.IngestJob.__table__, models.FileUpload.__table__])
+
+
+class JobDibatalkan(Exception):
+    pass
+
+
+def _update_progress(job_id, inserted_awal=0):
+    """
+    Callback ingest_csv: simpan progress dan heartbeat di transaksi yang sama dengan batch,
+    dan hentikan job jika sudah dibatalkan. inserted_awal = baris baru dari run sebelumnya.
+    """
+    def on_batch(db: Session, rows_parsed, rows_inserted):
+        status = db.query(models.IngestJob.status).filter(models.IngestJob.id == job_id).scalar()
+        if status == STATUS_CANCELLED:
+            raise JobDibatalkan()
+        db.query(models.IngestJob).filter(models.IngestJob.id == job_id).update({
+            "rows_parsed": rows_parsed,
+            "rows_inserted": inserted_awal + rows_inserted,
+            "heartbeat_at": datetime.now(),
+        })
+    return on_batch
+
+
+def _basi(sekarang):
+    """
+    Filter job running yang heartbeat-nya sudah basi (worker pemiliknya mati).
+    """
+    j = models.IngestJob
+    batas = sekarang - timedelta(seconds=JOB_STALE_SECONDS)
+    return and_(j.status == STATUS_RUNNING, or_(j.heartbeat_at.is_(None), j.heartbeat_at < batas))
+
+
+def _klaim(db: Session, job_id):
+    """
+    Ambil job secara atomik: pending, atau running dengan heartbeat basi.
+    Hanya satu worker (juga antar proses uvicorn) yang mendapat rowcount 1.
+    """
+    j = models.IngestJob
+    sekarang = datetime.now()
+    hasil = db.execute(
+        update(j).
+        where(j.id == job_id, j.finished_at.is_(None), or_(j.status == STATUS_PENDING, _basi(sekarang))).
+        values(status=STATUS_RUNNING, started_at=func.coalesce(j.started_at, sekarang), heartbeat_at=sekarang).
+        execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return hasil.rowcount == 1
+
+
+def _finish(db: Session, job: models.IngestJob, status, error=None, **nilai):
+    """
+    Tandai job selesai. Status cancelled yang masuk bersamaan tidak pernah ditimpa:
+    job tetap cancelled. Mengembalikan status akhir job.
+    """
+    j = models.IngestJob
+    sekarang = datetime.now()
+    stmt = update(j).where(j.id == job.id, j.finished_at.is_(None))
+    if status != STATUS_CANCELLED:
+        stmt = stmt.where(j.status != STATUS_CANCELLED)
+    hasil = db.execute(
+        stmt.values(status=status, error=error, finished_at=sekarang, **nilai).
+        execution_options(synchronize_session=False)
+    )
+    if hasil.rowcount == 0 and status != STATUS_CANCELLED:
+        # Dibatalkan tepat sebelum selesai
+        status = STATUS_CANCELLED
+        db.execute(
+            update(j).where(j.id == job.id, j.finished_at.is_(None)).
+            values(finished_at=sekarang).
+            execution_options(synchronize_session=False)
+        )
+    db.commit()
+    if os.path.exists(job.path):
+        os.remove(job.path)
+    return status
+
+
+def run_job(job_id: int):
+    """
+    Proses satu job ingest. Melanjutkan dari rows_parsed jika job pernah terhenti
+    (baris yang sudah tersimpan otomatis dilewati oleh unique key).
+    """
+    db = SessionLocal()
+    try:
+        job = db.get(models.IngestJob, job_id)
+        if job is None or job.finished_at is not None:
+            return
+        if job.status == STATUS_CANCELLED:
+            # Dibatalkan sebelum sempat diproses
+            _finish(db, job, STATUS_CANCELLED)
+            return
+        if not _klaim(db, job_id):
+            # Sedang diproses worker lain
+            return
+        db.refresh(job)
+
+        inserted_awal = job.rows_inserted
+        try:
+            with open(job.path, "rb") as f:
+                sha256, size = hash_file(f)
+                total, inserted = ingest_csv(
+                    db, f, job.id_trafo, job.kapasitas, job.created_at,
+                    skip_rows=job.rows_parsed, on_batch=_update_progress(job_id, inserted_awal),
+                )
+        except JobDibatalkan:
+            db.rollback()
+            _finish(db, job, STATUS_CANCELLED)
+            return
+        except HTTPException as e:
+            db.rollback()
+            _finish(db, job, STATUS_FAILED, str(e.detail))
+            return
+        except Exception as e:
+            db.rollback()
+            _finish(db, job, STATUS_FAILED, f"Error internal: {e}")
+            return
+
+        if total == 0:
+            _finish(db, job, STATUS_FAILED, "File CSV kosong.")
+            return
+        status = _finish(db, job, STATUS_DONE, rows_parsed=total, rows_inserted=inserted_awal + inserted)
+        if status == STATUS_DONE:
+            catat_file(db, job.id_trafo, sha256, size, total, inserted_awal + inserted, job.filename)
+    finally:
+        db.close()
+
+
+def resume_jobs():
+    """
+    Antrekan ulang job yang belum selesai (misal karena server restart): pending,
+    cancelled yang belum ditutup, dan running yang heartbeat-nya basi. Job running
+    milik proses lain yang masih hidup tidak disentuh.
+    """
+    j = models.IngestJob
+    db = SessionLocal()
+    try:
+        job_ids = db.scalars(
+            select(j.id).
+            where(j.finished_at.is_(None), or_(j.status.in_((STATUS_PENDING, STATUS_CANCELLED)), _basi(datetime.now()))).
+            order_by(j.id)
+        ).all()
+    finally:
+        db.close()
+    for job_id in job_ids:
+        executor.submit(run_job, job_id)
+
+
+def _simpan_upload(src, path):
+    """
+    Salin upload ke disk sambil menghitung hash; mengembalikan (sha256, size).
+    """
+    with open(path, "wb") as out:
+        shutil.copyfileobj(src, out, length=1024 * 1024)
+    with open(path, "rb") as f:
+        return hash_file(f)
+
+
+def shutdown():
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+# UPLOAD CSV SEBAGAI JOB
+@router.post("/kalkulasi/jobs/upload-csv")
+async def create_ingest_job(
+    id_trafo: int = Query(..., description="ID Trafo yang akan di-upload datanya"),
+    kapasitas: int = Query(..., description="Kapasitas Trafo"),
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(get_current_user)
+):
+    """
+    Simpan file upload lalu proses di background. Mengembalikan id job untuk dipantau.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.csv")
+    # Salin file di threadpool agar event loop tidak tertahan IO disk
+    sha256, size = await run_in_threadpool(_simpan_upload, file.file, path)
+
+    # File yang isinya identik dengan upload sebelumnya tidak dijadikan job
+    sebelumnya = (await db.scalars(query_file_sama(id_trafo, sha256))).first()
+    if sebelumnya is not None:
+        os.remove(path)
+        return response_ok(
+            data={"job_id": None, "duplicate": True},
+            message=f"File sudah pernah di-upload pada {sebelumnya.created_at:%Y-%m-%d %H:%M:%S}, tidak diproses ulang."
+        )
+
+    job = models.IngestJob(
+        id_trafo=id_trafo,
+        kapasitas=kapasitas,
+        owner_id=current_user.id,
+        filename=file.filename,
+        path=path,
+        status=STATUS_PENDING,
+        rows_parsed=0,
+        rows_inserted=0,
+        created_at=datetime.now(),
+    )
+    db.add(job)
+    await db.commit()
+    executor.submit(run_job, job.id)
+    return response_ok(data={"job_id": job.id, "duplicate": False}, message="Job created", status_code=202)
+
+# READ JOB BY ID
+@router.get("/kalkulasi/jobs/{job_id}", response_model=schemas.IngestJob)
+async def read_ingest_job(job_id: int, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    job = await db.scalar(select(models.IngestJob).where(models.IngestJob.id == job_id, models.IngestJob.owner_id == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return response_ok(data=schemas.IngestJob.model_validate(job))
+
+# CANCEL JOB BY ID
+@router.post("/kalkulasi/jobs/{job_id}/cancel")
+async def cancel_ingest_job(job_id: int, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    job = await db.scalar(select(models.IngestJob).where(models.IngestJob.id == job_id, models.IngestJob.owner_id == current_user.id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    # Update bersyarat: job yang baru saja selesai tidak berubah menjadi cancelled.
+    # Worker berhenti di batch berikutnya dan menandai job selesai
+    hasil = await db.execute(
+        update(models.IngestJob).
+        where(models.IngestJob.id == job_id, models.IngestJob.status.in_((STATUS_PENDING, STATUS_RUNNING))).
+        values(status=STATUS_CANCELLED).
+        execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    if hasil.rowcount == 0:
+        await db.refresh(job)
+        raise HTTPException(status_code=400, detail=f"Job sudah {job.status}")
+    return response_ok(data=None, message="Job cancelled")
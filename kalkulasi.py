@@ -0,0 +1,180 @@
+from datetime import datetime
+
+import numpy as np
+
+FORMAT_WAKTU = "%Y-%m-%d %H:%M:%S"
+
+# Nama kolom di CSV untuk setiap input kalkulasi: (header CSV, is_voltage)
+KOLOM_CSV = {
+    "v_r": ("Voltage R", True),
+    "v_s": ("Voltage S", True),
+    "v_t": ("Voltage T", True),
+    "i_r": ("Ampere R", False),
+    "i_s": ("Ampere S", False),
+    "i_t": ("Ampere T", False),
+    "cosphi": ("Cosphi", False),
+}
+
+# Urutan kolom hasil kalkulasi (sama dengan kolom di tabel hasil_kalkulasi)
+KOLOM_HASIL = [
+    "kv_r", "kv_s", "kv_t",
+    "kw_r", "kw_s", "kw_t",
+    "kvar_r", "kvar_s", "kvar_t",
+    "total_kva", "total_kw", "total_kvar",
+    "sisa_kap",
+]
+
+
+class DataTidakValid(ValueError):
+    """
+    Nilai di CSV tidak bisa diproses. `baris` adalah index baris di dalam batch.
+    """
+    def __init__(self, message, baris):
+        super().__init__(message)
+        self.baris = baris
+
+
+def _to_float_or_none(val, is_voltage=False):
+    """
+    Helper untuk konversi string ke float dengan aman.
+    - Mengatasi 'None' atau string kosong.
+    - Mengatasi format '228:01:00' jika is_voltage=True.
+    - Mengatasi koma desimal (misal '0,5').
+    """
+    if val is None or val == '':
+        return None
+
+    # Ubah string jadi string bersih
+    val_str = str(val).replace(',', '.') # Ganti koma desimal
+
+    if is_voltage:
+        # Mengubah "228:01:00" menjadi "228.01"
+        parts = val_str.split(':')
+        if len(parts) >= 2:
+            val_str = f"{parts[0]}.{parts[1]}" # Ambil jam dan menit
+        else:
+            val_str = parts[0] # Jika formatnya normal
+
+    try:
+        return float(val_str)
+    except ValueError:
+        # Jika 'val' masih tidak bisa diubah (misal 'abc')
+        return None
+
+
+def parse_kolom(values, is_voltage=False):
+    """
+    Ubah satu kolom string CSV menjadi array float64 sekaligus.
+    Nilai kosong atau tidak valid menjadi NaN (aturan sama dengan _to_float_or_none).
+    """
+    arr = np.array(["" if v is None else v for v in values], dtype=str)
+    arr = np.char.replace(arr, ",", ".")
+    if is_voltage:
+        # "228:01:00" -> "228.01"
+        jam, sep, sisa = np.char.partition(arr, ":").T
+        menit = np.char.partition(sisa, ":")[:, 0]
+        arr = np.where(sep == ":", np.char.add(np.char.add(jam, "."), menit), jam)
+    kosong = arr == ""
+    try:
+        hasil = np.where(kosong, "nan", arr).astype(np.float64)
+    except ValueError:
+        # Ada nilai yang bukan angka (misal 'abc'): parse per nilai
+        hasil = np.array([
+            np.nan if v is None else v
+            for v in (_to_float_or_none(s) for s in arr.tolist())
+        ], dtype=np.float64)
+    return hasil
+
+
+def parse_waktu(values):
+    """
+    Ubah kolom 'Datetime' (format FORMAT_WAKTU) menjadi array datetime64[us].
+    Nilai kosong menjadi NaT. Format salah memunculkan DataTidakValid.
+    """
+    arr = np.array(["" if v is None else v for v in values], dtype=str)
+    kosong = arr == ""
+    # Jalur cepat hanya untuk 'YYYY-MM-DD HH:MM:SS' persis; numpy juga menerima
+    # 'YYYY-MM-DDTHH:MM:SS' yang ditolak strptime, jadi pemisahnya harus spasi
+    standar = (np.char.str_len(arr) == 19) & (np.char.str_len(np.char.partition(arr, " ")[:, 0]) == 10)
+    if np.all(kosong | standar):
+        try:
+            return np.where(kosong, "NaT", arr).astype("datetime64[us]")
+        except ValueError:
+            pass
+    # Format tidak standar (misal '2025-1-1 00:00:00'): parse per nilai dengan strptime
+    hasil = []
+    for idx, val in enumerate(arr.tolist()):
+        if not val:
+            hasil.append(None)
+            continue
+        try:
+            hasil.append(datetime.strptime(val, FORMAT_WAKTU))
+        except ValueError as e:
+            raise DataTidakValid(str(e), idx)
+    return np.array(hasil, dtype="datetime64[us]")
+
+
+def hitung_daya(v_r, v_s, v_t, i_r, i_s, i_t, cosphi, kapasitas):
+    """
+    Hitung kVA, kW, kVAr per fasa, totalnya dan sisa kapasitas untuk seluruh array.
+    Input yang NaN menghasilkan output NaN pada baris yang sama.
+    """
+    v_r, v_s, v_t = (np.asarray(x, dtype=np.float64) for x in (v_r, v_s, v_t))
+    i_r, i_s, i_t = (np.asarray(x, dtype=np.float64) for x in (i_r, i_s, i_t))
+    cosphi = np.asarray(cosphi, dtype=np.float64)
+
+    # kVA (Apparent Power)
+    kv_r = v_r * i_r / 1000
+    kv_s = v_s * i_s / 1000
+    kv_t = v_t * i_t / 1000
+
+    # kW (Real Power)
+    kw_r = kv_r * cosphi
+    kw_s = kv_s * cosphi
+    kw_t = kv_t * cosphi
+
+    # kVAr (Reactive Power); cosphi di luar [-1, 1] menghasilkan NaN
+    with np.errstate(invalid="ignore"):
+        sin_phi = np.sqrt(1 - cosphi**2)
+    kvar_r = kv_r * sin_phi
+    kvar_s = kv_s * sin_phi
+    kvar_t = kv_t * sin_phi
+
+    total_kva = kv_r + kv_s + kv_t
+    return {
+        "kv_r": kv_r, "kv_s": kv_s, "kv_t": kv_t,
+        "kw_r": kw_r, "kw_s": kw_s, "kw_t": kw_t,
+        "kvar_r": kvar_r, "kvar_s": kvar_s, "kvar_t": kvar_t,
+        "total_kva": total_kva,
+        "total_kw": kw_r + kw_s + kw_t,
+        "total_kvar": kvar_r + kvar_s + kvar_t,
+        "sisa_kap": kapasitas - total_kva,
+    }
+
+
+def hitung_batch(rows, kapasitas):
+    """
+    Parse dan hitung satu batch baris CSV (list of dict) secara vektor.
+    Mengembalikan dict nama kolom -> array untuk input, hasil, dan waktu_kalkulasi.
+    """
+    kolom = {
+        nama: parse_kolom([row.get(header) for row in rows], is_voltage)
+        for nama, (header, is_voltage) in KOLOM_CSV.items()
+    }
+    cosphi = kolom["cosphi"]
+    tidak_valid = np.flatnonzero(np.abs(cosphi) > 1)
+    if tidak_valid.size:
+        raise DataTidakValid("math domain error", int(tidak_valid[0]))
+
+    kolom["waktu_kalkulasi"] = parse_waktu([row.get("Datetime") for row in rows])
+    kolom.update(hitung_daya(kapasitas=kapasitas, **{k: kolom[k] for k in KOLOM_CSV}))
+    return kolom
+
+
+def ke_list(arr):
+    """
+    Ubah array hasil menjadi list Python; NaN/NaT menjadi None (NULL di database).
+    """
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.tolist()
+    return np.where(np.isnan(arr), None, arr).tolist()
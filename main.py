@@ -1,23 +1,42 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.openapi.docs import get_swagger_ui_html
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from database import engine
+from database import engine, async_engine
 from response import response_err
 from auth import router as auth_router
 from trafo import router as trafo_router
 from group_trafo import router as group_trafo_router
 from hasil_kalkulasi import router as hasil_kalkulasi_router
+from jobs import router as jobs_router, resume_jobs, shutdown as shutdown_jobs
+from utils import hash_executor
+from bulk_upload import shutdown as shutdown_bulk_upload
+from compression import CompressionMiddleware
 
 import models
 models.Base.metadata.create_all(bind=engine,checkfirst=True)
 
-app = FastAPI(title="SMGD App - Documentation", version="1.0.0")
+# Lanjutkan job ingest yang tertunda saat server start
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    resume_jobs()
+    yield
+    shutdown_jobs()
+    shutdown_bulk_upload()
+    hash_executor.shutdown(wait=False, cancel_futures=True)
+    await async_engine.dispose()
+
+app = FastAPI(title="SMGD App - Documentation", version="1.0.0", lifespan=lifespan)
 app.include_router(auth_router)
 app.include_router(trafo_router)
 app.include_router(group_trafo_router)
 app.include_router(hasil_kalkulasi_router)
+app.include_router(jobs_router)
+
+# Kompresi respons (zstd/gzip) sesuai Accept-Encoding, di atas ambang ukuran
+app.add_middleware(CompressionMiddleware)
 
 # Daftar origin yang diizinkan
 origins = [
@@ -31,7 +50,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],          # izinkan semua method (GET, POST, dll)
     allow_headers=["*"],          # izinkan semua header
-    expose_headers=["Content-Disposition", "Filename", "X-Custom-Header"],
+    expose_headers=["Content-Disposition", "Filename", "X-Custom-Header", "ETag"],
 )
 
 # Tangani HTTPException (seperti 401, 404, dll)
@@ -1,12 +1,15 @@
-from sqlalchemy import Column, DateTime, Float, Integer, String, ForeignKey
-from sqlalchemy.orm import relationship
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Float, Integer, String, ForeignKey, Index, PrimaryKeyConstraint
+from sqlalchemy.orm import column_property, relationship
 from database import Base
 
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    username = Column(String, unique=True, index=True)
+    # active_history: username lama tetap ada di history saat rename (invalidasi cache, lihat auth.py)
+    username = column_property(Column(String, unique=True, index=True), active_history=True)
     password = Column(String)
 
     items = relationship("Item", back_populates="owner")
@@ -39,6 +42,8 @@ class Trafo(Base):
     latitude = Column(Float, nullable=False)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     group_id = Column(Integer, ForeignKey("group_trafo.id"), nullable=True)
+    # Versi baris untuk ETag/Last-Modified endpoint detail
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
 
     owner = relationship("User", back_populates="trafo")
     group = relationship("GroupTrafo", back_populates="trafo")
@@ -50,6 +55,8 @@ class GroupTrafo(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
     kodegrup = Column(String, nullable=False)
+    # Ikut validator Last-Modified trafo/hasil kalkulasi yang memuat nama group
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now, nullable=True)
     
     trafo = relationship("Trafo", back_populates="group")
 
@@ -82,3 +89,126 @@ class HasilKalkulasi(Base):
     tgl_upload = Column(DateTime, nullable=True)
 
     trafo = relationship("Trafo", back_populates="hasil_kalkulasi")
+
+    # Bacaan terbaru per trafo: filter id_trafo lalu urut waktu_kalkulasi DESC.
+    # Unik: satu bacaan per trafo per waktu, upload ulang melewati baris yang sudah ada
+    __table_args__ = (
+        Index("ix_hasil_kalkulasi_trafo_waktu", id_trafo, waktu_kalkulasi.desc(), unique=True),
+    )
+
+class IngestJob(Base):
+    __tablename__ = "ingest_job"
+
+    id = Column(Integer, primary_key=True, index=True)
+    id_trafo = Column(Integer, ForeignKey("trafo.id"), nullable=False)
+    kapasitas = Column(Integer, nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    filename = Column(String, nullable=True)
+    path = Column(String, nullable=False)
+    status = Column(String, nullable=False, index=True)
+    rows_parsed = Column(Integer, nullable=False, default=0)
+    rows_inserted = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    # Diperbarui worker yang sedang memproses; job running yang heartbeat-nya basi boleh diambil ulang
+    heartbeat_at = Column(DateTime, nullable=True)
+
+class FileUpload(Base):
+    """
+    Hash isi file CSV yang sudah berhasil di-upload per trafo, untuk mengenali upload ulang yang identik.
+    """
+    __tablename__ = "file_upload"
+
+    id = Column(Integer, primary_key=True, index=True)
+    id_trafo = Column(Integer, ForeignKey("trafo.id"), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    rows = Column(Integer, nullable=False)
+    rows_inserted = Column(Integer, nullable=False)
+    filename = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_file_upload_trafo_sha256", id_trafo, sha256, unique=True),
+    )
+
+class TrafoLatest(Base):
+    """
+    Ringkasan bacaan terbaru per trafo (satu baris per trafo), di-update saat upload.
+    """
+    __tablename__ = "trafo_latest"
+
+    id_trafo = Column(Integer, ForeignKey("trafo.id"), primary_key=True)
+    # Tanpa foreign key: hasil_kalkulasi terpartisi (lihat partisi.py), nilai bacaan disalin ke sini
+    id_hasil_kalkulasi = Column(Integer, nullable=False)
+    v_r = Column(Float, nullable=False)
+    v_s = Column(Float, nullable=False)
+    v_t = Column(Float, nullable=False)
+    i_r = Column(Float, nullable=False)
+    i_s = Column(Float, nullable=False)
+    i_t = Column(Float, nullable=False)
+    cosphi = Column(Float, nullable=False)
+    kv_r = Column(Float, nullable=True)
+    kv_s = Column(Float, nullable=True)
+    kv_t = Column(Float, nullable=True)
+    kw_r = Column(Float, nullable=True)
+    kw_s = Column(Float, nullable=True)
+    kw_t = Column(Float, nullable=True)
+    kvar_r = Column(Float, nullable=True)
+    kvar_s = Column(Float, nullable=True)
+    kvar_t = Column(Float, nullable=True)
+    total_kva = Column(Float, nullable=True)
+    total_kw = Column(Float, nullable=True)
+    total_kvar = Column(Float, nullable=True)
+    sisa_kap = Column(Float, nullable=True)
+    waktu_kalkulasi = Column(DateTime, nullable=True)
+    tgl_upload = Column(DateTime, nullable=True)
+
+    trafo = relationship("Trafo")
+
+class HasilKalkulasiRollup(Base):
+    """
+    Agregat hasil_kalkulasi per trafo per jam ('hour') atau per hari ('day').
+    """
+    __tablename__ = "hasil_kalkulasi_rollup"
+
+    id_trafo = Column(Integer, ForeignKey("trafo.id"), nullable=False)
+    bucket = Column(String, nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    jumlah = Column(Integer, nullable=False)
+    min_total_kva = Column(Float, nullable=True)
+    max_total_kva = Column(Float, nullable=True)
+    avg_total_kva = Column(Float, nullable=True)
+    min_total_kw = Column(Float, nullable=True)
+    max_total_kw = Column(Float, nullable=True)
+    avg_total_kw = Column(Float, nullable=True)
+    min_total_kvar = Column(Float, nullable=True)
+    max_total_kvar = Column(Float, nullable=True)
+    avg_total_kvar = Column(Float, nullable=True)
+    min_sisa_kap = Column(Float, nullable=True)
+    max_sisa_kap = Column(Float, nullable=True)
+    avg_sisa_kap = Column(Float, nullable=True)
+    min_kv_r = Column(Float, nullable=True)
+    max_kv_r = Column(Float, nullable=True)
+    avg_kv_r = Column(Float, nullable=True)
+    min_kv_s = Column(Float, nullable=True)
+    max_kv_s = Column(Float, nullable=True)
+    avg_kv_s = Column(Float, nullable=True)
+    min_kv_t = Column(Float, nullable=True)
+    max_kv_t = Column(Float, nullable=True)
+    avg_kv_t = Column(Float, nullable=True)
+    min_kw_r = Column(Float, nullable=True)
+    max_kw_r = Column(Float, nullable=True)
+    avg_kw_r = Column(Float, nullable=True)
+    min_kw_s = Column(Float, nullable=True)
+    max_kw_s = Column(Float, nullable=True)
+    avg_kw_s = Column(Float, nullable=True)
+    min_kw_t = Column(Float, nullable=True)
+    max_kw_t = Column(Float, nullable=True)
+    avg_kw_t = Column(Float, nullable=True)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("id_trafo", "bucket", "bucket_start"),
+    )
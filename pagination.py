@@ -0,0 +1,49 @@
+import base64
+import json
+
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(values):
+    """
+    Bungkus nilai kunci baris terakhir menjadi cursor opaque (base64 url-safe).
+    """
+    raw = json.dumps(list(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+
+
+async def count_total(db: AsyncSession, stmt):
+    """
+    Jumlah baris hasil select (untuk totalRecords).
+    """
+    return await db.scalar(select(func.count()).select_from(stmt.order_by(None).subquery()))
+
+
+async def keyset_page(db: AsyncSession, stmt, kolom, cursor: str | None, size: int):
+    """
+    Ambil satu halaman dengan seek (WHERE (kolom...) > cursor ORDER BY kolom... LIMIT size),
+    sehingga halaman ke-N sama murahnya dengan halaman pertama.
+    stmt adalah select satu entity; mengembalikan (list objek, next_cursor atau None jika sudah habis).
+    """
+    if cursor:
+        nilai = decode_cursor(cursor)
+        if not isinstance(nilai, list) or len(nilai) != len(kolom):
+            raise HTTPException(status_code=400, detail="Cursor tidak valid")
+        stmt = stmt.where(tuple_(*kolom) > tuple_(*nilai))
+    rows = (await db.scalars(stmt.order_by(*kolom).limit(size + 1))).all()
+    next_cursor = None
+    if len(rows) > size:
+        rows = rows[:size]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, k.key) for k in kolom)
+    return rows, next_cursor
@@ -0,0 +1,443 @@
+"""
+Partisi waktu dan retensi hasil_kalkulasi.
+
+- PostgreSQL: tabel hasil_kalkulasi di-partisi native per bulan (RANGE waktu_kalkulasi).
+  Query yang memfilter waktu hanya menyentuh partisi bulan terkait.
+- SQLite: satu tabel per bulan (hasil_kalkulasi_pYYYYMM, baris tanpa waktu di
+  hasil_kalkulasi_default) dan hasil_kalkulasi menjadi VIEW UNION ALL semua partisi.
+  SQLite mendorong filter id_trafo/waktu ke tiap partisi dan menggabungkan urutan
+  index-nya (MERGE UNION ALL), jadi query terbaru/rentang tetap lewat index.
+  Insert diarahkan bulk_insert ke tabel bulannya, id diambil dari hasil_kalkulasi_seq.
+
+Partisi bulan baru dibuat sebelum insert (bulk_insert). Retensi melepas partisi bulan
+yang kedaluwarsa lalu mengarsip (PostgreSQL: rename; SQLite: salin utuh ke file arsip
+per bulan) atau men-drop-nya, tanpa DELETE per baris.
+
+Konversi tabel biasa ke layout partisi ada di konversi(): dipanggil migration
+d3e7a5b2f8c1 dan saat start untuk database baru (create). Tabel, view dan index ini
+dikelola di sini, bukan lewat autogenerate (lihat alembic/env.py).
+
+Rollup (hasil_kalkulasi_rollup) dan trafo_latest tidak ikut dihapus: ringkasan jangka
+panjang tetap tersedia setelah data mentah diarsip.
+
+Jalankan (misal dari cron):
+    python partisi.py        # pakai RETENTION_MONTHS
+    python partisi.py 12     # simpan 12 bulan terakhir
+"""
+import os
+import sys
+import threading
+from datetime import datetime
+
+from sqlalchemy import Column, Index, MetaData, Table, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+import models
+
+TABEL = "hasil_kalkulasi"
+PREFIX_PARTISI = "hasil_kalkulasi_p"
+PARTISI_DEFAULT = "hasil_kalkulasi_default"
+PREFIX_ARSIP = "hasil_kalkulasi_arsip_"
+# Penghitung id global untuk partisi SQLite (satu baris: id terakhir yang dipakai)
+TABEL_SEQ = "hasil_kalkulasi_seq"
+
+# Jumlah bulan data mentah yang disimpan (termasuk bulan berjalan); 0 = retensi nonaktif
+RETENTION_MONTHS = int(os.getenv("RETENTION_MONTHS", "0"))
+# archive: simpan bulan kedaluwarsa (tabel terpisah di PostgreSQL, file di SQLite); drop: buang
+RETENTION_MODE = os.getenv("RETENTION_MODE", "archive")
+# Folder file arsip bulanan SQLite
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+
+_h = models.HasilKalkulasi.__table__
+KOLOM = [c.name for c in _h.columns]
+
+
+class BelumTerpartisi(RuntimeError):
+    """
+    hasil_kalkulasi masih tabel biasa: migration partisi belum dijalankan.
+    """
+
+
+def _salin_kolom():
+    # Kolom sama dengan model, tanpa foreign key
+    return [Column(c.name, c.type, primary_key=c.primary_key, nullable=c.nullable) for c in _h.columns]
+
+
+# Tabel di file arsip SQLite (di-ATTACH sebagai 'arsip')
+tabel_arsip = Table(TABEL, MetaData(schema="arsip"), *_salin_kolom())
+Index("ix_hasil_kalkulasi_trafo_waktu", tabel_arsip.c.id_trafo, tabel_arsip.c.waktu_kalkulasi.desc(), unique=True)
+
+# Definisi tabel partisi SQLite, dibuat saat pertama dipakai
+_metadata_partisi = MetaData()
+_lock_partisi = threading.Lock()
+
+
+def tabel_partisi(nama: str):
+    """
+    Table partisi SQLite: kolom hasil_kalkulasi dan unique index (id_trafo, waktu_kalkulasi DESC).
+    """
+    with _lock_partisi:
+        tabel = _metadata_partisi.tables.get(nama)
+        if tabel is None:
+            tabel = Table(nama, _metadata_partisi, *_salin_kolom())
+            Index(f"ix_{nama}_trafo_waktu", tabel.c.id_trafo, tabel.c.waktu_kalkulasi.desc(), unique=True)
+        return tabel
+
+
+def awal_bulan(waktu: datetime):
+    return waktu.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def tambah_bulan(bulan: datetime, n: int):
+    total = bulan.year * 12 + bulan.month - 1 + n
+    return bulan.replace(year=total // 12, month=total % 12 + 1)
+
+
+def nama_partisi(bulan: datetime):
+    return f"{PREFIX_PARTISI}{bulan:%Y%m}"
+
+
+def bulan_partisi(nama: str):
+    """
+    Awal bulan dari nama partisi, None untuk partisi default.
+    """
+    kode = nama[len(PREFIX_PARTISI):]
+    if not nama.startswith(PREFIX_PARTISI) or not kode.isdigit():
+        return None
+    return datetime.strptime(kode, "%Y%m")
+
+
+def ddl_partisi(bulan: datetime):
+    """
+    CREATE TABLE partisi PostgreSQL satu bulan.
+    """
+    return (
+        f"CREATE TABLE IF NOT EXISTS {nama_partisi(bulan)} PARTITION OF {TABEL} "
+        f"FOR VALUES FROM ('{bulan:%Y-%m-%d}') TO ('{tambah_bulan(bulan, 1):%Y-%m-%d}')"
+    )
+
+
+def ddl_view(partisi):
+    """
+    CREATE VIEW hasil_kalkulasi (SQLite): UNION ALL semua partisi dengan daftar kolom eksplisit.
+    """
+    kolom = ", ".join(KOLOM)
+    return f"CREATE VIEW {TABEL} AS " + " UNION ALL ".join(f"SELECT {kolom} FROM {nama}" for nama in partisi)
+
+
+def terpartisi(conn: Connection):
+    """
+    True jika hasil_kalkulasi sudah berlayout partisi (tabel partisi PostgreSQL / view SQLite).
+    Dicek ke katalog setiap kali, agar proses lain yang baru menjalankan migration ikut terlihat.
+    """
+    if conn.dialect.name == "postgresql":
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :tabel"
+        ), {"tabel": TABEL}).first() is not None
+    if conn.dialect.name == "sqlite":
+        return conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type = 'view' AND name = :tabel"
+        ), {"tabel": TABEL}).first() is not None
+    return False
+
+
+def daftar_partisi(conn: Connection):
+    """
+    Nama semua partisi hasil_kalkulasi (default lebih dulu, lalu urut bulan).
+    """
+    if conn.dialect.name == "postgresql":
+        nama = conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :tabel"
+        ), {"tabel": TABEL}).scalars().all()
+    else:
+        nama = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND (name = :default OR name LIKE :prefix)"
+        ), {"default": PARTISI_DEFAULT, "prefix": f"{PREFIX_PARTISI}%"}).scalars().all()
+    return sorted(nama, key=lambda n: (n != PARTISI_DEFAULT, n))
+
+
+def _atomik(conn: Connection, fn):
+    """
+    Jalankan fn (DDL SQLite) dalam satu transaksi. pysqlite meng-autocommit DDL di luar
+    transaksi, jadi transaksi dibuka sendiri: BEGIN IMMEDIATE (langsung ambil write lock,
+    tidak bentrok dengan proses lain yang menambah partisi), atau SAVEPOINT bila sudah
+    di dalam transaksi. View tidak pernah terlihat hilang oleh pembaca lain.
+    """
+    if conn.connection.driver_connection.in_transaction:
+        mulai, selesai, batal = "SAVEPOINT partisi", ("RELEASE partisi",), ("ROLLBACK TO partisi", "RELEASE partisi")
+    else:
+        mulai, selesai, batal = "BEGIN IMMEDIATE", ("COMMIT",), ("ROLLBACK",)
+    conn.exec_driver_sql(mulai)
+    try:
+        fn()
+    except Exception:
+        for sql in batal:
+            conn.exec_driver_sql(sql)
+        raise
+    for sql in selesai:
+        conn.exec_driver_sql(sql)
+
+
+def _buat_partisi_sqlite(conn: Connection, nama: str):
+    tabel = tabel_partisi(nama)
+    conn.execute(CreateTable(tabel, if_not_exists=True))
+    for index in tabel.indexes:
+        conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+def _ganti_view(conn: Connection, partisi):
+    conn.exec_driver_sql(f"DROP VIEW IF EXISTS {TABEL}")
+    conn.exec_driver_sql(ddl_view(partisi))
+
+
+def siapkan(conn: Connection, waktu_min: datetime, waktu_max: datetime):
+    """
+    Pastikan partisi bulan untuk rentang [waktu_min, waktu_max] ada sebelum insert.
+    Di PostgreSQL tanpa ini baris bulan baru masuk ke partisi default dan tidak ter-prune.
+    """
+    if not terpartisi(conn):
+        return
+    bulan = []
+    b = awal_bulan(waktu_min)
+    while b <= waktu_max:
+        bulan.append(b)
+        b = tambah_bulan(b, 1)
+    ada = set(daftar_partisi(conn))
+    baru = [b for b in bulan if nama_partisi(b) not in ada]
+    if not baru:
+        return
+
+    if conn.dialect.name == "postgresql":
+        for b in baru:
+            try:
+                with conn.begin_nested():
+                    conn.execute(text(ddl_partisi(b)))
+            except DBAPIError:
+                # Dibuat bersamaan oleh proses lain
+                if nama_partisi(b) not in daftar_partisi(conn):
+                    raise
+        return
+
+    def buat():
+        for b in baru:
+            _buat_partisi_sqlite(conn, nama_partisi(b))
+        _ganti_view(conn, daftar_partisi(conn))
+    _atomik(conn, buat)
+
+
+def rute(conn: Connection, rows, idx_waktu: int):
+    """
+    SQLite terpartisi: kelompokkan baris per tabel partisi dan beri id baru dari
+    hasil_kalkulasi_seq (satu UPDATE per batch). Mengembalikan list (Table, baris
+    dengan id di depan), atau None bila insert langsung ke hasil_kalkulasi.
+    Partisi harus sudah dibuat lewat siapkan().
+    """
+    if conn.dialect.name != "sqlite" or not terpartisi(conn) or not rows:
+        return None
+    per_partisi = {}
+    for row in rows:
+        waktu = row[idx_waktu]
+        per_partisi.setdefault(PARTISI_DEFAULT if waktu is None else nama_partisi(waktu), []).append(row)
+    akhir = conn.execute(
+        text(f"UPDATE {TABEL_SEQ} SET id = id + :n RETURNING id"), {"n": len(rows)}
+    ).scalar_one()
+    id_baru = iter(range(akhir - len(rows) + 1, akhir + 1))
+    return [
+        (tabel_partisi(nama), [(next(id_baru), *row) for row in isi])
+        for nama, isi in per_partisi.items()
+    ]
+
+
+def _konversi_postgres(conn: Connection):
+    # Foreign key ke tabel partisi harus memuat kolom partisi; trafo_latest menyimpan salinan nilai
+    conn.execute(text("ALTER TABLE trafo_latest DROP CONSTRAINT IF EXISTS trafo_latest_id_hasil_kalkulasi_fkey"))
+    conn.execute(text("ALTER TABLE hasil_kalkulasi RENAME TO hasil_kalkulasi_lama"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_hasil_kalkulasi_id"))
+    conn.execute(text("DROP INDEX IF EXISTS ix_hasil_kalkulasi_trafo_waktu"))
+    conn.execute(text("ALTER SEQUENCE hasil_kalkulasi_id_seq OWNED BY NONE"))
+
+    # Primary key tabel partisi wajib memuat waktu_kalkulasi (nullable), jadi id cukup di-index
+    conn.execute(text(
+        "CREATE TABLE hasil_kalkulasi (LIKE hasil_kalkulasi_lama INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (waktu_kalkulasi)"
+    ))
+    conn.execute(text("ALTER TABLE hasil_kalkulasi ADD FOREIGN KEY (id_trafo) REFERENCES trafo (id)"))
+    conn.execute(text("CREATE INDEX ix_hasil_kalkulasi_id ON hasil_kalkulasi (id)"))
+    # NULLS LAST agar ORDER BY waktu_kalkulasi DESC NULLS LAST (bacaan terbaru) tetap dilayani index
+    conn.execute(text("CREATE UNIQUE INDEX ix_hasil_kalkulasi_trafo_waktu ON hasil_kalkulasi (id_trafo, waktu_kalkulasi DESC NULLS LAST)"))
+    # Baris tanpa waktu_kalkulasi masuk partisi default
+    conn.execute(text(f"CREATE TABLE {PARTISI_DEFAULT} PARTITION OF hasil_kalkulasi DEFAULT"))
+
+    waktu_min, waktu_max = conn.execute(text(
+        "SELECT MIN(waktu_kalkulasi), MAX(waktu_kalkulasi) FROM hasil_kalkulasi_lama"
+    )).one()
+    if waktu_min is not None:
+        bulan = awal_bulan(waktu_min)
+        while bulan <= waktu_max:
+            conn.execute(text(ddl_partisi(bulan)))
+            bulan = tambah_bulan(bulan, 1)
+
+    conn.execute(text("INSERT INTO hasil_kalkulasi SELECT * FROM hasil_kalkulasi_lama"))
+    conn.execute(text("ALTER SEQUENCE hasil_kalkulasi_id_seq OWNED BY hasil_kalkulasi.id"))
+    conn.execute(text("DROP TABLE hasil_kalkulasi_lama"))
+
+
+def _konversi_sqlite(conn: Connection):
+    waktu = _h.c.waktu_kalkulasi
+    ada = conn.execute(select(waktu).where(waktu.isnot(None)).order_by(waktu).limit(1)).scalar()
+    bulan = []
+    if ada is not None:
+        terakhir = conn.execute(select(waktu).where(waktu.isnot(None)).order_by(waktu.desc()).limit(1)).scalar()
+        b = awal_bulan(ada)
+        while b <= terakhir:
+            bulan.append(b)
+            b = tambah_bulan(b, 1)
+
+    def pindah():
+        _buat_partisi_sqlite(conn, PARTISI_DEFAULT)
+        conn.execute(insert(tabel_partisi(PARTISI_DEFAULT)).from_select(KOLOM, select(_h).where(waktu.is_(None))))
+        for b in bulan:
+            nama = nama_partisi(b)
+            isi = select(_h).where(waktu >= b, waktu < tambah_bulan(b, 1))
+            if conn.execute(isi.limit(1)).first() is None:
+                continue
+            _buat_partisi_sqlite(conn, nama)
+            conn.execute(insert(tabel_partisi(nama)).from_select(KOLOM, isi))
+        conn.exec_driver_sql(f"CREATE TABLE {TABEL_SEQ} (id INTEGER NOT NULL)")
+        conn.exec_driver_sql(f"INSERT INTO {TABEL_SEQ} (id) SELECT COALESCE(MAX(id), 0) FROM {TABEL}")
+        # DROP lalu CREATE VIEW (bukan RENAME): SQLite ikut mengganti referensi tabel saat rename
+        conn.exec_driver_sql(f"DROP TABLE {TABEL}")
+        conn.exec_driver_sql(ddl_view(daftar_partisi(conn)))
+    _atomik(conn, pindah)
+
+
+def konversi(conn: Connection):
+    """
+    Ubah tabel hasil_kalkulasi biasa menjadi layout partisi (idempotent).
+    Foreign key trafo_latest -> hasil_kalkulasi harus sudah dilepas (SQLite: lewat migration).
+    """
+    if conn.dialect.name not in ("postgresql", "sqlite") or terpartisi(conn):
+        return
+    if conn.dialect.name == "postgresql":
+        _konversi_postgres(conn)
+    else:
+        _konversi_sqlite(conn)
+
+
+def create(conn: Connection):
+    """
+    Database baru (hasil_kalkulasi masih kosong dari create_all): langsung pakai layout partisi.
+    Tabel yang sudah berisi data dikonversi lewat migration, bukan saat start.
+    """
+    if conn.dialect.name not in ("postgresql", "sqlite") or terpartisi(conn):
+        return
+    if conn.execute(select(_h.c.id).limit(1)).first() is None:
+        konversi(conn)
+
+
+def batas_retensi(sekarang: datetime, bulan: int):
+    """
+    Awal bulan tertua yang masih disimpan; data sebelum ini kedaluwarsa.
+    """
+    return tambah_bulan(awal_bulan(sekarang), -(bulan - 1))
+
+
+def _kedaluwarsa(conn: Connection, batas: datetime):
+    return [
+        (nama, bulan) for nama in daftar_partisi(conn)
+        if (bulan := bulan_partisi(nama)) is not None and bulan < batas
+    ]
+
+
+def _retensi_postgres(conn: Connection, batas: datetime, mode: str):
+    hasil = []
+    for nama, bulan in _kedaluwarsa(conn, batas):
+        conn.execute(text(f"ALTER TABLE {TABEL} DETACH PARTITION {nama}"))
+        if mode == "drop":
+            conn.execute(text(f"DROP TABLE {nama}"))
+            tujuan = None
+        else:
+            tujuan = f"{PREFIX_ARSIP}{bulan:%Y%m}"
+            ada = conn.execute(text("SELECT to_regclass(:nama)"), {"nama": tujuan}).scalar()
+            if ada is None:
+                conn.execute(text(f"ALTER TABLE {nama} RENAME TO {tujuan}"))
+            else:
+                # Arsip bulan ini sudah ada (partisi dibuat lagi oleh data terlambat): gabungkan
+                conn.execute(text(f"INSERT INTO {tujuan} SELECT * FROM {nama} ON CONFLICT DO NOTHING"))
+                conn.execute(text(f"DROP TABLE {nama}"))
+        conn.commit()
+        hasil.append({"bulan": f"{bulan:%Y-%m}", "rows": None, "tujuan": tujuan})
+    return hasil
+
+
+def _retensi_sqlite(conn: Connection, batas: datetime, mode: str):
+    hasil = []
+    for nama, bulan in _kedaluwarsa(conn, batas):
+        tujuan = None
+        rows = None
+        if mode != "drop":
+            os.makedirs(ARCHIVE_DIR, exist_ok=True)
+            tujuan = os.path.join(ARCHIVE_DIR, f"{TABEL}_{bulan:%Y%m}.db")
+            # ATTACH harus di luar transaksi: commit dulu pembacaan sebelumnya
+            conn.commit()
+            conn.exec_driver_sql("ATTACH DATABASE ? AS arsip", (tujuan,))
+        try:
+            if tujuan is not None:
+                tabel_arsip.create(conn, checkfirst=True)
+                rows = conn.execute(insert(tabel_arsip).prefix_with("OR IGNORE").from_select(
+                    KOLOM, select(tabel_partisi(nama))
+                )).rowcount
+
+            def lepas():
+                # Keluarkan partisi dari view dulu, baru drop tabelnya (satu transaksi)
+                _ganti_view(conn, [p for p in daftar_partisi(conn) if p != nama])
+                conn.exec_driver_sql(f"DROP TABLE {nama}")
+            _atomik(conn, lepas)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            if tujuan is not None:
+                conn.exec_driver_sql("DETACH DATABASE arsip")
+        hasil.append({"bulan": f"{bulan:%Y-%m}", "rows": rows, "tujuan": tujuan})
+    return hasil
+
+
+def retensi(engine: Engine, bulan: int = RETENTION_MONTHS, mode: str = RETENTION_MODE, sekarang: datetime | None = None):
+    """
+    Terapkan retensi: data mentah yang lebih tua dari `bulan` bulan terakhir diarsip
+    atau dibuang per partisi bulan utuh. Mengembalikan list {bulan, rows, tujuan} per bulan.
+    BelumTerpartisi bila migration partisi belum dijalankan.
+    """
+    if bulan <= 0:
+        return []
+    batas = batas_retensi(sekarang or datetime.now(), bulan)
+    with engine.connect() as conn:
+        if not terpartisi(conn):
+            raise BelumTerpartisi(
+                f"Retensi butuh hasil_kalkulasi terpartisi (dialect {engine.dialect.name}): "
+                "jalankan 'alembic upgrade head' dulu"
+            )
+        if conn.dialect.name == "postgresql":
+            return _retensi_postgres(conn, batas, mode)
+        return _retensi_sqlite(conn, batas, mode)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    bulan = int(sys.argv[1]) if len(sys.argv) > 1 else RETENTION_MONTHS
+    if bulan <= 0:
+        sys.exit("Retensi nonaktif: isi RETENTION_MONTHS atau beri jumlah bulan sebagai argumen")
+    try:
+        hasil = retensi(engine, bulan)
+    except BelumTerpartisi as e:
+        sys.exit(str(e))
+    for item in hasil:
+        print(f"{item['bulan']}: {item['rows'] if item['rows'] is not None else '-'} baris -> {item['tujuan'] or 'dibuang'}")
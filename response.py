@@ -1,7 +1,39 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # orjson opsional, fallback ke json stdlib
+    orjson = None
+
+
+def _orjson_default(obj):
+    # Model pydantic di-dump ke dict; datetime, numpy, dst. ditangani orjson langsung
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Type {type(obj).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse yang di-encode dengan orjson. data boleh berisi model pydantic,
+    datetime atau array numpy tanpa model_dump(mode="json") terlebih dulu.
+    """
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(jsonable_encoder(content))
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
 
 def response_ok(data=None, message="Success", status_code=200):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
         content={
             "success": True,
@@ -10,8 +42,8 @@ def response_ok(data=None, message="Success", status_code=200):
         },
     )
 
-def response_paginate(data=list[any], page=0, size=10, total=0, totalPage=0, message="Success", status_code=200):
-    return JSONResponse(
+def response_paginate(data=list[any], page=0, size=10, total=0, totalPage=0, message="Success", status_code=200, nextCursor=None):
+    return FastJSONResponse(
         status_code=status_code,
         content={
             "success": True,
@@ -21,14 +53,15 @@ def response_paginate(data=list[any], page=0, size=10, total=0, totalPage=0, mes
                 "page": page,
                 "size": size,
                 "totalRecords": total,
-                "totalPage": totalPage
+                "totalPage": totalPage,
+                "nextCursor": nextCursor
             }
         },
     )
 
 
 def response_err(message="Error", status_code=400, data=None):
-    return JSONResponse(
+    return FastJSONResponse(
         status_code=status_code,
         content={
             "success": False,
@@ -36,3 +69,75 @@ def response_err(message="Error", status_code=400, data=None):
             "data": data,
         },
     )
+
+
+def make_etag(body: bytes):
+    """
+    ETag kuat dari isi body respons.
+    """
+    return '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+
+
+def etag_dari(*nilai):
+    """
+    ETag dari nilai versi data (misal updated_at, id bacaan terbaru) tanpa membangun body.
+    """
+    return make_etag(repr(nilai).encode("utf-8"))
+
+
+def last_modified_dari(*waktu: datetime | None):
+    """
+    Last-Modified dari beberapa updated_at (trafo, group, upload); None diabaikan.
+    """
+    return max((w for w in waktu if w is not None), default=None)
+
+
+def http_date(waktu: datetime):
+    """
+    Format tanggal HTTP (Last-Modified). Datetime naive dianggap waktu lokal server.
+    """
+    return format_datetime(waktu.astimezone(timezone.utc), usegmt=True)
+
+
+def etag_match(request: Request, etag: str):
+    """
+    True jika header If-None-Match request cocok dengan etag (termasuk '*' dan weak ETag).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None = None):
+    """
+    Cek conditional GET: If-None-Match lebih diutamakan, lalu If-Modified-Since.
+    """
+    if request.headers.get("if-none-match"):
+        return etag_match(request, etag)
+    header = request.headers.get("if-modified-since")
+    if not header or last_modified is None:
+        return False
+    try:
+        sejak = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if sejak.tzinfo is None:
+        return False
+    # Resolusi tanggal HTTP hanya detik
+    return last_modified.astimezone(timezone.utc).replace(microsecond=0) <= sejak
+
+
+def validator_headers(etag: str, last_modified: datetime | None = None):
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def response_not_modified(etag: str, headers=None):
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
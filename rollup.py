@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.engine import Connection
+
+import models
+
+BUCKETS = ("hour", "day")
+
+# Kolom hasil_kalkulasi yang diagregasi (min/max/avg) di tabel rollup
+METRIK = ["total_kva", "total_kw", "total_kvar", "sisa_kap", "kv_r", "kv_s", "kv_t", "kw_r", "kw_s", "kw_t"]
+
+
+def floor_waktu(waktu: datetime, bucket: str):
+    """
+    Bulatkan waktu ke awal bucket ('hour' atau 'day').
+    """
+    waktu = waktu.replace(minute=0, second=0, microsecond=0)
+    if bucket == "day":
+        waktu = waktu.replace(hour=0)
+    return waktu
+
+
+def langkah(bucket: str):
+    return timedelta(hours=1) if bucket == "hour" else timedelta(days=1)
+
+
+def bucket_expr(conn: Connection, kolom, bucket: str):
+    """
+    Ekspresi SQL awal bucket untuk kolom waktu, sesuai dialect.
+    Di SQLite hasilnya string dengan format yang sama dengan kolom DateTime SQLAlchemy.
+    """
+    if conn.dialect.name == "postgresql":
+        return func.date_trunc(bucket, kolom)
+    fmt = "%Y-%m-%d %H:00:00.000000" if bucket == "hour" else "%Y-%m-%d 00:00:00.000000"
+    return func.strftime(fmt, kolom)
+
+
+def refresh(conn: Connection, id_trafo: int, waktu_min: datetime, waktu_max: datetime):
+    """
+    Hitung ulang bucket rollup satu trafo yang mencakup [waktu_min, waktu_max]
+    dari data mentah. Hanya bucket yang tersentuh batch yang dihitung ulang,
+    sehingga biaya sebanding dengan rentang waktu batch, bukan seluruh histori.
+    """
+    h = models.HasilKalkulasi.__table__
+    r = models.HasilKalkulasiRollup.__table__
+    for bucket in BUCKETS:
+        awal = floor_waktu(waktu_min, bucket)
+        akhir = floor_waktu(waktu_max, bucket) + langkah(bucket)
+        conn.execute(delete(r).where(
+            r.c.id_trafo == id_trafo,
+            r.c.bucket == bucket,
+            r.c.bucket_start >= awal,
+            r.c.bucket_start < akhir,
+        ))
+        start = bucket_expr(conn, h.c.waktu_kalkulasi, bucket)
+        agregat = []
+        for m in METRIK:
+            agregat += [func.min(h.c[m]), func.max(h.c[m]), func.avg(h.c[m])]
+        stmt = select(h.c.id_trafo, literal(bucket), start, func.count(), *agregat).\
+            where(
+                h.c.id_trafo == id_trafo,
+                h.c.waktu_kalkulasi >= awal,
+                h.c.waktu_kalkulasi < akhir,
+            ).\
+            group_by(h.c.id_trafo, start)
+        kolom = ["id_trafo", "bucket", "bucket_start", "jumlah"]
+        for m in METRIK:
+            kolom += [f"min_{m}", f"max_{m}", f"avg_{m}"]
+        conn.execute(insert(r).from_select(kolom, stmt))
+
+
+def backfill(conn: Connection):
+    """
+    Bangun ulang rollup semua trafo dari histori hasil_kalkulasi.
+    """
+    h = models.HasilKalkulasi.__table__
+    rentang = conn.execute(
+        select(h.c.id_trafo, func.min(h.c.waktu_kalkulasi), func.max(h.c.waktu_kalkulasi)).
+        group_by(h.c.id_trafo)
+    ).all()
+    for id_trafo, waktu_min, waktu_max in rentang:
+        if waktu_min is not None:
+            refresh(conn, id_trafo, waktu_min, waktu_max)
+    return len(rentang)
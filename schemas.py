@@ -13,6 +13,19 @@ class User(UserBase):
     class Config:
         from_attributes = True
 
+# --- GROUP TRAFO ---
+class GroupTrafoBase(BaseModel):
+    name: str
+    kodegrup: str
+
+class GroupTrafoCreate(GroupTrafoBase):
+    pass
+
+class GroupTrafo(GroupTrafoBase):
+    id: int
+    class Config:
+        from_attributes = True
+
 # --- TRAFO ---
 class TrafoBase(BaseModel):
     group_id: int
@@ -40,20 +53,11 @@ class TrafoDetail(TrafoBase):
     group: GroupTrafo | None = None
     model_config = ConfigDict(from_attributes=True)
         
-# --- GROUP TRAFO ---
-class GroupTrafoBase(BaseModel):
-    name: str
-    kodegrup: str
-
-class GroupTrafoCreate(GroupTrafoBase):
-    pass
-
-class GroupTrafo(GroupTrafoBase):
-    id: int
-    class Config:
-        from_attributes = True
-
 # --- Combobox ---
+class TrafoJarak(BaseModel):
+    trafo: Trafo
+    jarak_km: float
+
 class Combobox(BaseModel):
     id: int
     name: str
@@ -98,3 +102,67 @@ class TrafoHasilKalkulasi(BaseModel):
     hasil_kalkulasi: Optional[HasilKalkulasi] = None
     class Config:
         from_attributes = True
+
+# --- INGEST JOB ---
+class IngestJob(BaseModel):
+    id: int
+    id_trafo: int
+    filename: str | None = None
+    status: str
+    rows_parsed: int
+    rows_inserted: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+# --- ROLLUP HASIL KALKULASI ---
+class HasilKalkulasiRollup(BaseModel):
+    bucket_start: datetime
+    jumlah: int
+    min_total_kva: float | None = None
+    max_total_kva: float | None = None
+    avg_total_kva: float | None = None
+    min_total_kw: float | None = None
+    max_total_kw: float | None = None
+    avg_total_kw: float | None = None
+    min_total_kvar: float | None = None
+    max_total_kvar: float | None = None
+    avg_total_kvar: float | None = None
+    min_sisa_kap: float | None = None
+    max_sisa_kap: float | None = None
+    avg_sisa_kap: float | None = None
+    min_kv_r: float | None = None
+    max_kv_r: float | None = None
+    avg_kv_r: float | None = None
+    min_kv_s: float | None = None
+    max_kv_s: float | None = None
+    avg_kv_s: float | None = None
+    min_kv_t: float | None = None
+    max_kv_t: float | None = None
+    avg_kv_t: float | None = None
+    min_kw_r: float | None = None
+    max_kw_r: float | None = None
+    avg_kw_r: float | None = None
+    min_kw_s: float | None = None
+    max_kw_s: float | None = None
+    avg_kw_s: float | None = None
+    min_kw_t: float | None = None
+    max_kw_t: float | None = None
+    avg_kw_t: float | None = None
+    model_config = ConfigDict(from_attributes=True)
+
+# --- BEBAN GROUP TRAFO ---
+class GroupTrafoLoad(BaseModel):
+    bucket_start: datetime
+    jumlah_trafo: int
+    total_kva: float | None = None
+    total_kw: float | None = None
+    total_kvar: float | None = None
+    sisa_kap: float | None = None
+
+# --- FLEET (trafo + bacaan terbaru) ---
+class FleetTrafo(BaseModel):
+    trafo: Trafo
+    hasil_kalkulasi: Optional[HasilKalkulasi] = None
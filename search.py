@@ -0,0 +1,118 @@
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, case, or_, text
+from sqlalchemy.engine import Connection
+
+# Index pencarian (parameter q). Di SQLite memakai FTS5 dengan tokenizer trigram
+# (cocok untuk substring), disinkronkan oleh trigger. Di PostgreSQL memakai index GIN
+# pg_trgm per kolom yang melayani ILIKE '%kata%'. Dialect lain fallback ke LIKE tanpa index
+# (full scan).
+# tabel sumber -> (tabel FTS, kolom yang dicari)
+INDEX = {
+    "trafo": ("trafo_fts", ["name", "brand", "type"]),
+    "group_trafo": ("group_trafo_fts", ["name", "kodegrup"]),
+}
+
+# Trigram butuh minimal 3 karakter per kata; lebih pendek memakai LIKE
+MIN_TRIGRAM = 3
+
+# Metadata terpisah agar create_all / autogenerate tidak membuat tabel biasa
+fts_metadata = MetaData()
+FTS = {
+    tabel: Table(
+        fts, fts_metadata,
+        Column("rowid", Integer, primary_key=True),
+        *[Column(k, String) for k in kolom],
+        Column("rank", Float),
+    )
+    for tabel, (fts, kolom) in INDEX.items()
+}
+
+
+def pakai_fts(dialect):
+    return dialect.name == "sqlite"
+
+
+def pakai_trigram(dialect):
+    return dialect.name == "postgresql"
+
+
+def ddl(tabel):
+    """
+    Statement SQL pembuatan tabel FTS5 (external content) dan trigger sinkronisasinya.
+    Migration 4d9b7e1c3f60 menyimpan salinan SQL-nya sendiri (tetap sama walau fungsi ini berubah).
+    """
+    fts, kolom = INDEX[tabel]
+    daftar = ", ".join(kolom)
+    new = ", ".join(f"new.{k}" for k in kolom)
+    old = ", ".join(f"old.{k}" for k in kolom)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({daftar}, content='{tabel}', content_rowid='id', tokenize='trigram')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {tabel} BEGIN "
+        f"INSERT INTO {fts}(rowid, {daftar}) VALUES (new.id, {new}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {tabel} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {daftar}) VALUES ('delete', old.id, {old}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {tabel} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {daftar}) VALUES ('delete', old.id, {old}); "
+        f"INSERT INTO {fts}(rowid, {daftar}) VALUES (new.id, {new}); END",
+    ]
+
+
+def ddl_trigram(tabel):
+    """
+    Statement SQL index GIN pg_trgm (PostgreSQL) untuk tiap kolom yang dicari.
+    Migration a8f3c6d2e4b1 menyimpan salinan SQL-nya sendiri.
+    """
+    return ["CREATE EXTENSION IF NOT EXISTS pg_trgm"] + [
+        f"CREATE INDEX IF NOT EXISTS ix_{tabel}_{k}_trgm ON {tabel} USING gin ({k} gin_trgm_ops)"
+        for k in INDEX[tabel][1]
+    ]
+
+
+def create(conn: Connection, tabel: str):
+    """
+    Buat index pencarian tabel bila belum ada, lalu isi dari data yang sudah ada (idempotent).
+    """
+    if pakai_trigram(conn.dialect):
+        for sql in ddl_trigram(tabel):
+            conn.execute(text(sql))
+        return
+    if not pakai_fts(conn.dialect):
+        return
+    fts = INDEX[tabel][0]
+    ada = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": fts}).first()
+    for sql in ddl(tabel):
+        conn.execute(text(sql))
+    if not ada:
+        conn.execute(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+
+
+def query_match(q: str):
+    """
+    Ubah input user menjadi query FTS5: tiap kata jadi frasa (substring), semua kata wajib cocok.
+    """
+    return " ".join('"' + kata.replace('"', '""') + '"' for kata in q.split())
+
+
+def cari(dialect, stmt, model, q: str):
+    """
+    Tambahkan filter pencarian q ke select model.
+    Mengembalikan (stmt, urutan): urutan = prefix nama dulu, lalu relevansi (bm25) di FTS5.
+    """
+    tabel = model.__tablename__
+    fts_table = FTS[tabel]
+    kolom = INDEX[tabel][1]
+    prefix = case((model.name.startswith(q.strip(), autoescape=True), 0), else_=1)
+    kata = q.split()
+    if pakai_fts(dialect) and kata and all(len(k) >= MIN_TRIGRAM for k in kata):
+        stmt = stmt.join(fts_table, fts_table.c.rowid == model.id).\
+            where(text(f"{fts_table.name} MATCH :q_fts").bindparams(q_fts=query_match(q)))
+        return stmt, [prefix, fts_table.c.rank, model.id]
+    # Fallback LIKE: tiap kata harus ada di salah satu kolom.
+    # PostgreSQL: ILIKE (case-insensitive seperti FTS5 trigram) dilayani index GIN pg_trgm,
+    # kecuali kata < 3 karakter yang tidak menghasilkan trigram (index tidak bisa menyaring)
+    for k in kata:
+        if pakai_trigram(dialect):
+            cocok = [getattr(model, nama).icontains(k, autoescape=True) for nama in kolom]
+        else:
+            cocok = [getattr(model, nama).contains(k, autoescape=True) for nama in kolom]
+        stmt = stmt.where(or_(*cocok))
+    return stmt, [prefix, model.name, model.id]
@@ -0,0 +1,171 @@
+import math
+
+from sqlalchemy import Column, Float, Integer, MetaData, Table, delete, event, insert, or_, select, text, union_all
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+# Index spasial koordinat trafo. Di SQLite memakai modul R*Tree (virtual table),
+# di dialect lain memakai index btree biasa (longitude, latitude) langsung di tabel trafo:
+# index itu hanya menyempitkan rentang longitude, latitude dicek per entri index
+# (bbox sempit memanjang utara-selatan tetap memindai satu pita longitude penuh).
+RTREE = "trafo_rtree"
+INDEX_LON_LAT = "ix_trafo_lon_lat"
+
+# Metadata terpisah agar create_all / autogenerate tidak membuat tabel biasa
+rtree_metadata = MetaData()
+trafo_rtree = Table(
+    RTREE, rtree_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("min_lon", Float),
+    Column("max_lon", Float),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+)
+
+RADIUS_BUMI_KM = 6371.0088
+KM_PER_DERAJAT = 111.32
+# Radius awal pencarian kNN (km); diperbesar 4x sampai k trafo ditemukan
+RADIUS_AWAL_KM = 1.0
+SETENGAH_KELILING_KM = math.pi * RADIUS_BUMI_KM
+
+
+def pakai_rtree(dialect):
+    return dialect.name == "sqlite"
+
+
+def create(conn: Connection):
+    """
+    Buat index spasial bila belum ada dan isi dari tabel trafo (idempotent).
+    """
+    if not pakai_rtree(conn.dialect):
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {INDEX_LON_LAT} ON trafo (longitude, latitude)"))
+        return
+    ada = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": RTREE}).first()
+    if ada:
+        return
+    conn.execute(text(f"CREATE VIRTUAL TABLE {RTREE} USING rtree(id, min_lon, max_lon, min_lat, max_lat)"))
+    rebuild(conn)
+
+
+def rebuild(conn: Connection):
+    """
+    Isi ulang R*Tree dari seluruh trafo.
+    """
+    t = models.Trafo.__table__
+    conn.execute(delete(trafo_rtree))
+    conn.execute(insert(trafo_rtree).from_select(
+        ["id", "min_lon", "max_lon", "min_lat", "max_lat"],
+        select(t.c.id, t.c.longitude, t.c.longitude, t.c.latitude, t.c.latitude),
+    ))
+
+
+# Sinkronkan R*Tree di transaksi yang sama dengan perubahan trafo
+@event.listens_for(models.Trafo, "after_insert")
+@event.listens_for(models.Trafo, "after_update")
+def _simpan_trafo(mapper, connection, target):
+    if not pakai_rtree(connection.dialect):
+        return
+    connection.execute(delete(trafo_rtree).where(trafo_rtree.c.id == target.id))
+    connection.execute(insert(trafo_rtree).values(
+        id=target.id,
+        min_lon=target.longitude, max_lon=target.longitude,
+        min_lat=target.latitude, max_lat=target.latitude,
+    ))
+
+
+@event.listens_for(models.Trafo, "after_delete")
+def _hapus_trafo(mapper, connection, target):
+    if pakai_rtree(connection.dialect):
+        connection.execute(delete(trafo_rtree).where(trafo_rtree.c.id == target.id))
+
+
+def rentang_lon(min_lon, max_lon):
+    """
+    Pecah rentang longitude menjadi rentang di dalam [-180, 180].
+    Rentang yang melewati antimeridian (min_lon > max_lon, atau di luar +-180)
+    menjadi dua: (min_lon, 180) dan (-180, max_lon).
+    """
+    if max_lon - min_lon >= 360.0:
+        return [(-180.0, 180.0)]
+    if min_lon < -180.0:
+        min_lon += 360.0
+    if max_lon > 180.0:
+        max_lon -= 360.0
+    if min_lon <= max_lon:
+        return [(min_lon, max_lon)]
+    return [(min_lon, 180.0), (-180.0, max_lon)]
+
+
+def query_bbox(dialect, min_lon, min_lat, max_lon, max_lat):
+    """
+    Select trafo di dalam bounding box. R*Tree menyaring kandidat, lalu filter
+    kolom asli memastikan hasil tepat (koordinat R*Tree dibulatkan ke float32).
+    min_lon > max_lon berarti bbox melewati antimeridian (lihat rentang_lon).
+    """
+    t = models.Trafo
+    rentang = rentang_lon(min_lon, max_lon)
+    stmt = select(t).where(
+        or_(*[t.longitude.between(a, b) for a, b in rentang]),
+        t.latitude.between(min_lat, max_lat),
+    )
+    if pakai_rtree(dialect):
+        r = trafo_rtree.c
+        lat = [r.max_lat >= min_lat, r.min_lat <= max_lat]
+        if len(rentang) == 1:
+            (a, b), = rentang
+            stmt = stmt.join(trafo_rtree, r.id == t.id).where(r.max_lon >= a, r.min_lon <= b, *lat)
+        else:
+            # OR di dalam satu scan R*Tree hanya memakai batas latitude; satu scan per rentang
+            stmt = stmt.where(t.id.in_(union_all(*[
+                select(r.id).where(r.max_lon >= a, r.min_lon <= b, *lat) for a, b in rentang
+            ])))
+    return stmt
+
+
+def jarak_km(lon1, lat1, lon2, lat2):
+    """
+    Jarak great-circle (haversine) dalam km.
+    """
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIUS_BUMI_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bbox_radius(lon, lat, radius_km):
+    """
+    Bounding box (min_lon, min_lat, max_lon, max_lat) yang memuat lingkaran radius_km.
+    Longitude bisa keluar dari +-180 di dekat antimeridian; query_bbox memecahnya.
+    """
+    dlat = radius_km / KM_PER_DERAJAT
+    cos_lat = math.cos(math.radians(lat))
+    dlon = 180.0 if cos_lat < 1e-6 else min(180.0, radius_km / (KM_PER_DERAJAT * cos_lat))
+    return lon - dlon, max(-90.0, lat - dlat), lon + dlon, min(90.0, lat + dlat)
+
+
+async def nearest(db: AsyncSession, lon: float, lat: float, k: int, filters=()):
+    """
+    k trafo terdekat dari titik (lon, lat), urut dari yang terdekat.
+    Cari di bbox yang membesar (lewat index) sampai k trafo dalam radius ditemukan,
+    sehingga tidak perlu menghitung jarak ke semua trafo.
+    Mengembalikan list (trafo, jarak_km).
+    """
+    dialect = db.bind.dialect
+    radius = RADIUS_AWAL_KM
+    while True:
+        if radius >= SETENGAH_KELILING_KM:
+            # Radius sudah mencakup seluruh bumi: ambil semua trafo yang lolos filter
+            stmt = select(models.Trafo).where(*filters)
+        else:
+            stmt = query_bbox(dialect, *bbox_radius(lon, lat, radius)).where(*filters)
+        kandidat = (await db.scalars(stmt)).all()
+        hasil = sorted(
+            ((t, jarak_km(lon, lat, t.longitude, t.latitude)) for t in kandidat),
+            key=lambda x: x[1],
+        )
+        # Hanya trafo dalam lingkaran radius yang pasti benar urutannya
+        dalam_radius = [x for x in hasil if x[1] <= radius]
+        if len(dalam_radius) >= k or radius >= SETENGAH_KELILING_KM:
+            return (dalam_radius if len(dalam_radius) >= k else hasil)[:k]
+        radius *= 4
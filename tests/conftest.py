@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+# Modul aplikasi ada di root repo (tanpa package)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+# Router membuat tabel saat di-import: arahkan ke database sementara, bukan ./sql_app.db
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/test.db")
+
+HEADER_CSV = "Datetime,Voltage R,Voltage S,Voltage T,Ampere R,Ampere S,Ampere T,Cosphi\n"
+
+
+def csv_bytes(*baris):
+    """
+    Isi file CSV upload dari baris data (tanpa header).
+    """
+    return (HEADER_CSV + "".join(b + "\n" for b in baris)).encode()
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    TestClient aplikasi lengkap (semua router dan middleware) di atas DATABASE_URL sementara.
+    Database dipakai bersama seluruh test: data tiap test dipisah lewat user dan group baru.
+    """
+    from fastapi.testclient import TestClient
+
+    import main
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def user(client):
+    """
+    Register dan login user baru; mengembalikan (id user, header Authorization).
+    """
+    username = f"user-{uuid.uuid4().hex[:8]}"
+    user_id = client.post("/register", json={"username": username, "password": "rahasia"}).json()["id"]
+    token = client.post("/login", json={"username": username, "password": "rahasia"}).json()["data"]["access_token"]
+    return user_id, {"Authorization": token}
+
+
+@pytest.fixture
+def headers(user):
+    return user[1]
+
+
+@pytest.fixture
+def buat_group():
+    """
+    Factory group trafo; nama default unik agar tidak bentrok antar test.
+    """
+    import models
+    from database import SessionLocal
+
+    def buat(name=None, kodegrup="KG"):
+        with SessionLocal() as db:
+            group = models.GroupTrafo(name=name or f"group-{uuid.uuid4().hex[:8]}", kodegrup=kodegrup)
+            db.add(group)
+            db.commit()
+            return group.id
+    return buat
+
+
+@pytest.fixture
+def buat_trafo(user):
+    """
+    Factory trafo milik user test; lewat ORM sehingga index spasial dan FTS ikut terisi.
+    """
+    import models
+    from database import SessionLocal
+
+    def buat(group_id, name="trafo", longitude=106.8, latitude=-6.2, **nilai):
+        data = dict(
+            type="x", brand="b", kapasitas=100, voltase=1, current=1,
+            voltase_per=1, current_per=1, phasa="3",
+        )
+        data.update(nilai)
+        with SessionLocal() as db:
+            trafo = models.Trafo(
+                group_id=group_id, name=name, longitude=longitude, latitude=latitude,
+                owner_id=user[0], **data,
+            )
+            db.add(trafo)
+            db.commit()
+            return trafo.id
+    return buat
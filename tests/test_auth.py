@@ -0,0 +1,27 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import auth
+import models
+from user_cache import user_cache
+
+
+def test_rename_menghapus_cache_username_lama(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'auth.db'}")
+    models.User.__table__.create(bind=engine)
+    with Session(engine) as db:
+        user = models.User(username="lama", password="x")
+        db.add(user)
+        db.commit()
+        user_cache.set("lama", object())
+        user.username = "baru"
+        db.commit()
+    assert user_cache.get("lama") is None
+    engine.dispose()
+
+
+def test_stats_cache_butuh_login():
+    dependant = [d.call for d in next(
+        r for r in auth.router.routes if r.path == "/user-cache/stats"
+    ).dependant.dependencies]
+    assert auth.get_current_user in dependant
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import bulk_insert
+import models
+import partisi
+
+
+@pytest.fixture(params=["tabel", "partisi"])
+def engine(request, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bulk_insert.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    if request.param == "partisi":
+        with engine.begin() as conn:
+            partisi.create(conn)
+    yield engine
+    engine.dispose()
+
+
+def baris(*waktu, total_kva=1.0):
+    nilai = {
+        "id_trafo": 1, "v_r": 220.0, "v_s": 220.0, "v_t": 220.0, "i_r": 1.0, "i_s": 1.0, "i_t": 1.0,
+        "cosphi": 0.9, "total_kva": total_kva, "tgl_upload": datetime(2025, 3, 1),
+    }
+    return [
+        tuple(w if nama == "waktu_kalkulasi" else nilai.get(nama) for nama in bulk_insert.KOLOM_INSERT)
+        for w in waktu
+    ]
+
+
+def test_jumlah_insert_tidak_menghitung_duplikat(engine):
+    with engine.begin() as conn:
+        assert bulk_insert.simpan_batch(conn, 1, baris(datetime(2025, 1, 1), datetime(2025, 2, 1))) == 2
+    with engine.begin() as conn:
+        # Satu baris sudah ada, satu baru (bulan lain)
+        assert bulk_insert.simpan_batch(conn, 1, baris(datetime(2025, 2, 1), datetime(2025, 3, 1))) == 1
+        assert bulk_insert.simpan_batch(conn, 1, baris(datetime(2025, 3, 1))) == 0
+        h = models.HasilKalkulasi.__table__
+        assert conn.execute(select(func.count()).select_from(h)).scalar() == 3
+        assert conn.execute(select(func.count(func.distinct(h.c.id)))).scalar() == 3
+
+
+def test_tabel_turunan_ikut_bacaan_baru(engine):
+    with engine.begin() as conn:
+        bulk_insert.simpan_batch(conn, 1, baris(datetime(2025, 1, 1, 10), total_kva=1.0))
+        bulk_insert.simpan_batch(conn, 1, baris(datetime(2025, 1, 1, 10), datetime(2025, 1, 1, 11), total_kva=5.0))
+        latest = conn.execute(select(models.TrafoLatest.__table__)).one()
+        assert latest.waktu_kalkulasi == datetime(2025, 1, 1, 11)
+        assert latest.total_kva == 5.0
+        r = models.HasilKalkulasiRollup.__table__
+        harian = conn.execute(select(r).where(r.c.bucket == "day")).one()
+        assert harian.jumlah == 2
+        assert harian.max_total_kva == 5.0
@@ -0,0 +1,92 @@
+import csv
+import io
+from datetime import datetime
+
+import pytest
+
+import columnar
+from conftest import csv_bytes
+from hasil_kalkulasi import KOLOM_EXPORT
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+BARIS = [
+    "2025-01-01 00:00:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:15:00,220,221,222,20,21,22,0.8",
+    "2025-01-01 00:30:00,210,211,212,30,31,32,0.7",
+]
+
+
+@pytest.fixture
+def group(client, headers, buat_group, buat_trafo):
+    """
+    Group dengan dua trafo: trafo pertama 3 bacaan, trafo kedua 1 bacaan.
+    Mengembalikan (group_id, id trafo pertama, id trafo kedua).
+    """
+    group_id = buat_group()
+    t1, t2 = buat_trafo(group_id, name="t1"), buat_trafo(group_id, name="t2")
+    for trafo_id, baris in ((t1, BARIS), (t2, BARIS[:1])):
+        r = client.post(
+            f"/kalkulasi/upload-csv?id_trafo={trafo_id}&kapasitas=100",
+            headers=headers, files={"file": ("data.csv", csv_bytes(*baris))},
+        )
+        assert r.status_code == 200, r.text
+    return group_id, t1, t2
+
+
+def baca(fmt, content):
+    if fmt == "parquet":
+        return pq.read_table(io.BytesIO(content))
+    return pa.ipc.open_stream(io.BytesIO(content)).read_all()
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_round_trip(client, group, fmt):
+    _, t1, _ = group
+    r = client.get(f"/kalkulasi/export/{fmt}?trafoId={t1}")
+    assert r.status_code == 200
+    assert r.headers["content-type"] == columnar.FORMAT[fmt][0]
+    assert r.headers["content-disposition"].endswith("." + columnar.FORMAT[fmt][1])
+
+    tabel = baca(fmt, r.content)
+    assert tabel.schema == columnar.schema()
+    data = tabel.to_pydict()
+    assert data["id_trafo"] == [t1] * 3
+    # Urut terbaru lebih dulu, sama dengan index (id_trafo, waktu_kalkulasi DESC)
+    assert data["waktu_kalkulasi"] == [datetime(2025, 1, 1, 0, m) for m in (30, 15, 0)]
+    assert data["v_r"] == [210.0, 220.0, 228.0]
+    assert data["cosphi"] == [0.7, 0.8, 0.9]
+
+    # Nilai hasil kalkulasi sama persis dengan export CSV (urutan baris juga sama)
+    baris_csv = list(csv.reader(io.StringIO(client.get(f"/kalkulasi/export-csv/{t1}").text)))[1:]
+    assert len(baris_csv) == 3
+    for i, baris in enumerate(baris_csv):
+        nilai = dict(zip(KOLOM_EXPORT, baris[1:]))
+        assert [float(nilai[k]) for k in columnar.KOLOM_NILAI] == [data[k][i] for k in columnar.KOLOM_NILAI]
+
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_export_group_dan_rentang_waktu(client, group, fmt):
+    group_id, t1, t2 = group
+    tabel = baca(fmt, client.get(f"/kalkulasi/export/{fmt}?groupId={group_id}").content)
+    assert tabel.column("id_trafo").to_pylist() == [t1, t1, t1, t2]
+
+    r = client.get(f"/kalkulasi/export/{fmt}?groupId={group_id}&from=2025-01-01T00:10:00&to=2025-01-01T00:20:00")
+    tabel = baca(fmt, r.content)
+    assert tabel.column("id_trafo").to_pylist() == [t1]
+    assert tabel.column("waktu_kalkulasi").to_pylist() == [datetime(2025, 1, 1, 0, 15)]
+
+
+def test_export_kosong_tetap_punya_schema(client, group):
+    _, t1, _ = group
+    tabel = baca("parquet", client.get(f"/kalkulasi/export/parquet?trafoId={t1}&from=2030-01-01T00:00:00").content)
+    assert tabel.num_rows == 0
+    assert tabel.schema == columnar.schema()
+
+
+def test_export_parameter_tidak_valid(client):
+    assert client.get("/kalkulasi/export/parquet").status_code == 400
+    assert client.get("/kalkulasi/export/parquet?trafoId=1&groupId=1").status_code == 400
+    assert client.get("/kalkulasi/export/parquet?trafoId=999999").status_code == 404
+    assert client.get("/kalkulasi/export/csv?trafoId=1").status_code == 422
@@ -0,0 +1,118 @@
+import gzip
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+import compression
+from compression import CompressionMiddleware, buka_upload
+from conftest import csv_bytes
+
+BARIS = [
+    "2025-01-01 00:00:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:15:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:30:00,228,229,230,10,11,12,0.9",
+]
+BESAR = "x" * (compression.RESPONSE_COMPRESS_MIN_SIZE * 4)
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware)
+
+
+@app.get("/besar")
+def besar():
+    return PlainTextResponse(BESAR)
+
+
+@app.get("/kecil")
+def kecil():
+    return PlainTextResponse("ok")
+
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse((BESAR for _ in range(3)), media_type="text/csv")
+
+
+@app.get("/parquet")
+def parquet():
+    return Response(BESAR.encode(), media_type="application/vnd.apache.parquet")
+
+
+mini = TestClient(app)
+
+
+def zstd_bytes(data):
+    zstandard = pytest.importorskip("zstandard")
+    return zstandard.ZstdCompressor().compress(data)
+
+
+@pytest.fixture
+def trafo_id(buat_group, buat_trafo):
+    return buat_trafo(buat_group())
+
+
+def upload(client, headers, trafo_id, isi):
+    return client.post(
+        f"/kalkulasi/upload-csv?id_trafo={trafo_id}&kapasitas=100",
+        headers=headers, files={"file": ("data.csv", isi)},
+    )
+
+
+@pytest.mark.parametrize("kompres", [lambda b: b, gzip.compress, zstd_bytes], ids=["plain", "gzip", "zstd"])
+def test_buka_upload_dari_magic_bytes(kompres):
+    isi = csv_bytes(*BARIS)
+    assert buka_upload(io.BytesIO(kompres(isi))).read() == isi
+
+
+def test_upload_gzip_dan_zstd(client, headers, trafo_id):
+    r = upload(client, headers, trafo_id, gzip.compress(csv_bytes(*BARIS[:2])))
+    assert r.status_code == 200, r.text
+    assert r.json()["data"]["rowsInserted"] == 2
+
+    # Baris 00:15 sudah ada dari upload gzip, tidak disimpan dua kali
+    r = upload(client, headers, trafo_id, zstd_bytes(csv_bytes(*BARIS[1:])))
+    assert r.status_code == 200, r.text
+    assert (r.json()["data"]["rows"], r.json()["data"]["rowsInserted"]) == (2, 1)
+
+
+def test_upload_gzip_rusak_ditolak(client, headers, trafo_id):
+    isi = gzip.compress(csv_bytes(*BARIS))
+    r = upload(client, headers, trafo_id, isi[:len(isi) // 2])
+    assert r.status_code == 400
+    assert r.json()["message"] == "File terkompresi rusak."
+
+
+def test_respons_gzip():
+    r = mini.get("/besar", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text == BESAR
+
+
+def test_respons_zstd_diutamakan():
+    pytest.importorskip("zstandard")
+    r = mini.get("/besar", headers={"Accept-Encoding": "gzip, zstd"})
+    assert r.headers["content-encoding"] == "zstd"
+    assert r.text == BESAR
+
+
+def test_respons_streaming_dikompres():
+    pytest.importorskip("zstandard")
+    for encoding in ("gzip", "zstd"):
+        r = mini.get("/stream", headers={"Accept-Encoding": encoding})
+        assert r.headers["content-encoding"] == encoding
+        assert r.text == BESAR * 3
+
+
+@pytest.mark.parametrize("path", ["/kecil", "/parquet"])
+def test_respons_tidak_dikompres(path):
+    r = mini.get(path, headers={"Accept-Encoding": "gzip, zstd"})
+    assert "content-encoding" not in r.headers
+
+
+def test_tanpa_accept_encoding():
+    r = mini.get("/besar", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.text == BESAR
@@ -0,0 +1,119 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+import models
+from conftest import csv_bytes
+from database import SessionLocal
+from response import http_date
+
+DULU = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def trafo(client, headers, buat_group, buat_trafo):
+    """
+    (trafo_id, group_id) dengan satu bacaan. updated_at trafo/group dimundurkan ke DULU,
+    sehingga perubahan di test pasti menghasilkan Last-Modified yang lebih baru (resolusi detik).
+    """
+    group_id = buat_group()
+    trafo_id = buat_trafo(group_id)
+    upload(client, headers, trafo_id, "2025-01-01 00:00:00,228,229,230,10,11,12,0.9")
+    with SessionLocal() as db:
+        db.execute(update(models.Trafo).where(models.Trafo.id == trafo_id).values(updated_at=DULU))
+        db.execute(update(models.GroupTrafo).where(models.GroupTrafo.id == group_id).values(updated_at=DULU))
+        db.execute(update(models.TrafoLatest).where(models.TrafoLatest.id_trafo == trafo_id).values(tgl_upload=DULU))
+        db.commit()
+    return trafo_id, group_id
+
+
+def upload(client, headers, trafo_id, *baris):
+    r = client.post(
+        f"/kalkulasi/upload-csv?id_trafo={trafo_id}&kapasitas=100",
+        headers=headers, files={"file": ("data.csv", csv_bytes(*baris))},
+    )
+    assert r.status_code == 200, r.text
+
+
+def url_detail(trafo_id):
+    return f"/trafo/find-one/{trafo_id}"
+
+
+def url_latest(trafo_id):
+    return f"/trafo/{trafo_id}/hasil-kalkulasi"
+
+
+def validator(client, headers, url):
+    r = client.get(url, headers=headers)
+    assert r.status_code == 200, r.text
+    return r.headers["etag"], r.headers["last-modified"]
+
+
+def status(client, headers, url, **kondisi):
+    return client.get(url, headers={**headers, **kondisi}).status_code
+
+
+@pytest.mark.parametrize("url", [url_detail, url_latest])
+def test_304_etag_dan_if_modified_since(client, headers, trafo, url):
+    url = url(trafo[0])
+    etag, last_modified = validator(client, headers, url)
+    assert last_modified == http_date(DULU)
+
+    r = client.get(url, headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["etag"] == etag
+    assert r.content == b""
+    assert status(client, headers, url, **{"If-None-Match": f'W/{etag}, "lain"'}) == 304
+    assert status(client, headers, url, **{"If-None-Match": '"lain"'}) == 200
+
+    assert status(client, headers, url, **{"If-Modified-Since": last_modified}) == 304
+    assert status(client, headers, url, **{"If-Modified-Since": http_date(datetime(2019, 12, 31))}) == 200
+    assert status(client, headers, url, **{"If-Modified-Since": "bukan tanggal"}) == 200
+
+
+@pytest.mark.parametrize("url", [url_detail, url_latest])
+def test_if_none_match_lebih_diutamakan(client, headers, trafo, url):
+    url = url(trafo[0])
+    _, last_modified = validator(client, headers, url)
+    # ETag tidak cocok: 200 walau If-Modified-Since masih valid
+    assert status(client, headers, url, **{"If-None-Match": '"lain"', "If-Modified-Since": last_modified}) == 200
+
+
+@pytest.mark.parametrize("url", [url_detail, url_latest])
+def test_update_trafo_membatalkan_304(client, headers, trafo, url):
+    trafo_id, group_id = trafo
+    url = url(trafo_id)
+    etag, last_modified = validator(client, headers, url)
+
+    data = dict(
+        group_id=group_id, name="baru", type="x", brand="b", kapasitas=100, voltase=1, current=1,
+        voltase_per=1, current_per=1, phasa="3", longitude=106.8, latitude=-6.2,
+    )
+    assert client.post(f"/trafo/update/{trafo_id}", headers=headers, json=data).status_code == 200
+
+    assert status(client, headers, url, **{"If-None-Match": etag}) == 200
+    assert status(client, headers, url, **{"If-Modified-Since": last_modified}) == 200
+
+
+@pytest.mark.parametrize("url", [url_detail, url_latest])
+def test_rename_group_membatalkan_304(client, headers, trafo, url):
+    trafo_id, group_id = trafo
+    url = url(trafo_id)
+    etag, last_modified = validator(client, headers, url)
+
+    r = client.post(f"/group-trafo/update/{group_id}", json={"name": "group baru", "kodegrup": "KG"})
+    assert r.status_code == 200
+
+    assert status(client, headers, url, **{"If-None-Match": etag}) == 200
+    assert status(client, headers, url, **{"If-Modified-Since": last_modified}) == 200
+
+
+def test_bacaan_baru_membatalkan_304(client, headers, trafo):
+    url = url_latest(trafo[0])
+    etag, last_modified = validator(client, headers, url)
+
+    upload(client, headers, trafo[0], "2025-01-01 00:15:00,228,229,230,10,11,12,0.9")
+
+    assert status(client, headers, url, **{"If-None-Match": etag}) == 200
+    assert status(client, headers, url, **{"If-Modified-Since": last_modified}) == 200
@@ -0,0 +1,58 @@
+import io
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+import models
+from ingest import ingest_csv
+
+HEADER = "Datetime,Voltage R,Voltage S,Voltage T,Ampere R,Ampere S,Ampere T,Cosphi\n"
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ingest.db'}")
+    models.Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def csv_file(*baris):
+    return io.BytesIO((HEADER + "".join(b + "\n" for b in baris)).encode())
+
+
+def test_error_di_tengah_file_menyebut_baris_tersimpan(db):
+    f = csv_file(
+        "2025-01-01 00:00:00,228,229,230,10,11,12,0.9",
+        "2025-01-01 00:15:00,228,229,230,10,11,12,0.9",
+        "2025-13-01 00:30:00,228,229,230,10,11,12,0.9",
+    )
+    with pytest.raises(HTTPException) as e:
+        ingest_csv(db, f, 1, 100, datetime(2025, 1, 2), batch_size=2)
+    assert e.value.status_code == 400
+    assert "pada baris 4" in e.value.detail
+    assert "2 baris pertama sudah tersimpan" in e.value.detail
+    assert db.scalar(select(func.count()).select_from(models.HasilKalkulasi)) == 2
+
+
+def test_error_di_batch_pertama_tanpa_baris_tersimpan(db):
+    f = csv_file("2025-13-01 00:00:00,228,229,230,10,11,12,0.9")
+    with pytest.raises(HTTPException) as e:
+        ingest_csv(db, f, 1, 100, datetime(2025, 1, 2))
+    assert "tersimpan" not in e.value.detail
+
+
+def test_gagal_simpan_menyebut_baris_tersimpan(db):
+    # 'abc' dibaca None (sama seperti sebelumnya), lalu ditolak NOT NULL saat insert
+    f = csv_file(
+        "2025-01-01 00:00:00,228,229,230,10,11,12,0.9",
+        "2025-01-01 00:15:00,abc,229,230,10,11,12,0.9",
+    )
+    with pytest.raises(HTTPException) as e:
+        ingest_csv(db, f, 1, 100, datetime(2025, 1, 2), batch_size=1)
+    assert e.value.status_code == 500
+    assert "1 baris pertama sudah tersimpan" in e.value.detail
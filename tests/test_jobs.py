@@ -0,0 +1,160 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+import jobs
+import models
+from conftest import csv_bytes
+from database import SessionLocal
+
+BARIS = [
+    "2025-01-01 00:00:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:15:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:30:00,228,229,230,10,11,12,0.9",
+    "2025-01-01 00:45:00,228,229,230,10,11,12,0.9",
+]
+
+
+@pytest.fixture
+def antrian(monkeypatch, tmp_path):
+    """
+    Tahan job di antrian (tidak dijalankan thread pool) dan simpan upload di tmp_path.
+    Test menjalankan jobs.run_job sendiri agar urutan klaim/cancel deterministik.
+    """
+    daftar = []
+    monkeypatch.setattr(jobs.executor, "submit", lambda fn, *args: daftar.append(args[0]))
+    monkeypatch.setattr(jobs, "UPLOAD_DIR", str(tmp_path))
+    return daftar
+
+
+@pytest.fixture
+def trafo_id(buat_group, buat_trafo):
+    return buat_trafo(buat_group())
+
+
+def upload_job(client, headers, trafo_id, *baris):
+    r = client.post(
+        f"/kalkulasi/jobs/upload-csv?id_trafo={trafo_id}&kapasitas=100",
+        headers=headers, files={"file": ("data.csv", csv_bytes(*baris))},
+    )
+    assert r.status_code == 202, r.text
+    return r.json()["data"]["job_id"]
+
+
+def ambil_job(job_id):
+    with SessionLocal() as db:
+        return db.get(models.IngestJob, job_id)
+
+
+def jumlah_bacaan(trafo_id):
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(models.HasilKalkulasi).where(models.HasilKalkulasi.id_trafo == trafo_id))
+
+
+def test_job_selesai_dan_bisa_dipantau(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    assert antrian == [job_id]
+    assert client.get(f"/kalkulasi/jobs/{job_id}", headers=headers).json()["data"]["status"] == jobs.STATUS_PENDING
+
+    jobs.run_job(job_id)
+
+    data = client.get(f"/kalkulasi/jobs/{job_id}", headers=headers).json()["data"]
+    assert data["status"] == jobs.STATUS_DONE
+    assert (data["rows_parsed"], data["rows_inserted"]) == (4, 4)
+    assert jumlah_bacaan(trafo_id) == 4
+    assert not os.path.exists(ambil_job(job_id).path)
+
+
+def test_klaim_atomik(antrian, client, headers, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    with SessionLocal() as db:
+        assert jobs._klaim(db, job_id)
+        # Job running dengan heartbeat baru milik worker lain
+        assert not jobs._klaim(db, job_id)
+
+        # Heartbeat basi: worker pemiliknya dianggap mati, job boleh diambil alih
+        job = db.get(models.IngestJob, job_id)
+        job.heartbeat_at = datetime.now() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 1)
+        db.commit()
+        assert jobs._klaim(db, job_id)
+        assert not jobs._klaim(db, job_id)
+
+
+def test_cancel_sebelum_diproses(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+
+    r = client.post(f"/kalkulasi/jobs/{job_id}/cancel", headers=headers)
+    assert r.status_code == 200
+
+    jobs.run_job(job_id)
+
+    job = ambil_job(job_id)
+    assert job.status == jobs.STATUS_CANCELLED
+    assert job.finished_at is not None
+    assert jumlah_bacaan(trafo_id) == 0
+    assert not os.path.exists(job.path)
+
+    r = client.post(f"/kalkulasi/jobs/{job_id}/cancel", headers=headers)
+    assert r.status_code == 400
+    assert "cancelled" in r.json()["message"]
+
+
+def test_finish_tidak_menimpa_cancelled(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    with SessionLocal() as db:
+        assert jobs._klaim(db, job_id)
+        # Cancel masuk saat worker sedang menyelesaikan job
+        assert client.post(f"/kalkulasi/jobs/{job_id}/cancel", headers=headers).status_code == 200
+
+        job = db.get(models.IngestJob, job_id)
+        assert jobs._finish(db, job, jobs.STATUS_DONE, rows_parsed=4, rows_inserted=4) == jobs.STATUS_CANCELLED
+
+    job = ambil_job(job_id)
+    assert job.status == jobs.STATUS_CANCELLED
+    assert job.finished_at is not None
+
+
+def test_cancel_job_selesai_ditolak(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    jobs.run_job(job_id)
+
+    r = client.post(f"/kalkulasi/jobs/{job_id}/cancel", headers=headers)
+    assert r.status_code == 400
+    assert ambil_job(job_id).status == jobs.STATUS_DONE
+
+
+def test_resume_melanjutkan_dari_rows_parsed(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    # Worker mati setelah 2 baris pertama tersimpan: running, heartbeat basi
+    with SessionLocal() as db:
+        job = db.get(models.IngestJob, job_id)
+        job.status = jobs.STATUS_RUNNING
+        job.started_at = datetime.now()
+        job.heartbeat_at = datetime.now() - timedelta(seconds=jobs.JOB_STALE_SECONDS + 1)
+        job.rows_parsed = 2
+        job.rows_inserted = 2
+        db.commit()
+    antrian.clear()
+
+    jobs.resume_jobs()
+    assert job_id in antrian
+
+    jobs.run_job(job_id)
+
+    job = ambil_job(job_id)
+    assert job.status == jobs.STATUS_DONE
+    assert (job.rows_parsed, job.rows_inserted) == (4, 4)
+    # Hanya 2 baris terakhir yang diproses ulang
+    assert jumlah_bacaan(trafo_id) == 2
+
+
+def test_resume_tidak_mengambil_job_yang_masih_hidup(client, headers, antrian, trafo_id):
+    job_id = upload_job(client, headers, trafo_id, *BARIS)
+    with SessionLocal() as db:
+        assert jobs._klaim(db, job_id)
+    antrian.clear()
+
+    jobs.resume_jobs()
+    assert job_id not in antrian
@@ -0,0 +1,121 @@
+"""
+Parity engine vektor (kalkulasi.hitung_batch) dengan kalkulasi per baris lama
+(_to_float_or_none + strptime + math.sqrt) di endpoint upload sebelumnya.
+"""
+import math
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+import kalkulasi
+from kalkulasi import _to_float_or_none
+
+KAPASITAS = 100
+
+
+def baris(waktu="2025-01-01 00:00:00", v=("228", "229", "230"), i=("10", "11", "12"), cosphi="0.9"):
+    return {
+        "Datetime": waktu,
+        "Voltage R": v[0], "Voltage S": v[1], "Voltage T": v[2],
+        "Ampere R": i[0], "Ampere S": i[1], "Ampere T": i[2],
+        "Cosphi": cosphi,
+    }
+
+
+def hitung_lama(row, kapasitas):
+    """
+    Salinan jalur per baris lama (semua input terisi).
+    """
+    waktu = datetime.strptime(row["Datetime"], "%Y-%m-%d %H:%M:%S") if row.get("Datetime") else None
+    v = [_to_float_or_none(row.get(f"Voltage {f}"), is_voltage=True) for f in "RST"]
+    i = [_to_float_or_none(row.get(f"Ampere {f}")) for f in "RST"]
+    cosphi = _to_float_or_none(row.get("Cosphi"))
+    kv = [a * b / 1000 for a, b in zip(v, i)]
+    kw = [x * cosphi for x in kv]
+    sin_phi = math.sqrt(1 - cosphi**2)
+    kvar = [x * sin_phi for x in kv]
+    hasil = dict(zip(("v_r", "v_s", "v_t"), v))
+    hasil.update(zip(("i_r", "i_s", "i_t"), i))
+    hasil.update(zip(("kv_r", "kv_s", "kv_t"), kv))
+    hasil.update(zip(("kw_r", "kw_s", "kw_t"), kw))
+    hasil.update(zip(("kvar_r", "kvar_s", "kvar_t"), kvar))
+    hasil.update(
+        cosphi=cosphi, waktu_kalkulasi=waktu,
+        total_kva=sum(kv), total_kw=sum(kw), total_kvar=sum(kvar), sisa_kap=kapasitas - sum(kv),
+    )
+    return hasil
+
+
+ROWS = [
+    baris(),
+    baris(v=("228:01:00", "229:30", "230"), cosphi="0,85"),
+    baris(waktu="2025-1-2 3:04:05", v=("228,5", "229", "230"), i=("0", "1,5", "2")),
+    baris(cosphi="1"),
+    baris(cosphi="-0.5"),
+    baris(cosphi="0"),
+]
+
+
+def test_hitung_batch_sama_dengan_kalkulasi_lama():
+    kolom = kalkulasi.hitung_batch(ROWS, KAPASITAS)
+    for idx, row in enumerate(ROWS):
+        lama = hitung_lama(row, KAPASITAS)
+        for nama, nilai in lama.items():
+            baru = kalkulasi.ke_list(kolom[nama])[idx]
+            if isinstance(nilai, float):
+                assert baru == pytest.approx(nilai, rel=1e-12, abs=1e-12), (idx, nama)
+            else:
+                assert baru == nilai, (idx, nama)
+
+
+@pytest.mark.parametrize("nilai", [None, "", "abc", "1.2.3", "nan?"])
+def test_nilai_kosong_atau_bukan_angka_jadi_null(nilai):
+    assert _to_float_or_none(nilai) is None
+    assert kalkulasi.ke_list(kalkulasi.parse_kolom(["1", nilai]))[1] is None
+    assert kalkulasi.ke_list(kalkulasi.parse_kolom(["1", nilai], is_voltage=True))[1] is None
+
+
+@pytest.mark.parametrize("nilai, hasil", [("228:01:00", 228.01), ("228:01", 228.01), ("228", 228.0), ("228,5", 228.5)])
+def test_format_voltase(nilai, hasil):
+    assert _to_float_or_none(nilai, is_voltage=True) == hasil
+    assert kalkulasi.parse_kolom([nilai], is_voltage=True)[0] == hasil
+
+
+def test_input_kosong_menghasilkan_null():
+    # Jalur lama gagal (TypeError) untuk baris ini; sekarang kolom turunannya NULL
+    # dan baris ditolak NOT NULL saat insert
+    kolom = kalkulasi.hitung_batch([baris(v=("", "229", "230"))], KAPASITAS)
+    assert kalkulasi.ke_list(kolom["v_r"]) == [None]
+    assert kalkulasi.ke_list(kolom["kv_r"]) == [None]
+    assert kalkulasi.ke_list(kolom["total_kva"]) == [None]
+    assert kalkulasi.ke_list(kolom["kv_s"])[0] == pytest.approx(229 * 11 / 1000)
+
+
+@pytest.mark.parametrize("waktu", [
+    "2025-01-01T12:00:00",
+    "2025-13-01 00:00:00",
+    "2025-01-01 12:00",
+    "01/01/2025 12:00:00",
+    "2025-01-01 12:00:00+07",
+])
+def test_waktu_ditolak_seperti_strptime(waktu):
+    with pytest.raises(ValueError):
+        datetime.strptime(waktu, kalkulasi.FORMAT_WAKTU)
+    with pytest.raises(kalkulasi.DataTidakValid) as e:
+        kalkulasi.hitung_batch([baris(), baris(waktu=waktu)], KAPASITAS)
+    assert e.value.baris == 1
+
+
+def test_waktu_kosong_jadi_null():
+    kolom = kalkulasi.hitung_batch([baris(waktu=""), baris()], KAPASITAS)
+    assert kalkulasi.ke_list(kolom["waktu_kalkulasi"]) == [None, datetime(2025, 1, 1)]
+
+
+def test_cosphi_di_luar_rentang_ditolak():
+    with pytest.raises(ValueError):
+        hitung_lama(baris(cosphi="1.5"), KAPASITAS)
+    with pytest.raises(kalkulasi.DataTidakValid) as e:
+        kalkulasi.hitung_batch([baris(), baris(cosphi="1.5")], KAPASITAS)
+    assert e.value.baris == 1
+    assert np.isnan(kalkulasi.parse_kolom([""])[0])
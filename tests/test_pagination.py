@@ -0,0 +1,69 @@
+import pytest
+
+from pagination import encode_cursor
+
+# Nama sengaja kembar agar halaman terpotong di tengah nama yang sama
+NAMA = ["beta", "alpha", "beta", "alpha", "beta", "gamma", "alpha"]
+
+
+@pytest.fixture
+def trafos(buat_group, buat_trafo):
+    """
+    (group_id, list (name, id) urut sesuai keyset (name, id)).
+    """
+    group_id = buat_group()
+    return group_id, sorted((nama, buat_trafo(group_id, name=nama)) for nama in NAMA)
+
+
+def semua_halaman(client, url, params, headers=None, size=2):
+    """
+    Ikuti nextCursor dari halaman pertama (cursor kosong) sampai habis.
+    """
+    halaman = []
+    cursor = ""
+    while cursor is not None:
+        r = client.get(url, params={**params, "cursor": cursor, "size": size}, headers=headers)
+        assert r.status_code == 200, r.text
+        body = r.json()
+        halaman.append([(t["name"], t["id"]) for t in body["data"]])
+        cursor = body["pagination"]["nextCursor"]
+    return halaman
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 10])
+def test_cursor_melewati_nama_kembar(client, headers, trafos, size):
+    group_id, harapan = trafos
+    halaman = semua_halaman(client, "/trafo/find-all", {"groupId": group_id}, headers, size=size)
+    assert [baris for h in halaman for baris in h] == harapan
+    assert all(len(h) == size for h in halaman[:-1])
+    # nextCursor kosong di halaman terakhir, tanpa halaman kosong tambahan
+    assert halaman[-1]
+
+
+def test_cursor_dengan_pencarian(client, headers, trafos):
+    group_id, harapan = trafos
+    halaman = semua_halaman(client, "/trafo/find-all", {"groupId": group_id, "q": "alpha"}, headers)
+    assert [baris for h in halaman for baris in h] == [b for b in harapan if b[0] == "alpha"]
+
+
+def test_cursor_group_trafo(client, buat_group):
+    # group_trafo tidak per user: pakai prefix unik dan cari lewat q
+    prefix = f"kursor{buat_group()}"
+    ids = sorted((f"{prefix} {n}", buat_group(name=f"{prefix} {n}")) for n in ["b", "a", "b", "a", "c"])
+    halaman = semua_halaman(client, "/group-trafo/find-all", {"q": prefix})
+    assert [baris for h in halaman for baris in h] == ids
+
+
+def test_tanpa_total(client, headers, trafos):
+    group_id, _ = trafos
+    r = client.get("/trafo/find-all", params={"groupId": group_id, "cursor": "", "withTotal": False}, headers=headers)
+    pagination = r.json()["pagination"]
+    assert pagination["totalRecords"] is None
+    assert pagination["nextCursor"] is None
+
+
+@pytest.mark.parametrize("cursor", ["bukan-base64!!", encode_cursor(["alpha"]), encode_cursor([])])
+def test_cursor_tidak_valid(client, headers, trafos, cursor):
+    group_id, _ = trafos
+    r = client.get("/trafo/find-all", params={"groupId": group_id, "cursor": cursor}, headers=headers)
+    assert r.status_code == 400
@@ -0,0 +1,84 @@
+"""
+Cek regresi query plan: pastikan query hasil_kalkulasi per trafo dilayani index
+(id_trafo, waktu_kalkulasi DESC) dan tidak melakukan sort seluruh histori trafo.
+
+Default memakai database SQLite sementara (tabel biasa dan layout partisi).
+Untuk database lain (misal PostgreSQL yang sudah dimigrasi):
+    TEST_DATABASE_URL=postgresql://... python -m pytest tests/test_query_plan.py
+"""
+import os
+import re
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+import partisi
+import trafo_latest
+
+# Nama index dari models.py / partisi SQLite (ix_<partisi>_trafo_waktu) / partisi PostgreSQL
+INDEX_TRAFO_WAKTU = re.compile(r"ix_hasil_kalkulasi\w*_trafo_waktu|id_trafo_waktu_kalkulasi")
+# Full scan dan sort tambahan pada output EXPLAIN SQLite / PostgreSQL
+FULL_SCAN = ("SCAN hasil_kalkulasi", "Seq Scan")
+SORT = ("TEMP B-TREE FOR ORDER BY", "Sort")
+
+# Query yang dipakai endpoint dan wajib memakai index (trafo_id contoh: 1)
+QUERY_TERINDEX = {
+    "trafo_latest.refresh": lambda: trafo_latest.query_terbaru(1),
+    "export_csv_by_id_trafo": lambda: trafo_latest.query_hasil_kalkulasi_terbaru(1).limit(10),
+}
+
+
+def explain(db: Session, query):
+    """
+    Baris query plan (list string) untuk ORM query atau Core select pada dialect aktif.
+    """
+    bind = db.get_bind()
+    statement = getattr(query, "statement", query)
+    sql = str(statement.compile(dialect=bind.dialect, compile_kwargs={"literal_binds": True}))
+    if bind.dialect.name == "sqlite":
+        return [row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    if bind.dialect.name == "postgresql":
+        # Tabel kecil membuat planner memilih seq scan; paksa agar index terlihat
+        db.connection().exec_driver_sql("SET LOCAL enable_seqscan = off")
+        return [row[0] for row in db.connection().exec_driver_sql(f"EXPLAIN {sql}")]
+    pytest.skip(f"Dialect {bind.dialect.name} belum didukung")
+
+
+def cek_index(db: Session, query):
+    """
+    AssertionError jika query tidak memakai index (id_trafo, waktu_kalkulasi) atau butuh sort tambahan.
+    """
+    plan = explain(db, query)
+    teks = "\n".join(plan)
+    assert INDEX_TRAFO_WAKTU.search(teks), f"Index (id_trafo, waktu_kalkulasi) tidak dipakai:\n{teks}"
+    assert not any(s in baris for baris in plan for s in FULL_SCAN), f"Query melakukan full scan:\n{teks}"
+    assert not any(s in baris for baris in plan for s in SORT), f"Query butuh sort tambahan:\n{teks}"
+    return plan
+
+
+@pytest.fixture(params=["tabel", "partisi"])
+def db(request, tmp_path):
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        if request.param == "partisi":
+            pytest.skip("TEST_DATABASE_URL: layout mengikuti database yang ada")
+        engine = create_engine(url)
+    else:
+        engine = create_engine(f"sqlite:///{tmp_path / 'query_plan.db'}")
+        models.Base.metadata.create_all(bind=engine)
+        if request.param == "partisi":
+            with engine.begin() as conn:
+                partisi.create(conn)
+                partisi.siapkan(conn, datetime(2025, 1, 1), datetime(2025, 2, 1))
+    with Session(engine) as session:
+        yield session
+        session.rollback()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("nama", list(QUERY_TERINDEX))
+def test_query_pakai_index(db, nama):
+    cek_index(db, QUERY_TERINDEX[nama]())
@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+import models
+import search
+
+
+@pytest.fixture
+def group_id(buat_group, buat_trafo):
+    group_id = buat_group()
+    buat_trafo(group_id, name="Gardu Cempaka", brand="Schneider", type="GT-100")
+    buat_trafo(group_id, name="Cempaka Putih", brand="Trafindo", type="XB")
+    buat_trafo(group_id, name="Melati", brand="Unindo", type="GT-250")
+    return group_id
+
+
+def cari(client, headers, group_id, q):
+    r = client.get("/trafo/find-all", params={"groupId": group_id, "q": q, "size": 50}, headers=headers)
+    assert r.status_code == 200, r.text
+    return [t["name"] for t in r.json()["data"]]
+
+
+def sql(dialect, q):
+    stmt, _ = search.cari(dialect, select(models.Trafo), models.Trafo, q)
+    return str(stmt.compile(dialect=dialect))
+
+
+def test_fts_substring_dan_prefix_dulu(client, headers, group_id):
+    # Prefix nama lebih dulu, lalu relevansi
+    assert cari(client, headers, group_id, "cempaka") == ["Cempaka Putih", "Gardu Cempaka"]
+    # Substring di tengah kata, di kolom brand
+    assert cari(client, headers, group_id, "chnei") == ["Gardu Cempaka"]
+    # Semua kata wajib cocok, boleh di kolom berbeda
+    assert cari(client, headers, group_id, "cempaka trafindo") == ["Cempaka Putih"]
+
+
+def test_kata_pendek_memakai_like(client, headers, group_id):
+    # < 3 karakter tidak punya trigram: fallback LIKE, hasil tetap benar
+    assert cari(client, headers, group_id, "GT") == ["Gardu Cempaka", "Melati"]
+    assert cari(client, headers, group_id, "XB") == ["Cempaka Putih"]
+    # Campuran kata pendek dan panjang juga lewat LIKE
+    assert cari(client, headers, group_id, "GT mel") == ["Melati"]
+
+
+def test_tanpa_hasil_dan_karakter_khusus(client, headers, group_id):
+    assert cari(client, headers, group_id, "tidakada") == []
+    assert cari(client, headers, group_id, '"%_') == []
+
+
+def test_totalrecords_ikut_filter(client, headers, group_id):
+    r = client.get("/trafo/find-all", params={"groupId": group_id, "q": "cempaka"}, headers=headers)
+    assert r.json()["pagination"]["totalRecords"] == 2
+
+
+def test_group_trafo_dicari_lewat_fts(client, buat_group):
+    buat_group(name="Wilayah Bekasi Timur", kodegrup="BKT-01")
+    r = client.get("/group-trafo/find-all", params={"q": "bekasi tim", "size": 50})
+    assert [g["name"] for g in r.json()["data"]] == ["Wilayah Bekasi Timur"]
+    r = client.get("/group-trafo/find-all", params={"q": "BKT-01", "size": 50})
+    assert [g["kodegrup"] for g in r.json()["data"]] == ["BKT-01"]
+
+
+def test_pilihan_index_per_dialect():
+    # SQLite: FTS5 MATCH untuk kata >= 3 karakter, LIKE untuk kata pendek
+    assert "MATCH" in sql(sqlite.dialect(), "cempaka")
+    assert "MATCH" not in sql(sqlite.dialect(), "GT") and "LIKE" in sql(sqlite.dialect(), "GT")
+    # PostgreSQL: ILIKE yang dilayani index GIN pg_trgm
+    assert "ILIKE" in sql(postgresql.dialect(), "cempaka")
+    assert "MATCH" not in sql(postgresql.dialect(), "cempaka")
+    assert any("gin_trgm_ops" in s for s in search.ddl_trigram("trafo"))
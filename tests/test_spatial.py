@@ -0,0 +1,91 @@
+import random
+import uuid
+
+import pytest
+
+import spatial
+
+
+@pytest.fixture
+def group_id(buat_group):
+    return buat_group()
+
+
+def nama(respons):
+    return sorted(t["name"] for t in respons.json()["data"])
+
+
+def test_bbox(client, headers, group_id, buat_trafo):
+    buat_trafo(group_id, name="dalam", longitude=106.8, latitude=-6.2)
+    buat_trafo(group_id, name="tepi", longitude=106.9, latitude=-6.1)
+    buat_trafo(group_id, name="luar", longitude=107.5, latitude=-6.2)
+
+    r = client.get("/trafo/bbox?minLon=106.7&minLat=-6.3&maxLon=106.9&maxLat=-6.1", headers=headers)
+    assert r.status_code == 200
+    assert nama(r) == ["dalam", "tepi"]
+
+    r = client.get("/trafo/bbox?minLon=106.7&minLat=-6.1&maxLon=106.9&maxLat=-6.3", headers=headers)
+    assert r.status_code == 400
+
+
+def test_bbox_hanya_trafo_milik_user(client, headers, group_id, buat_trafo):
+    buat_trafo(group_id, name="milik", longitude=10.0, latitude=10.0)
+    username = f"lain-{uuid.uuid4().hex[:8]}"
+    client.post("/register", json={"username": username, "password": "x"})
+    token = client.post("/login", json={"username": username, "password": "x"}).json()["data"]["access_token"]
+
+    r = client.get("/trafo/bbox?minLon=9&minLat=9&maxLon=11&maxLat=11", headers={"Authorization": token})
+    assert r.json()["data"] == []
+
+
+def test_bbox_melewati_antimeridian(client, headers, group_id, buat_trafo):
+    buat_trafo(group_id, name="timur", longitude=179.9, latitude=0.0)
+    buat_trafo(group_id, name="barat", longitude=-179.9, latitude=0.0)
+    buat_trafo(group_id, name="jauh", longitude=170.0, latitude=0.0)
+
+    # minLon > maxLon: bbox 179.5 .. 180 dan -180 .. -179.5
+    r = client.get("/trafo/bbox?minLon=179.5&minLat=-1&maxLon=-179.5&maxLat=1", headers=headers)
+    assert nama(r) == ["barat", "timur"]
+
+
+def test_rentang_lon():
+    assert spatial.rentang_lon(10, 20) == [(10, 20)]
+    assert spatial.rentang_lon(170, -170) == [(170, 180.0), (-180.0, -170)]
+    assert spatial.rentang_lon(175, 185) == [(175, 180.0), (-180.0, -175)]
+    assert spatial.rentang_lon(-185, -175) == [(175, 180.0), (-180.0, -175)]
+    assert spatial.rentang_lon(-200, 200) == [(-180.0, 180.0)]
+
+
+def test_nearest_sama_dengan_brute_force(client, headers, group_id, buat_trafo):
+    acak = random.Random(17)
+    titik = {}
+    for i in range(60):
+        lon, lat = 106 + acak.random(), -6 - acak.random()
+        buat_trafo(group_id, name=f"n{i}", longitude=lon, latitude=lat)
+        titik[f"n{i}"] = (lon, lat)
+
+    r = client.get("/trafo/nearest?lon=106.5&lat=-6.5&k=5", headers=headers)
+    assert r.status_code == 200
+    hasil = [(t["trafo"]["name"], t["jarak_km"]) for t in r.json()["data"]]
+
+    harapan = sorted(titik, key=lambda n: spatial.jarak_km(106.5, -6.5, *titik[n]))[:5]
+    assert [n for n, _ in hasil] == harapan
+    assert [j for _, j in hasil] == sorted(j for _, j in hasil)
+
+
+def test_nearest_melewati_antimeridian(client, headers, group_id, buat_trafo):
+    buat_trafo(group_id, name="seberang", longitude=-179.99, latitude=0.0)
+    buat_trafo(group_id, name="sisi_sama", longitude=179.0, latitude=0.0)
+
+    r = client.get("/trafo/nearest?lon=179.99&lat=0&k=1", headers=headers)
+    data = r.json()["data"]
+    assert [t["trafo"]["name"] for t in data] == ["seberang"]
+    assert data[0]["jarak_km"] == pytest.approx(2.2, abs=0.1)
+
+
+def test_nearest_k_lebih_dari_jumlah_trafo(client, headers, group_id, buat_trafo):
+    buat_trafo(group_id, name="a", longitude=0.0, latitude=0.0)
+    buat_trafo(group_id, name="b", longitude=120.0, latitude=40.0)
+
+    r = client.get(f"/trafo/nearest?lon=0&lat=0&k=10&groupId={group_id}", headers=headers)
+    assert [t["trafo"]["name"] for t in r.json()["data"]] == ["a", "b"]
@@ -1,80 +1,172 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from response import response_ok, response_paginate
-from database import SessionLocal, engine
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from response import etag_dari, last_modified_dari, not_modified, response_not_modified, response_ok, response_paginate, validator_headers
+from pagination import count_total, keyset_page
+from database import engine, get_db
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from auth import get_current_user
 
 import models, schemas
 import math
+import search
+import spatial
+import trafo_latest
 
 router = APIRouter(tags=["trafo"])
 
-# Dependency DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-        
 # Create table 'trafo' when not exist
 models.Base.metadata.create_all(bind=engine, tables=[models.Trafo.__table__])
+# Index spasial koordinat trafo (R*Tree di SQLite)
+# dan index pencarian nama/brand/type (FTS5 di SQLite, pg_trgm di PostgreSQL)
+with engine.begin() as conn:
+    spatial.create(conn)
+    search.create(conn, "trafo")
 
 # CREATE
 @router.post("/trafo/save", response_model=schemas.Trafo)
-def create_trafo(trafo: schemas.TrafoCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
+async def create_trafo(trafo: schemas.TrafoCreate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
     new_trafo = models.Trafo(**trafo.dict(), owner_id=current_user.id)
     db.add(new_trafo)
-    db.commit()
-    db.refresh(new_trafo)
+    await db.commit()
     return response_ok(data=None, message="Trafo created")
 
 # READ ALL
 @router.get("/trafo/find-all", response_model=list[schemas.Trafo])
-def read_all_trafo(q: str | None = Query(None, description="Cari berdasarkan nama"),
+async def read_all_trafo(q: str | None = Query(None, description="Cari di nama, brand dan type"),
     groupId: int = Query(description="ID Group Trafo wajib"),
     page: int = Query(0, description="Nomor halaman"),
     size: int = Query(10, description="Jumlah data per halaman"),
-    db: Session = Depends(get_db),
+    cursor: str | None = Query(None, description="Mode cursor: kosong untuk halaman pertama, lalu isi dengan nextCursor"),
+    withTotal: bool = Query(True, description="Hitung totalRecords (query COUNT tambahan)"),
+    db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user)
 ):
-    base_query = db.query(models.Trafo).filter(models.Trafo.owner_id == current_user.id, models.Trafo.group_id == groupId)
+    base_query = select(models.Trafo).where(models.Trafo.owner_id == current_user.id, models.Trafo.group_id == groupId)
+    urutan = []
     if q:
-        base_query = base_query.filter(models.Trafo.name.contains(q))
-    total = base_query.count()
+        # Index FTS5 trigram / pg_trgm (lihat search.py), hasil diurutkan menurut relevansi
+        base_query, urutan = search.cari(db.bind.dialect, base_query, models.Trafo, q)
+    total = await count_total(db, base_query) if withTotal else None
+    totalPage = (math.ceil(total / size) if total > 0 else 0) if withTotal else None
+    nextCursor = None
+    if cursor is not None:
+        # Keyset pagination di (name, id): tanpa OFFSET
+        list_of_trafo_models, nextCursor = await keyset_page(db, base_query, [models.Trafo.name, models.Trafo.id], cursor, size)
+    else:
+        list_of_trafo_models = (await db.scalars(base_query.order_by(*urutan).offset(page * size).limit(size))).all()
+    data_for_response = [schemas.Trafo.model_validate(trafo) for trafo in list_of_trafo_models]    
+    return response_paginate(data_for_response, page, size, total, totalPage, nextCursor=nextCursor)
+
+# FLEET: semua trafo milik user beserta bacaan terbarunya
+@router.get("/trafo/fleet", response_model=list[schemas.FleetTrafo])
+async def read_fleet_trafo(groupId: int | None = Query(None, description="Filter ID Group Trafo"),
+    page: int = Query(0, description="Nomor halaman"),
+    size: int = Query(100, description="Jumlah data per halaman"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    """
+    Satu query (LEFT JOIN ke trafo_latest) untuk seluruh trafo di halaman,
+    menggantikan panggilan /trafo/{id}/hasil-kalkulasi per trafo.
+    """
+    base_query = select(models.Trafo, models.TrafoLatest).\
+        outerjoin(models.TrafoLatest, models.TrafoLatest.id_trafo == models.Trafo.id).\
+        where(models.Trafo.owner_id == current_user.id)
+    if groupId is not None:
+        base_query = base_query.where(models.Trafo.group_id == groupId)
+    total = await count_total(db, base_query)
     totalPage = math.ceil(total / size) if total > 0 else 0
-    list_of_trafo_models = base_query.offset(page * size).limit(size).all()
-    data_for_response = [schemas.Trafo.model_validate(trafo).model_dump() for trafo in list_of_trafo_models]    
+    rows = (await db.execute(base_query.order_by(models.Trafo.id).offset(page * size).limit(size))).all()
+    data_for_response = [
+        schemas.FleetTrafo(
+            trafo=schemas.Trafo.model_validate(trafo),
+            hasil_kalkulasi=trafo_latest.ke_schema(latest) if latest is not None else None,
+        )
+        for trafo, latest in rows
+    ]
     return response_paginate(data_for_response, page, size, total, totalPage)
 
+# TRAFO DALAM BOUNDING BOX (viewport peta)
+@router.get("/trafo/bbox", response_model=list[schemas.Trafo])
+async def read_trafo_bbox(minLon: float = Query(..., ge=-180, le=180, description="minLon > maxLon berarti bbox melewati antimeridian"),
+    minLat: float = Query(..., ge=-90, le=90),
+    maxLon: float = Query(..., ge=-180, le=180),
+    maxLat: float = Query(..., ge=-90, le=90),
+    groupId: int | None = Query(None, description="Filter ID Group Trafo"),
+    limit: int = Query(5000, ge=1, le=50000, description="Jumlah maksimum trafo"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    if minLat > maxLat:
+        raise HTTPException(status_code=400, detail="Bounding box tidak valid")
+    query = spatial.query_bbox(db.bind.dialect, minLon, minLat, maxLon, maxLat).\
+        where(models.Trafo.owner_id == current_user.id)
+    if groupId is not None:
+        query = query.where(models.Trafo.group_id == groupId)
+    trafos = (await db.scalars(query.limit(limit))).all()
+    return response_ok(data=[schemas.Trafo.model_validate(trafo) for trafo in trafos])
+
+# K TRAFO TERDEKAT DARI SEBUAH TITIK
+@router.get("/trafo/nearest", response_model=list[schemas.TrafoJarak])
+async def read_trafo_nearest(lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    k: int = Query(10, ge=1, le=1000, description="Jumlah trafo terdekat"),
+    groupId: int | None = Query(None, description="Filter ID Group Trafo"),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user)
+):
+    filters = [models.Trafo.owner_id == current_user.id]
+    if groupId is not None:
+        filters.append(models.Trafo.group_id == groupId)
+    hasil = await spatial.nearest(db, lon, lat, k, filters)
+    data = [schemas.TrafoJarak(trafo=schemas.Trafo.model_validate(trafo), jarak_km=jarak) for trafo, jarak in hasil]
+    return response_ok(data=data)
+
 # READ BY ID
 @router.get("/trafo/find-one/{id}", response_model=schemas.TrafoDetail)
-def read_trafo(id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    trafo = db.query(models.Trafo).options(joinedload(models.Trafo.group)).filter(models.Trafo.id == id, models.Trafo.owner_id == current_user.id).first()
+async def read_trafo(id: int, request: Request, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    # Validator dari versi baris trafo dan group-nya, tanpa memuat seluruh data
+    versi = (await db.execute(
+        select(models.Trafo.updated_at, models.GroupTrafo.name, models.GroupTrafo.kodegrup,
+               models.GroupTrafo.updated_at.label("group_updated_at")).
+        outerjoin(models.GroupTrafo, models.GroupTrafo.id == models.Trafo.group_id).
+        where(models.Trafo.id == id, models.Trafo.owner_id == current_user.id)
+    )).first()
+    if not versi:
+        raise HTTPException(status_code=404, detail="Trafo not found")
+    etag = etag_dari("trafo", id, *versi)
+    last_modified = last_modified_dari(versi.updated_at, versi.group_updated_at)
+    headers = validator_headers(etag, last_modified)
+    if not_modified(request, etag, last_modified):
+        return response_not_modified(etag, headers)
+
+    trafo = await db.scalar(select(models.Trafo).options(joinedload(models.Trafo.group)).where(models.Trafo.id == id, models.Trafo.owner_id == current_user.id))
     if not trafo:
         raise HTTPException(status_code=404, detail="Trafo not found")
-    trafo_schema = schemas.TrafoDetail.model_validate(trafo)
-    trafo_data = trafo_schema.model_dump()
-    return response_ok(data=trafo_data)
+    response = response_ok(data=schemas.TrafoDetail.model_validate(trafo))
+    response.headers.update(headers)
+    return response
 
 # UPDATE BY ID
 @router.post("/trafo/update/{id}", response_model=schemas.Trafo)
-def update_trafo(id: int, trafo: schemas.TrafoCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_trafo = db.query(models.Trafo).filter(models.Trafo.id == id, models.Trafo.owner_id == current_user.id).first()
+async def update_trafo(id: int, trafo: schemas.TrafoCreate, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    db_trafo = await db.scalar(select(models.Trafo).where(models.Trafo.id == id, models.Trafo.owner_id == current_user.id))
     if not db_trafo:
         raise HTTPException(status_code=404, detail="Trafo not found")
     for key, value in trafo.dict().items():
         setattr(db_trafo, key, value)
-    db.commit()
-    db.refresh(db_trafo)
+    await db.commit()
     return response_ok(data=None, message="Trafo updated")
 
 # DELETE BY ID
 @router.post("/trafo/delete/{id}")
-def delete_trafo_by_id(id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    db_trafo = db.query(models.Trafo).filter(models.Trafo.id == id, models.Trafo.owner_id == current_user.id).first()
+async def delete_trafo_by_id(id: int, db: AsyncSession = Depends(get_db), current_user=Depends(get_current_user)):
+    db_trafo = await db.scalar(select(models.Trafo).where(models.Trafo.id == id, models.Trafo.owner_id == current_user.id))
     if not db_trafo:
         raise HTTPException(status_code=404, detail="Trafo not found")
-    db.delete(db_trafo)
-    db.commit()
+    await db.execute(delete(models.TrafoLatest).where(models.TrafoLatest.id_trafo == id))
+    await db.execute(delete(models.HasilKalkulasiRollup).where(models.HasilKalkulasiRollup.id_trafo == id))
+    await db.delete(db_trafo)
+    await db.commit()
     return response_ok(data=None, message="Trafo deleted")
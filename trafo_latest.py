@@ -0,0 +1,61 @@
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import Connection
+
+import models, schemas
+
+# Kolom nilai yang disalin dari hasil_kalkulasi ke trafo_latest
+KOLOM = [
+    c.name for c in models.TrafoLatest.__table__.columns
+    if c.name not in ("id_trafo", "id_hasil_kalkulasi")
+]
+
+
+def query_terbaru(id_trafo: int):
+    """
+    SELECT bacaan terbaru satu trafo; memakai index (id_trafo, waktu_kalkulasi DESC).
+    """
+    h = models.HasilKalkulasi.__table__
+    return select(h.c.id_trafo, h.c.id, *[h.c[k] for k in KOLOM]).\
+        where(h.c.id_trafo == id_trafo).\
+        order_by(h.c.waktu_kalkulasi.desc().nulls_last()).\
+        limit(1)
+
+
+def query_hasil_kalkulasi_terbaru(trafo_id: int):
+    """
+    Select hasil_kalkulasi satu trafo, terbaru lebih dulu.
+    Dilayani oleh index (id_trafo, waktu_kalkulasi DESC) (lihat tests/test_query_plan.py).
+    """
+    return select(models.HasilKalkulasi).\
+        where(models.HasilKalkulasi.id_trafo == trafo_id).\
+        order_by(models.HasilKalkulasi.waktu_kalkulasi.desc().nulls_last())
+
+
+def refresh(conn: Connection, id_trafo: int):
+    """
+    Salin bacaan terbaru satu trafo ke trafo_latest.
+    Dipanggil di transaksi yang sama dengan insert batch.
+    """
+    t = models.TrafoLatest.__table__
+    conn.execute(delete(t).where(t.c.id_trafo == id_trafo))
+    conn.execute(insert(t).from_select(["id_trafo", "id_hasil_kalkulasi", *KOLOM], query_terbaru(id_trafo)))
+
+
+def backfill(conn: Connection):
+    """
+    Isi ulang trafo_latest untuk semua trafo dari histori hasil_kalkulasi.
+    """
+    h = models.HasilKalkulasi.__table__
+    id_trafos = conn.execute(select(h.c.id_trafo).distinct()).scalars().all()
+    for id_trafo in id_trafos:
+        refresh(conn, id_trafo)
+    return len(id_trafos)
+
+
+def ke_schema(latest: models.TrafoLatest):
+    """
+    Ubah baris trafo_latest menjadi schemas.HasilKalkulasi (id = id hasil_kalkulasi asli).
+    """
+    data = {nama: getattr(latest, nama) for nama in schemas.HasilKalkulasiBase.model_fields}
+    data["id"] = latest.id_hasil_kalkulasi
+    return schemas.HasilKalkulasi(**data)
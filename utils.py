@@ -1,3 +1,6 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -6,7 +9,19 @@ SECRET_KEY = "secret-jwt-key"  # ganti dengan key aman di env
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE = 1440 # in minutes (1 day)
 
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+# Jumlah iterasi pbkdf2_sha256. Hash lama dengan rounds lebih kecil di-rehash saat login
+PASSWORD_HASH_ROUNDS = int(os.getenv("PASSWORD_HASH_ROUNDS", "29000"))
+# Jumlah thread khusus hashing password (hashlib melepas GIL selama pbkdf2)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=PASSWORD_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=PASSWORD_HASH_ROUNDS,
+)
+
+hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
 
 def hash_password(password: str):
     return pwd_context.hash(password)
@@ -14,6 +29,20 @@ def hash_password(password: str):
 def verify_password(plain, hashed):
     return pwd_context.verify(plain, hashed)
 
+def verify_and_update_password(plain, hashed):
+    """
+    Verifikasi password; kembalikan (valid, hash_baru). hash_baru berisi hash
+    dengan setting terbaru jika hash lama perlu di-update (needs_update), selain itu None.
+    """
+    return pwd_context.verify_and_update(plain, hashed)
+
+# Versi async: jalankan di pool hashing agar event loop dan threadpool request tidak tertahan
+async def hash_password_async(password: str):
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, hash_password, password)
+
+async def verify_and_update_password_async(plain, hashed):
+    return await asyncio.get_running_loop().run_in_executor(hash_executor, verify_and_update_password, plain, hashed)
+
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE)